@@ -11,6 +11,9 @@ python manage.py collectstatic --noinput
 echo "Migrate starting..."
 python manage.py migrate --noinput
 
+echo "Migrate logger database..."
+python manage.py migrate_logger
+
 echo "Create permissions for new models..."
 python manage.py create_permissions
 
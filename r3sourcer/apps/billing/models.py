@@ -16,13 +16,14 @@ from r3sourcer import ref
 from r3sourcer.apps.core import tasks
 from r3sourcer.apps.core.models import VAT
 from r3sourcer.apps.core.models.mixins import CompanyTimeZoneMixin
+from r3sourcer.apps.logger.mixins import LoggerChangeTrackingMixin
 from r3sourcer.apps.email_interface.models import EmailTemplate, DefaultEmailTemplate
 from r3sourcer.helpers.datetimes import utc_now
 
 logger = logging.getLogger(__name__)
 
 
-class Subscription(CompanyTimeZoneMixin):
+class Subscription(LoggerChangeTrackingMixin, CompanyTimeZoneMixin):
     """Subscription class mirrors the Stripe subscription
 
     Statuses:
@@ -335,7 +336,7 @@ class SMSBalance(models.Model):
         return True
 
 
-class Payment(CompanyTimeZoneMixin):
+class Payment(LoggerChangeTrackingMixin, CompanyTimeZoneMixin):
     PAYMENT_TYPES = Choices(
         ('sms', 'SMS'),
         ('extra_workers', 'Extra Workers'),
@@ -377,7 +378,7 @@ class Payment(CompanyTimeZoneMixin):
         return True
 
 
-class Discount(CompanyTimeZoneMixin):
+class Discount(LoggerChangeTrackingMixin, CompanyTimeZoneMixin):
     DURATIONS = Choices(
         ('forever', 'Forever'),
         ('once', 'Once'),
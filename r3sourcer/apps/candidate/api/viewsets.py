@@ -17,6 +17,7 @@ from r3sourcer.apps.acceptance_tests.api.serializers import AcceptanceTestCandid
 from r3sourcer.apps.acceptance_tests.models import AcceptanceTestWorkflowNode
 from r3sourcer.apps.candidate.api.filters import CandidateContactAnonymousFilter
 from r3sourcer.apps.core import tasks as core_tasks
+from r3sourcer.apps.core.api.pagination import COUNT_ESTIMATED
 from r3sourcer.apps.core.api.permissions import SiteContactPermissions
 from r3sourcer.apps.core.api.viewsets import BaseApiViewset, BaseViewsetMixin
 from r3sourcer.apps.core.models import Company, InvoiceRule, Workflow, WorkflowObject, \
@@ -34,6 +35,8 @@ from ...core.utils.utils import normalize_phone_number
 
 
 class CandidateContactViewset(BaseApiViewset):
+    count_mode = COUNT_ESTIMATED
+    keyset_fields = ('-created_at', )
 
     def get_queryset(self):
         qs = super().get_queryset()
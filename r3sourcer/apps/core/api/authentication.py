@@ -1,10 +1,13 @@
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.utils.translation import ugettext_lazy as _
 from rest_framework import exceptions
 from oauth2_provider_jwt import authentication
 
+JWT_USER_CACHE_KEY = 'jwt_user:{}'
+
 
 class JWTAuthentication(authentication.JWTAuthentication):
     def authenticate_credentials(self, payload):
@@ -18,9 +21,8 @@ class JWTAuthentication(authentication.JWTAuthentication):
             msg = _('Invalid payload.')
             raise exceptions.AuthenticationFailed(msg)
 
-        try:
-            user = User.objects.get(id=user_id)
-        except User.DoesNotExist:
+        user = self.get_user(User, user_id)
+        if user is None:
             msg = _('Invalid signature.')
             raise exceptions.AuthenticationFailed(msg)
 
@@ -29,3 +31,26 @@ class JWTAuthentication(authentication.JWTAuthentication):
             raise exceptions.AuthenticationFailed(msg)
 
         return user
+
+    def get_user(self, User, user_id):
+        """
+        Gets user by id, the user is kept in the cache for JWT_USER_CACHE_TIMEOUT seconds
+        """
+        timeout = settings.JWT_USER_CACHE_TIMEOUT
+        cache_key = JWT_USER_CACHE_KEY.format(user_id)
+
+        user = cache.get(cache_key) if timeout else None
+        if user is None:
+            try:
+                user = User.objects.get(id=user_id)
+            except User.DoesNotExist:
+                return None
+
+            if timeout:
+                cache.set(cache_key, user, timeout)
+
+        return user
+
+
+def forget_jwt_user(user_id):
+    cache.delete(JWT_USER_CACHE_KEY.format(user_id))
@@ -23,7 +23,11 @@ class WorkflowStatesColumnMixin():
         if not obj:
             return
 
-        states = obj.get_active_states()
+        states = obj.get_cached_states(active=True)
+        if states is None:
+            states = obj.get_active_states()
+        else:
+            states = sorted(states, key=lambda state: state.state.number, reverse=True)
 
         return [
             {
@@ -40,24 +44,57 @@ class CreatedUpdatedByMixin:
         method_fields = list(super().get_method_fields())
         return method_fields + ['created_by', 'updated_by']
 
-    def get_field_to_check_create(self, obj):
+    @classmethod
+    def get_field_to_check_create(cls, obj):
         return 'id'
 
-    def get_field_to_check_update(self, obj):
+    @classmethod
+    def get_field_to_check_update(cls, obj):
         return 'updated_at'
 
-    def _get_log_updated_by(self, obj, log_type=None):
+    @classmethod
+    def _get_log_field(cls, obj, log_type=None):
         if log_type and log_type == 'create':
-            field = self.get_field_to_check_create(obj)
-        else:
-            field = self.get_field_to_check_update(obj)
-
-        log_entry = endless_logger.get_recent_field_change(self.Meta.model, obj.id, field, log_type)
+            return cls.get_field_to_check_create(obj)
+        return cls.get_field_to_check_update(obj)
+
+    @classmethod
+    def get_preloaded_context(cls, objs):
+        """
+        Loads created/updated by log entries and their users of the page at once,
+        result is passed to the serializer context
+        """
+        model = cls.Meta.model
+        preloaded = {}
+        for log_type in ('create', None):
+            ids_by_field = {}
+            for obj in objs:
+                ids_by_field.setdefault(cls._get_log_field(obj, log_type), []).append(obj.id)
+
+            changes = {}
+            for field, object_ids in ids_by_field.items():
+                field_changes = endless_logger.get_recent_field_changes(model, object_ids, field, log_type)
+                changes.update({str(object_id): field_changes.get(str(object_id), {}) for object_id in object_ids})
+
+            preloaded[(model._meta.label, log_type)] = changes
+
+        return {'log_updated_by': preloaded}
+
+    def _get_log_entry(self, obj, log_type=None):
+        preloaded = self.context.get('log_updated_by', {}).get((self.Meta.model._meta.label, log_type), {})
+        if str(obj.id) in preloaded:
+            return preloaded[str(obj.id)]
+
+        log_entry = endless_logger.get_recent_field_change(
+            self.Meta.model, obj.id, self._get_log_field(obj, log_type), log_type
+        )
         if 'updated_by' in log_entry:
-            user = User.objects.get(id=log_entry['updated_by'])
-            email = user.email if hasattr(user, 'contact') else None
-        else:
-            email = None
+            log_entry['user'] = User.objects.filter(id=log_entry['updated_by']).first()
+        return log_entry
+
+    def _get_log_updated_by(self, obj, log_type=None):
+        user = self._get_log_entry(obj, log_type).get('user')
+        email = user.email if user is not None and hasattr(user, 'contact') else None
 
         if not email:
             email = settings.SYSTEM_USER
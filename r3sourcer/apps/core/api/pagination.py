@@ -1,10 +1,42 @@
+import base64
+import json
 from collections import OrderedDict
 
+from django.db import connections
+from django.db.models import Q
+from django.utils.translation import ugettext_lazy as _
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.pagination import LimitOffsetPagination, _positive_int
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+COUNT_EXACT, COUNT_ESTIMATED = 'exact', 'estimated'
 
 
 class ApiLimitOffsetPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination with opt-in keyset pagination and estimated counts
+
+    View attributes:
+    ``count_mode`` - COUNT_EXACT (default) runs COUNT(*) on every page, COUNT_ESTIMATED allows
+    clients to ask for an estimated count with ``count_mode=estimated`` query param, it
+    uses ``pg_class.reltuples`` for unfiltered tables and counts at most ``count_cap`` rows otherwise.
+    Estimated counts are flagged with ``count_estimated`` in the response.
+    ``keyset_fields`` - not null model fields, e.g. ('-created_at', ), which allow clients to paginate
+    with ``cursor`` query param instead of offset. Primary key is added as a tie breaker. Other
+    ``ordering`` than the keyset fields is rejected in the cursor mode.
+    """
+
+    cursor_query_param = 'cursor'
+    count_mode_query_param = 'count_mode'
+    count_cap = 10000
+
+    invalid_cursor_message = _('Invalid cursor')
+    invalid_ordering_message = _('Only {ordering} ordering is supported with cursor')
+
+    count_mode = COUNT_EXACT
+    keyset_fields = None
+    next_cursor = None
 
     def get_limit(self, request):
         if self.limit_query_param:
@@ -31,14 +63,142 @@ class ApiLimitOffsetPagination(LimitOffsetPagination):
         if isinstance(data, dict):
             message = data.pop('message', None)
             results = data.get('results')
-        return Response(OrderedDict([
+
+        response_data = OrderedDict([
             ('count', self.count),
             ('message', message),
             ('results', results)
-        ]))
+        ])
+        if self.count_mode == COUNT_ESTIMATED:
+            response_data['count_estimated'] = True
+        if self.keyset_fields:
+            response_data['next'] = self.next_cursor
+
+        return Response(response_data)
 
     def paginate_queryset(self, queryset, request, view=None):
         if not queryset.query.order_by:
             queryset = queryset.order_by('pk')
 
-        return super().paginate_queryset(queryset, request, view)
+        self.count_mode = self.get_count_mode(request, view)
+        keyset_fields = getattr(view, 'keyset_fields', None)
+        if keyset_fields and self.cursor_query_param in request.query_params:
+            self.check_keyset_ordering(request, keyset_fields)
+            self.keyset_fields = list(keyset_fields)
+        elif self.count_mode == COUNT_EXACT:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.count = self.get_count(queryset, self.count_mode)
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.request = request
+        if self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+
+        if self.keyset_fields:
+            self.offset = 0
+            return self.paginate_keyset(queryset, request)
+
+        # estimated count can be less than the real one, deep pages are not cut
+        self.offset = self.get_offset(request)
+        return list(queryset[self.offset:self.offset + self.limit])
+
+    def get_count_mode(self, request, view):
+        """
+        Estimated count is used only if the view allows it and the client asks for it
+        """
+        if getattr(view, 'count_mode', COUNT_EXACT) != COUNT_ESTIMATED:
+            return COUNT_EXACT
+
+        if request.query_params.get(self.count_mode_query_param) == COUNT_ESTIMATED:
+            return COUNT_ESTIMATED
+
+        return COUNT_EXACT
+
+    def check_keyset_ordering(self, request, keyset_fields):
+        ordering = request.query_params.get(api_settings.ORDERING_PARAM)
+        if not ordering:
+            return
+
+        if [field.strip() for field in ordering.split(',')] != list(keyset_fields):
+            raise ValidationError({
+                api_settings.ORDERING_PARAM: self.invalid_ordering_message.format(ordering=','.join(keyset_fields))
+            })
+
+    def get_count(self, queryset, count_mode=COUNT_EXACT):
+        if count_mode == COUNT_ESTIMATED:
+            return self.get_estimated_count(queryset)
+
+        try:
+            return queryset.count()
+        except (AttributeError, TypeError):
+            return len(queryset)
+
+    def get_estimated_count(self, queryset):
+        """
+        Estimate number of rows, exact count is used for small results only
+
+        Unfiltered querysets use table statistics of the planner, filtered ones
+        are counted up to `count_cap` rows.
+        """
+        query = queryset.query
+        if not query.where and not query.distinct and connections[queryset.db].vendor == 'postgresql':
+            with connections[queryset.db].cursor() as cursor:
+                cursor.execute('SELECT reltuples FROM pg_class WHERE relname = %s', [queryset.model._meta.db_table])
+                row = cursor.fetchone()
+
+            if row is not None and row[0] >= self.count_cap:
+                return int(row[0])
+
+        return queryset.order_by()[:self.count_cap].count()
+
+    def get_keyset_ordering(self):
+        tie_breaker = '-pk' if self.keyset_fields[-1].startswith('-') else 'pk'
+        return self.keyset_fields + [tie_breaker]
+
+    def encode_cursor(self, obj):
+        values = [getattr(obj, field.lstrip('-')) for field in self.get_keyset_ordering()]
+        # str keeps microseconds of datetimes, DjangoJSONEncoder cuts them to milliseconds
+        cursor = json.dumps(values, default=str)
+
+        return base64.urlsafe_b64encode(cursor.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(values, list) or len(values) != len(self.get_keyset_ordering()):
+            raise NotFound(self.invalid_cursor_message)
+
+        return values
+
+    def get_keyset_filter(self, values):
+        """
+        Filter rows after the cursor: (a > x) or (a = x and b > y) or ... for ordering (a, b, ...)
+        """
+        keyset_filter = Q()
+        equal = Q()
+        for field, value in zip(self.get_keyset_ordering(), values):
+            lookup = '{}__lt' if field.startswith('-') else '{}__gt'
+            field = field.lstrip('-')
+
+            keyset_filter |= equal & Q(**{lookup.format(field): value})
+            equal &= Q(**{field: value})
+
+        return keyset_filter
+
+    def paginate_keyset(self, queryset, request):
+        queryset = queryset.order_by(*self.get_keyset_ordering())
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.get_keyset_filter(self.decode_cursor(cursor)))
+
+        page = list(queryset[:self.limit + 1])
+        self.next_cursor = self.encode_cursor(page[self.limit - 1]) if 0 < self.limit < len(page) else None
+
+        return page[:self.limit]
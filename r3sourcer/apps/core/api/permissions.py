@@ -8,6 +8,7 @@ from rest_framework import permissions
 from r3sourcer.apps.core.models import SiteCompany
 
 from ..utils.companies import get_master_companies, get_closest_companies, get_site_master_company
+from ..utils.request_context import resolve_for_request
 from ..utils.utils import get_host
 
 
@@ -48,6 +49,11 @@ class SiteContactPermissions(SitePermissions):
         return request.user and request.user.is_authenticated and self.is_master_related(request.user, request)
 
     def is_master_related(self, user, request):
+        return resolve_for_request(
+            request, ('is_master_related', user.pk), lambda: self._is_master_related(user, request)
+        )
+
+    def _is_master_related(self, user, request):
         contact = user.contact
         closest_company = None
 
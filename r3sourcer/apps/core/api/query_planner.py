@@ -0,0 +1,134 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers, relations
+
+
+def get_model_field(model, source):
+    """Get model field by name or reverse relation by accessor name, e.g. `city_set`"""
+    try:
+        return model._meta.get_field(source)
+    except FieldDoesNotExist:
+        for related_object in model._meta.related_objects:
+            if related_object.get_accessor_name() == source:
+                return related_object
+
+
+class QueryPlan:
+    """
+    Relations and columns a serializer reads from its model instances.
+
+    `select_related` holds forward foreign key paths which can be joined,
+    `prefetch_related` holds many relations and everything below them.
+    `only` is None when the serializer reads attributes that are not
+    concrete model fields (methods, properties, __str__) of any model,
+    including related fields which render the related object itself,
+    deferring columns would cost one query per object then.
+    """
+
+    max_depth = 3
+
+    def __init__(self):
+        self.select_related = []
+        self.prefetch_related = []
+        self.only = []
+
+    def add_related(self, lookup, prefetch):
+        lookups = self.prefetch_related if prefetch else self.select_related
+        if lookup not in lookups:
+            lookups.append(lookup)
+
+    def add_only(self, column):
+        if self.only is not None and column not in self.only:
+            self.only.append(column)
+
+    def walk(self, serializer, model, prefix='', prefetch=False, depth=0):
+        """
+        Collect lookups of the serializer fields for model
+
+        :param serializer: bound serializer instance
+        :param model: model of the serialized objects
+        :param prefix: lookup of the model from the root model
+        :param prefetch: whether the model is reached through a many relation
+        :param depth: nesting level of the serializer
+        """
+        for field in serializer.fields.values():
+            if field.write_only:
+                continue
+
+            source = field.source
+            if source == '*' or '.' in source:
+                self.only = None
+                continue
+
+            model_field = get_model_field(model, source)
+
+            if model_field is None or not model_field.is_relation:
+                if model_field is None or not model_field.concrete:
+                    self.only = None
+                elif not prefetch:
+                    self.add_only(prefix + model_field.name)
+                continue
+
+            if model_field.auto_created and not model_field.concrete and \
+                    model_field.get_accessor_name() != source:
+                self.only = None
+                continue
+
+            lookup = prefix + source
+            is_many = model_field.many_to_many or model_field.one_to_many
+            is_generic = model_field.related_model is None
+
+            if model_field.concrete and not prefetch:
+                self.add_only(prefix + model_field.name)
+
+            if isinstance(field, relations.PrimaryKeyRelatedField) and not is_many:
+                continue
+
+            if isinstance(field, serializers.ListSerializer):
+                field = field.child
+            elif isinstance(field, relations.ManyRelatedField):
+                field = field.child_relation
+
+            if is_generic:
+                self.only = None
+                self.add_related(lookup, prefetch=True)
+                continue
+
+            # fields like ApiBaseRelatedField and StringRelatedField render the related object itself
+            if not isinstance(field, (relations.PrimaryKeyRelatedField, serializers.BaseSerializer)):
+                self.only = None
+
+            related_prefetch = prefetch or is_many
+            self.add_related(lookup, prefetch=related_prefetch)
+
+            if isinstance(field, serializers.BaseSerializer) and depth < self.max_depth:
+                self.walk(field, model_field.related_model, lookup + '__', related_prefetch, depth + 1)
+
+
+def plan_queryset(queryset, serializer):
+    """
+    Apply select_related, prefetch_related and only() needed by serializer to the queryset
+
+    Querysets with deferred fields, values() querysets and querysets combined with union() are returned as is.
+
+    :param queryset: queryset of the serialized objects
+    :param serializer: serializer instance, child serializer is used for many=True
+    :return: planned queryset
+    """
+    if getattr(queryset, 'query', None) is None or queryset._fields is not None or queryset.query.combinator or \
+            queryset.query.deferred_loading != (frozenset(), True):
+        return queryset
+
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+
+    plan = QueryPlan()
+    plan.walk(serializer, queryset.model)
+
+    if plan.select_related:
+        queryset = queryset.select_related(*plan.select_related)
+    if plan.prefetch_related:
+        queryset = queryset.prefetch_related(*plan.prefetch_related)
+    if plan.only:
+        queryset = queryset.only(*plan.only)
+
+    return queryset
@@ -1,3 +1,4 @@
+import copy
 from datetime import datetime, time
 from itertools import chain
 from collections import OrderedDict
@@ -35,12 +36,54 @@ from r3sourcer.apps.core.api import mixins as core_mixins, fields as core_field
 from r3sourcer.apps.core.models import Workflow
 from r3sourcer.apps.myob.models import MYOBSyncObject
 from r3sourcer.helpers.datetimes import utc_now, tz2utc
+from r3sourcer.helpers.lru import LRUCache
 
 rest_settings = settings.REST_FRAMEWORK
 
 RELATED_NONE, RELATED_DIRECT, RELATED_FULL = 'minimal', 'direct', 'full'
 
 
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class SerializerCache:
+    """
+    Process-wide LRU of dynamically built serializer classes and resolved serializer fields.
+
+    Values are built by `build_func` on a miss, unhashable keys are never cached.
+    """
+
+    lru_size = 1000
+    enabled = True
+
+    def __init__(self):
+        self._cache = LRUCache(self.lru_size)
+
+    def get(self, key, build_func):
+        if not self.enabled:
+            return build_func()
+
+        try:
+            hash(key)
+        except TypeError:
+            return build_func()
+
+        # nested serializers use the cache while being built, LRUCache builds values without the lock
+        return self._cache.get_or_build(key, build_func)
+
+    def clear(self):
+        self._cache.clear()
+
+
+internal_serializers = SerializerCache()
+serializer_fields = SerializerCache()
+
+
 class ApiFullRelatedFieldsMixin():
     """
     Use Meta of the serializer class to render related objects
@@ -250,20 +293,36 @@ class ApiFullRelatedFieldsMixin():
         if not isinstance(related_fields, (list, tuple)) or not related_fields:
             related_fields = '__all__'
 
-        meta_properties = dict(
-            model=model,
-            fields=related_fields,
-            related=related_setting
-        )
+        def build_internal():
+            meta_properties = dict(
+                model=model,
+                fields=related_fields,
+                related=related_setting
+            )
 
-        internal_meta = type('Meta', (object,), meta_properties)
-        internal = type(
-            '{}InternalSerializer'.format(model.__name__),
-            (ApiBaseModelSerializer,),
-            dict(Meta=internal_meta)
+            internal_meta = type('Meta', (object,), meta_properties)
+            return type(
+                '{}InternalSerializer'.format(model.__name__),
+                (ApiBaseModelSerializer,),
+                dict(Meta=internal_meta)
+            )
+
+        return internal_serializers.get((model, _freeze(related_fields), related_setting), build_internal)
+
+    def get_fields(self):
+        """
+        Resolve fields once per serializer class and field set, every instance gets a copy of cached fields
+        """
+        meta = getattr(self, 'Meta', None)
+        key = (
+            type(self),
+            _freeze(getattr(meta, 'fields', None)),
+            _freeze(getattr(meta, 'exclude', None)),
+            tuple(self._declared_fields),
         )
+        fields = serializer_fields.get(key, lambda: copy.deepcopy(super(ApiFullRelatedFieldsMixin, self).get_fields()))
 
-        return internal
+        return copy.deepcopy(fields)
 
     def _get_id_related_field(self, field, queryset=None, read_only=None):
         if hasattr(field, 'child_relation'):
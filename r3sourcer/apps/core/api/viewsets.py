@@ -27,6 +27,7 @@ from r3sourcer.apps.core import tasks
 from r3sourcer.apps.core.api.contact_bank_accounts.serializers import ContactBankAccountFieldSerializer
 from r3sourcer.apps.core.api.fields import ApiBase64FileField
 from r3sourcer.apps.core.api.mixins import GoogleAddressMixin
+from r3sourcer.apps.core.api.query_planner import plan_queryset
 from r3sourcer.apps.core.models import BankAccountLayout, ContactBankAccount, BankAccountField, Contact
 from r3sourcer.apps.core.models.dashboard import DashboardModule
 from r3sourcer.apps.core.utils.address import parse_google_address
@@ -79,6 +80,19 @@ class BaseApiViewset(BaseViewsetMixin, viewsets.ModelViewSet):
     picture_fields = {'picture', 'logo'}
     phone_fields = []
 
+    plan_queries = True
+
+    def plan_queryset(self, queryset, serializer_class, fields, context):
+        """
+        Load relations rendered by the serializer with the list queryset
+        """
+        if not self.plan_queries:
+            return queryset
+
+        # serializers write related setting into the context, keep the original one for rendering
+        serializer = serializer_class(fields=fields, context=dict(context))
+        return plan_queryset(queryset, serializer)
+
     def _paginate(self, request, serializer_class, queryset=None, context=None):
         queryset = self.filter_queryset(self.get_queryset()) if queryset is None else queryset
         fields = self.get_list_fields(request)
@@ -87,8 +101,16 @@ class BaseApiViewset(BaseViewsetMixin, viewsets.ModelViewSet):
         if context is not None:
             serializer_context.update(context)
 
+        queryset = self.plan_queryset(queryset, serializer_class, fields, serializer_context)
+
         page = self.paginate_queryset(queryset)
         if page is not None:
+            model = getattr(queryset, 'model', None)
+            if model is not None and issubclass(model, WorkflowProcess):
+                model.preload_workflow_states(page)
+
+            if hasattr(serializer_class, 'get_preloaded_context'):
+                serializer_context.update(serializer_class.get_preloaded_context(page))
 
             serializer = serializer_class(page, many=True, fields=fields, context=serializer_context)
             data = self.process_response_data(serializer.data, page)
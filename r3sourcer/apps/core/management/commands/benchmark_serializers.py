@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+from r3sourcer.apps.core.api import serializers as core_serializers
+
+
+class Command(BaseCommand):
+    """
+    Measures serializer throughput with and without the serializer fields cache.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('serializer', type=str, help='Dotted path of the serializer class')
+        parser.add_argument('--count', type=int, dest='count', default=100, help='Number of objects to serialize')
+        parser.add_argument('--repeat', type=int, dest='repeat', default=10, help='Number of serializations')
+
+    def run(self, serializer_class, objects, repeat):
+        started_at = time.monotonic()
+        for _ in range(repeat):
+            for obj in objects:
+                serializer_class(obj).data
+
+        return time.monotonic() - started_at
+
+    def handle(self, *args, **options):
+        serializer_class = import_string(options['serializer'])
+        objects = list(serializer_class.Meta.model.objects.all()[:options['count']])
+        repeat = options['repeat']
+        rows = len(objects) * repeat
+
+        for enabled in (False, True):
+            core_serializers.internal_serializers.clear()
+            core_serializers.serializer_fields.clear()
+            core_serializers.internal_serializers.enabled = enabled
+            core_serializers.serializer_fields.enabled = enabled
+
+            seconds = self.run(serializer_class, objects, repeat)
+            self.stdout.write('cache {}: {} rows in {:.2f}s, {:.1f} rows/s'.format(
+                'on' if enabled else 'off', rows, seconds, rows / max(seconds, 0.001)
+            ))
@@ -2,7 +2,7 @@ from datetime import date
 from functools import reduce
 
 from django.db import models
-from django.db.models import Q
+from django.db.models import Exists, Q
 from mptt.managers import TreeManager
 
 from r3sourcer.apps.logger.query import LoggerQuerySet
@@ -13,15 +13,179 @@ class TagManager(TreeManager):
         return self.get_queryset().filter(active=True)
 
 
+def _prefix_lookups(lookups, path):
+    return [
+        Q(**{'%s__%s' % (path, k): v for k, v in dict(lookup.children).items()})
+        for lookup in lookups
+    ]
+
+
+class OwnerLookupPlan:
+    """
+    Relation paths from a model to its owner model.
+
+    `forward` steps follow foreign keys like `get_lookups`:
+    ('direct', path) - the path leads to the owner model,
+    ('owned_by', path, model) - `owned_by_lookups` of the related model prefixed with the path,
+    ('custom', path, model) - overridden `get_lookups` of the related model queryset.
+    `related` steps follow reverse relations like `_get_obj_related_lookups`:
+    (related model, field name, is direct), they are used only without forward steps.
+    Relations after a direct one are used only while the direct relations before them are empty.
+    """
+
+    def __init__(self):
+        self.forward = []
+        self.related = []
+
+    def get_lookups(self, _obj):
+        lookups = []
+        for step in self.forward:
+            if step[0] == 'direct':
+                lookups.append(Q(**{step[1]: _obj}))
+            elif step[0] == 'owned_by':
+                lookups.extend(_prefix_lookups(step[2].owned_by_lookups(_obj), step[1]))
+            else:
+                lookups.extend(step[2].objects.get_lookups(_obj, step[1]))
+
+        return lookups
+
+    def get_related_lookups(self, model, _obj, passed_models):
+        lookups = []
+        direct_querysets = []
+        passed_models.append(model)
+        try:
+            for related_model, field_name, is_direct in self.related:
+                qs = related_model.objects
+                if not is_direct and hasattr(qs, 'owned_by'):
+                    qs = qs.owned_by(_obj)
+                qs = qs.filter(**{'%s__isnull' % field_name: False})
+
+                # the same as the walk stopping at the first not empty direct relation
+                related = qs
+                for index, direct_qs in enumerate(direct_querysets):
+                    exists_name = '_direct_%s_exists' % index
+                    related = related.annotate(**{exists_name: Exists(direct_qs)}).filter(**{exists_name: False})
+
+                lookups.append(Q(id__in=related.values_list(field_name, flat=True)))
+                if is_direct:
+                    direct_querysets.append(qs.values('pk'))
+        finally:
+            passed_models.remove(model)
+
+        return lookups
+
+
+class OwnerLookupPlans:
+    """
+    Process-wide cache of owner lookup plans.
+
+    Plans are compiled once per queryset class, model, owner model and
+    models already passed by reverse relations, `owned_by_lookups` of the
+    related models are expected to depend on the owner type only.
+    """
+
+    def __init__(self):
+        self._plans = {}
+
+    def get(self, queryset, _obj):
+        key = (type(queryset), queryset.model, type(_obj), tuple(queryset.passed_models))
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = self.compile(queryset, _obj)
+            self._plans[key] = plan
+
+        return plan
+
+    def compile(self, queryset, _obj):
+        plan = OwnerLookupPlan()
+        if type(queryset).get_lookups is not AbstractObjectOwnerQuerySet.get_lookups:
+            plan.forward.append(('custom', '', queryset.model))
+        else:
+            plan.forward = self.compile_forward(queryset.model, _obj)
+
+        if not plan.forward:
+            plan.related = self.compile_related(queryset.model, _obj, queryset.passed_models)
+
+        return plan
+
+    def compile_forward(self, model, _obj, path=''):
+        steps = []
+        related_fields = [
+            f for f in model._meta.get_fields()
+            if (getattr(f, 'many_to_one', False) and f.related_model != model)
+        ]
+
+        for related_field in related_fields:
+            cur_path = '%s__%s' % (path, related_field.name) if path else related_field.name
+            related_model = related_field.related_model
+
+            if related_model == _obj._meta.model:
+                steps.append(('direct', cur_path))
+            elif related_model and hasattr(related_model.objects, 'get_lookups'):
+                queryset_class = type(related_model.objects.all())
+                if related_model.owned_by_lookups(_obj):
+                    steps.append(('owned_by', cur_path, related_model))
+                elif queryset_class.get_lookups is not AbstractObjectOwnerQuerySet.get_lookups:
+                    steps.append(('custom', cur_path, related_model))
+                else:
+                    steps.extend(self.compile_forward(related_model, _obj, cur_path))
+
+        return steps
+
+    def compile_related(self, model, _obj, passed_models):
+        steps = []
+        passed = set(passed_models) | {model}
+        for rel in model._meta.related_objects:
+            if rel.related_model in passed:
+                continue
+
+            steps.append((rel.related_model, rel.field.name, isinstance(_obj, rel.related_model)))
+
+        return steps
+
+    def clear(self):
+        self._plans = {}
+
+
+owner_lookup_plans = OwnerLookupPlans()
+
+
 class AbstractObjectOwnerQuerySet(LoggerQuerySet):
     passed_models = []
 
     def owned_by(self, _obj):
+        """
+        Filter objects owned by _obj with a single subquery
+
+        Relation paths to the owner are taken from the compiled lookup plan of the model,
+        the subquery keeps every object once, so DISTINCT is not needed.
+        """
         if not self.model.is_owned():
             return self
 
         lookups = self.model.owned_by_lookups(_obj)
 
+        if _obj is None:
+            return self._owned_by_lookups(_obj, lookups)
+
+        plan = None
+        if lookups is None:
+            plan = owner_lookup_plans.get(self, _obj)
+            lookups = plan.get_lookups(_obj)
+
+        if not lookups:
+            plan = plan or owner_lookup_plans.get(self, _obj)
+            lookups = plan.get_related_lookups(self.model, _obj, self.passed_models)
+
+        lookups.extend(self.model.owner_lookups(_obj))
+
+        if lookups:
+            from operator import __or__ as OR
+            owned = self.model._base_manager.using(self.db).filter(reduce(OR, lookups)).values('pk')
+            return self.filter(pk__in=owned)
+        return self.none()
+
+    def _owned_by_lookups(self, _obj, lookups):
         if lookups is None:
             lookups = self.get_lookups(_obj)
 
@@ -60,10 +224,7 @@ class AbstractObjectOwnerQuerySet(LoggerQuerySet):
                 if not owned_by_lookups:
                     owned_by_lookups = related_field.related_model.objects.get_lookups(_obj, cur_path)
                 else:
-                    owned_dicts = [dict(name.children) for name in owned_by_lookups]
-                    owned_by_lookups = []
-                    for owned_dict in owned_dicts:
-                        owned_by_lookups.append(Q(**{'%s__%s' % (cur_path, k): v for k, v in owned_dict.items()}))
+                    owned_by_lookups = _prefix_lookups(owned_by_lookups, cur_path)
 
                 path_list.extend(owned_by_lookups)
 
@@ -0,0 +1,56 @@
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from r3sourcer.apps.core.utils.request_context import RequestContext
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class QueryCountHeaderMiddleware:
+    """
+    Add number of database queries executed by the request to the X-Query-Count response header.
+
+    Enabled with ``settings.QUERY_COUNT_HEADER``.
+    """
+
+    header = 'X-Query-Count'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'QUERY_COUNT_HEADER', False):
+            return self.get_response(request)
+
+        counter = QueryCounter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+
+            response = self.get_response(request)
+
+        response[self.header] = str(counter.count)
+        return response
+
+
+class RequestContextMiddleware:
+    """
+    Create RequestContext which keeps values resolved once per request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request._request_context = RequestContext(request)
+        return self.get_response(request)
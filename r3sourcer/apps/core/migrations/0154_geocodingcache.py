@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0153_auto_20230719_1956'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodingCache',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('address', models.CharField(max_length=512, unique=True, verbose_name='Normalised address')),
+                ('latitude', models.DecimalField(blank=True, decimal_places=15, max_digits=18, null=True)),
+                ('longitude', models.DecimalField(blank=True, decimal_places=15, max_digits=18, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+            ],
+            options={
+                'verbose_name': 'Geocoding cache',
+                'verbose_name_plural': 'Geocoding cache',
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+from collections import defaultdict
+
+from django.db import migrations, models
+
+from r3sourcer.helpers.datetimes import geo_time_zone_name
+
+
+def fill_tz_name(apps, schema_editor):
+    Address = apps.get_model('core', 'Address')
+
+    address_ids = defaultdict(list)
+    addresses = Address.objects.exclude(latitude=0, longitude=0).values_list('id', 'longitude', 'latitude')
+    for address_id, longitude, latitude in addresses.iterator():
+        address_ids[geo_time_zone_name(longitude, latitude)].append(address_id)
+
+    for tz_name, ids in address_ids.items():
+        Address.objects.filter(id__in=ids).update(tz_name=tz_name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0154_geocodingcache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='address',
+            name='tz_name',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64, verbose_name='Timezone'),
+        ),
+        migrations.RunPython(fill_tz_name, migrations.RunPython.noop),
+    ]
@@ -17,3 +17,4 @@ from .bank_account_layout_country import *
 from .contact_bank_accounts import *
 from .contact_bank_account_fields import *
 from .unit_of_measurement import *
+from .geocoding_cache import *
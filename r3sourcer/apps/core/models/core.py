@@ -33,8 +33,9 @@ from mptt.models import MPTTModel, TreeForeignKey
 from phonenumber_field.modelfields import PhoneNumberField
 
 from r3sourcer.apps.core.utils.companies import get_site_master_company
+from r3sourcer.apps.core.utils.company_hierarchy import company_hierarchy, get_companies
 from r3sourcer.apps.core.utils.user import get_default_company
-from r3sourcer.helpers.datetimes import utc_now
+from r3sourcer.helpers.datetimes import utc_now, geo_time_zone_name
 from r3sourcer.helpers.models.abs import UUIDModel, TimeZoneUUIDModel
 from .company_languages import CompanyLanguage
 from ..decorators import workflow_function
@@ -47,6 +48,7 @@ from ..mixins import (
 )
 from ..service import factory
 from ..utils.geo import fetch_geo_coord_by_address
+from ..utils.geocoding import geocoding_cache
 from ..utils.validators import string_is_numeric
 from ..workflow import WorkflowProcess
 
@@ -758,6 +760,7 @@ class Address(TimeZoneUUIDModel):
 
     country = models.ForeignKey(Country, to_field='code2', default='AU', on_delete=models.CASCADE)
     apartment = models.CharField(max_length=6, blank=True, null=True, verbose_name=_('Apartment'))
+    tz_name = models.CharField(max_length=64, blank=True, default='', editable=False, verbose_name=_('Timezone'))
 
     class Meta:
         verbose_name = _("Address")
@@ -836,7 +839,13 @@ class Address(TimeZoneUUIDModel):
         if self.latitude and self.longitude:
             return False
 
-        latitude, longitude = fetch_geo_coord_by_address(self.get_full_address())
+        full_address = self.get_full_address()
+        coordinates = geocoding_cache.get(full_address)
+        if coordinates is None:
+            coordinates = fetch_geo_coord_by_address(full_address)
+            geocoding_cache.set(full_address, coordinates)
+
+        latitude, longitude = coordinates
         if latitude and longitude:
             self.latitude = latitude
             self.longitude = longitude
@@ -848,15 +857,23 @@ class Address(TimeZoneUUIDModel):
     def save(self, *args, **kwargs):
         if self._state.adding:
             bind_address = True
+            original_geo = None
         else:
             original = type(self).objects.get(id=self.id)
             bind_address = original.get_full_address() != self.get_full_address()
+            original_geo = original.geo
 
         if bind_address \
                 and not self.fetch_geo_coord(False) \
                 and None in [self.longitude, self.latitude]:
             if getattr(settings, 'FETCH_ADDRESS_RAISE_EXCEPTIONS', True):
                 raise ValidationError(self.default_errors['fetch_error'])
+
+        if self.latitude and self.longitude and (original_geo != self.geo or not self.tz_name):
+            self.tz_name = geo_time_zone_name(self.longitude, self.latitude)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'tz_name'}
+
         super(Address, self).save(*args, **kwargs)
 
     @classmethod
@@ -1323,6 +1340,11 @@ class Company(CategoryFolderMixin,
         if self.type == self.COMPANY_TYPES.master:
             return [self]
         else:
+            master_company_ids = company_hierarchy.get_master_company_ids(self.id)
+            if master_company_ids:
+                return get_companies(master_company_ids)
+
+            # relationship could be created by other process after the index was built
             master_companies = []
             for company_rel in self.regular_companies.all():
                 master_companies.extend(company_rel.master_company.get_master_company())
@@ -1340,6 +1362,11 @@ class Company(CategoryFolderMixin,
     def get_regular_companies(self):
         if self.type == self.COMPANY_TYPES.regular:
             return [self]
+
+        regular_company_ids = company_hierarchy.get_regular_company_ids(self.id)
+        if regular_company_ids:
+            return get_companies(regular_company_ids)
+
         reg_companies = []
         for company_rel in self.master_companies.all():
             reg_companies.extend(company_rel.regular_company.get_regular_companies())
@@ -0,0 +1,6 @@
+from .model import GeocodingCache
+
+
+__all__ = (
+    GeocodingCache.__name__,
+)
@@ -0,0 +1,20 @@
+from django.db import models
+from django.utils.translation import ugettext_lazy as _
+
+
+class GeocodingCache(models.Model):
+    """
+    Geocoding results by normalised address, null coordinates are kept for invalid addresses
+    """
+
+    address = models.CharField(_("Normalised address"), max_length=512, unique=True)
+    latitude = models.DecimalField(max_digits=18, decimal_places=15, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=18, decimal_places=15, null=True, blank=True)
+    updated_at = models.DateTimeField(_("Updated at"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Geocoding cache")
+        verbose_name_plural = _("Geocoding cache")
+
+    def __str__(self):
+        return self.address
@@ -1,3 +1,4 @@
+from django.db.models.signals import post_init, post_save, post_delete
 from django.dispatch import receiver
 from django.urls import reverse
 from r3sourcer.apps.email_interface import tasks
@@ -5,6 +6,17 @@ from r3sourcer.apps.email_interface.utils import get_email_service
 
 from django_rest_passwordreset.signals import reset_password_token_created
 
+from django.contrib.sites.models import Site
+
+from r3sourcer.apps.core.api.authentication import forget_jwt_user
+from r3sourcer.apps.core.models import (
+    Company, CompanyRel, SiteCompany, WorkflowObject, WorkflowNode, CompanyWorkflowNode, User,
+)
+from r3sourcer.apps.core.utils.companies import forget_site_company
+from r3sourcer.apps.core.utils.company_hierarchy import forget_company, invalidate_company_hierarchy
+from r3sourcer.apps.core.workflow import invalidate_workflow_states
+
+
 @receiver(reset_password_token_created)
 def password_reset_token_created(sender, instance, reset_password_token, *args, **kwargs):
     email_service = get_email_service()
@@ -22,4 +34,42 @@ def password_reset_token_created(sender, instance, reset_password_token, *args,
     tasks.send_email_default.delay(context['email'], "Reset your password", context['reset_password_url'], None)
     # email_service.send(context['email'], "Reset your password", context['reset_password_url'], *args, **kwargs)
 
-    
\ No newline at end of file
+
+@receiver([post_save, post_delete], sender=WorkflowObject)
+def workflow_object_changed(sender, instance, **kwargs):
+    invalidate_workflow_states(instance.object_id)
+
+
+@receiver([post_save, post_delete], sender=WorkflowNode)
+@receiver([post_save, post_delete], sender=CompanyWorkflowNode)
+def workflow_node_changed(sender, instance, **kwargs):
+    invalidate_workflow_states()
+
+
+@receiver([post_save, post_delete], sender=CompanyRel)
+@receiver([post_save, post_delete], sender=SiteCompany)
+@receiver([post_save, post_delete], sender=Site)
+def company_hierarchy_changed(sender, instance, **kwargs):
+    invalidate_company_hierarchy()
+
+
+@receiver(post_init, sender=Company)
+def company_loaded(sender, instance, **kwargs):
+    # deferred type is not loaded here, such companies are treated as changed on save
+    instance._original_type = instance.__dict__.get('type')
+
+
+@receiver([post_save, post_delete], sender=Company)
+def company_changed(sender, instance, created=False, **kwargs):
+    forget_company(instance.id)
+    forget_site_company(instance.id)
+
+    original_type = getattr(instance, '_original_type', None)
+    instance._original_type = instance.__dict__.get('type')
+    if created or kwargs['signal'] is post_delete or original_type is None or original_type != instance.type:
+        invalidate_company_hierarchy()
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    forget_jwt_user(instance.id)
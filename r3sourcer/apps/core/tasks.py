@@ -1,3 +1,4 @@
+from collections import defaultdict
 from contextlib import contextmanager
 from datetime import datetime
 from urllib.parse import urlparse
@@ -21,6 +22,7 @@ from r3sourcer.apps.login.models import TokenLogin
 
 
 LOCK_EXPIRE = 5 * 60
+GEOCODE_PENDING_CURSOR_KEY = 'geocode_pending_addresses_cursor'
 
 
 logger = get_task_logger(__name__)
@@ -70,6 +72,42 @@ def fetch_coordinate_address(app_label, model_name, object_id, full_address):
         instance.fetch_geo_coord()
 
 
+@shared_task()
+def geocode_pending_addresses(batch_size=1000):
+    """
+    Geocodes addresses without coordinates, identical addresses are geocoded once.
+
+    Addresses are walked by id, every run continues after the last address of
+    the previous batch, so addresses which can't be geocoded don't block the
+    rest. The walk starts over when the last batch is reached.
+    """
+    from r3sourcer.apps.core.utils.geocoding import geocode_addresses
+    from r3sourcer.helpers.datetimes import geo_time_zone_name
+
+    addresses = core_models.Address.objects.filter(latitude=0, longitude=0).order_by('id')
+    last_id = cache.get(GEOCODE_PENDING_CURSOR_KEY)
+    if last_id is not None:
+        addresses = addresses.filter(id__gt=last_id)
+    addresses = list(addresses.select_related('city', 'state', 'country')[:batch_size])
+
+    address_ids = defaultdict(list)
+    for address in addresses:
+        address_ids[address.get_full_address()].append(address.id)
+
+    coordinates, limit_reached = geocode_addresses(list(address_ids.keys()))
+    for full_address, (latitude, longitude) in coordinates.items():
+        if latitude and longitude:
+            core_models.Address.objects.filter(id__in=address_ids[full_address]).update(
+                latitude=latitude, longitude=longitude, tz_name=geo_time_zone_name(longitude, latitude)
+            )
+
+    if limit_reached:
+        # addresses of the batch which are not geocoded yet are retried by the next run
+        logger.warning('Geocoding query limit reached, %s addresses left', len(address_ids) - len(coordinates))
+    else:
+        cache.set(GEOCODE_PENDING_CURSOR_KEY, addresses[-1].id if len(addresses) == batch_size else None, None)
+
+
 @shared_task(bind=True)
 def exchange_rates_sync(self):
     """
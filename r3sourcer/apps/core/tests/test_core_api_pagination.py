@@ -1,9 +1,12 @@
+import mock
 import pytest
 
 from django_mock_queries.query import MockSet, MockModel
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.request import Request
 
-from r3sourcer.apps.core.api.pagination import ApiLimitOffsetPagination
+from r3sourcer.apps.core.api.pagination import ApiLimitOffsetPagination, COUNT_ESTIMATED, COUNT_EXACT
+from r3sourcer.apps.core.models import Country
 
 
 class TestApiLimitOffsetPagination:
@@ -45,3 +48,84 @@ class TestApiLimitOffsetPagination:
         paginator.limit_query_param = None
 
         assert paginator.get_limit(req) == paginator.default_limit
+
+
+@pytest.mark.django_db
+class TestApiLimitOffsetPaginationModes:
+
+    @pytest.fixture
+    def view(self):
+        return mock.Mock(count_mode=COUNT_ESTIMATED, keyset_fields=('name', ))
+
+    @pytest.fixture
+    def countries(self):
+        return Country.objects.order_by('name', 'pk')
+
+    def test_estimated_count_capped(self, rf, view, countries):
+        paginator = ApiLimitOffsetPagination()
+        paginator.count_cap = 2
+
+        paginator.paginate_queryset(
+            countries.filter(name__isnull=False), Request(rf.get('/', {'count_mode': COUNT_ESTIMATED})), view
+        )
+
+        assert paginator.count == 2
+        assert paginator.get_paginated_response([]).data['count_estimated'] is True
+
+    def test_estimated_count_not_requested(self, rf, view, countries):
+        paginator = ApiLimitOffsetPagination()
+        paginator.count_cap = 2
+
+        paginator.paginate_queryset(countries.filter(name__isnull=False), Request(rf.get('/')), view)
+
+        assert paginator.count == countries.count()
+        assert 'count_estimated' not in paginator.get_paginated_response([]).data
+
+    def test_estimated_count_small(self, rf, view, countries):
+        paginator = ApiLimitOffsetPagination()
+
+        page = paginator.paginate_queryset(
+            countries, Request(rf.get('/', {'limit': 2, 'count_mode': COUNT_ESTIMATED})), view
+        )
+
+        assert paginator.count == countries.count()
+        assert len(page) == 2
+
+    def test_keyset_pages(self, rf, view, countries):
+        paginator = ApiLimitOffsetPagination()
+        first_page = paginator.paginate_queryset(countries, Request(rf.get('/', {'limit': 2, 'cursor': ''})), view)
+        cursor = paginator.get_paginated_response([]).data['next']
+
+        paginator = ApiLimitOffsetPagination()
+        second_page = paginator.paginate_queryset(
+            countries, Request(rf.get('/', {'limit': 2, 'cursor': cursor})), view
+        )
+
+        assert first_page + second_page == list(countries[:4])
+
+    def test_keyset_invalid_cursor(self, rf, view, countries):
+        paginator = ApiLimitOffsetPagination()
+
+        with pytest.raises(NotFound):
+            paginator.paginate_queryset(countries, Request(rf.get('/', {'cursor': 'invalid'})), view)
+
+    def test_keyset_conflicting_ordering(self, rf, view, countries):
+        paginator = ApiLimitOffsetPagination()
+
+        with pytest.raises(ValidationError):
+            paginator.paginate_queryset(countries, Request(rf.get('/', {'cursor': '', 'ordering': '-name'})), view)
+
+    def test_keyset_same_ordering(self, rf, view, countries):
+        paginator = ApiLimitOffsetPagination()
+
+        page = paginator.paginate_queryset(
+            countries, Request(rf.get('/', {'limit': 2, 'cursor': '', 'ordering': 'name'})), view
+        )
+
+        assert page == list(countries[:2])
+
+    def test_offset_response_envelope(self, rf, countries):
+        paginator = ApiLimitOffsetPagination()
+        paginator.paginate_queryset(countries, Request(rf.get('/')), mock.Mock(count_mode=COUNT_EXACT))
+
+        assert list(paginator.get_paginated_response([]).data) == ['count', 'message', 'results']
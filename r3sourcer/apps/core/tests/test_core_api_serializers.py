@@ -20,7 +20,7 @@ from r3sourcer.apps.core.api.serializers import (
     ApiFieldsMixin, CompanyAddressSerializer, WorkflowNodeSerializer,
     WorkflowObjectSerializer, WorkflowTimelineSerializer,
     NavigationSerializer, TrialSerializer, CompanyContactRenderSerializer,
-    RELATED_DIRECT, RELATED_FULL, RELATED_NONE,
+    RELATED_DIRECT, RELATED_FULL, RELATED_NONE, serializer_fields,
 )
 from r3sourcer.apps.core.models import (
     City, Region, Contact, Company, User, CompanyContact, CompanyAddress,
@@ -328,6 +328,25 @@ class TestApiFullRelatedFieldsMixin:
 
         assert instance.population == 1
 
+    def test_internal_serializer_class_cached(self):
+        first = BaseTestSerializer().fields['country']
+        second = BaseTestSerializer().fields['country']
+
+        assert type(first) is type(second)
+
+    @patch.object(serializers.ModelSerializer, 'get_fields', autospec=True)
+    def test_fields_resolved_once(self, mock_get_fields):
+        mock_get_fields.return_value = {'name': serializers.CharField()}
+        serializer_fields.clear()
+
+        first = AnotherBaseTestSerializer()
+        second = AnotherBaseTestSerializer()
+
+        serializer_fields.clear()
+
+        assert mock_get_fields.call_count == 1
+        assert first.fields['name'] is not second.fields['name']
+
     def test_create_objects_with_related_fields(self, city_data, settings):
         settings.REST_FRAMEWORK['RELATED'] = RELATED_DIRECT
 
@@ -1082,6 +1101,22 @@ class TestWorkflowObjectSerializer:
         with pytest.raises(ValidationError):
             assert serializer.validate(data)
 
+    @patch('r3sourcer.apps.core.api.mixins.endless_logger')
+    def test_created_updated_by_preloaded(self, mock_logger, settings, user):
+        logged, not_logged = MagicMock(id='logged'), MagicMock(id='not-logged')
+        mock_logger.get_recent_field_changes.return_value = {
+            'logged': {'updated_by': str(user.id), 'user': user},
+        }
+
+        context = WorkflowObjectSerializer.get_preloaded_context([logged, not_logged])
+        serializer = WorkflowObjectSerializer(context=context)
+
+        assert serializer.get_created_by(logged) == user.email
+        assert serializer.get_updated_by(logged) == user.email
+        assert serializer.get_updated_by(not_logged) == settings.SYSTEM_USER
+        assert mock_logger.get_recent_field_changes.call_count == 2
+        assert not mock_logger.get_recent_field_change.called
+
 
 class TestWorkflowTimelineSerializer:
 
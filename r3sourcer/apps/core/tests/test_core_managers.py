@@ -2,8 +2,8 @@ import mock
 
 from django.db.models import Q
 
-from r3sourcer.apps.core.managers import TagManager
-from r3sourcer.apps.core.models import Tag, CompanyContact, Contact, Address
+from r3sourcer.apps.core.managers import OwnerLookupPlan, TagManager, owner_lookup_plans
+from r3sourcer.apps.core.models import Tag, CompanyContact, Contact, Address, ContactAddress, CompanyAddress
 
 
 class TestManagers(object):
@@ -54,3 +54,60 @@ class TestAbstractObjectOwnerManager:
         lookups = Contact.objects.get_lookups(address.country)
 
         assert len(lookups) == 4
+
+
+class TestOwnerLookupPlans:
+
+    def legacy_owned_by(self, model, owner):
+        return model.objects.all()._owned_by_lookups(owner, model.owned_by_lookups(owner))
+
+    def test_contact_owned_by_company_matches(self, staff_company_contact, staff_relationship, company):
+        result = Contact.objects.owned_by(company)
+
+        assert set(result) == set(self.legacy_owned_by(Contact, company))
+        assert not result.query.distinct
+
+    def test_address_owned_by_contact_matches(self, contact, contact_address):
+        result = Address.objects.owned_by(contact)
+
+        assert set(result) == set(self.legacy_owned_by(Address, contact))
+        assert not result.query.distinct
+
+    def test_contact_address_owned_by_company_matches(self, staff_company_contact, staff_relationship, company,
+                                                      contact_address):
+        ContactAddress.objects.create(contact=staff_company_contact.contact, address=contact_address)
+
+        result = ContactAddress.objects.owned_by(company)
+
+        assert result.exists()
+        assert set(result) == set(self.legacy_owned_by(ContactAddress, company))
+
+    def test_owned_by_without_queries(self, contact, contact_address, django_assert_num_queries):
+        with django_assert_num_queries(0):
+            Address.objects.owned_by(contact)
+
+    def test_plan_compiled_once(self, contact, contact_address):
+        owner_lookup_plans.clear()
+
+        with mock.patch.object(owner_lookup_plans, 'compile', wraps=owner_lookup_plans.compile) as mock_compile:
+            Address.objects.owned_by(contact)
+            calls = mock_compile.call_count
+            Address.objects.owned_by(contact)
+
+        assert calls > 0
+        assert mock_compile.call_count == calls
+
+    def get_address_plan(self):
+        plan = OwnerLookupPlan()
+        plan.related = [(CompanyAddress, 'address', True), (ContactAddress, 'address', False)]
+        return plan
+
+    def test_related_lookups_first_direct_empty(self, contact, contact_address):
+        lookups = self.get_address_plan().get_related_lookups(Address, contact, [])
+
+        assert set(Address.objects.filter(lookups[0] | lookups[1])) == {contact_address}
+
+    def test_related_lookups_first_direct_not_empty(self, contact, contact_address, company_address):
+        lookups = self.get_address_plan().get_related_lookups(Address, contact, [])
+
+        assert set(Address.objects.filter(lookups[0] | lookups[1])) == {company_address.address}
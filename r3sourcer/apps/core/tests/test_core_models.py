@@ -20,6 +20,7 @@ from r3sourcer.apps.core.models import (
     Company, CompanyLocalization, Invoice, WorkflowNode,
     Workflow, SiteCompany, CompanyRel, CompanyContactRelationship
 )
+from r3sourcer.helpers.templates import compiled_templates
 
 
 @pytest.mark.django_db
@@ -626,6 +627,33 @@ class TestTemplateMessage:
         )
         assert compiled == "Hello New user"
 
+    def test_compile_string_not_resolved(self, email_test_message_template):
+        compiled, = email_test_message_template.compile_string(
+            "Hello [[ user__first_name ]] [[domain]]",
+            user={}
+        )
+        assert compiled == "Hello [[ user__first_name ]] [[domain]]"
+
+    def test_compile_tokenizes_once(self, email_test_message_template):
+        compiled_templates.clear()
+        template_class = type(email_test_message_template)
+
+        with mock.patch.object(template_class, 'tokenize', wraps=template_class.tokenize) as mock_tokenize:
+            email_test_message_template.compile(user="New user", domain="test.com")
+            result = email_test_message_template.compile(user="Another user", domain="test.com")
+
+        assert mock_tokenize.call_count == 3
+        assert result["text"] == "Hello Another user"
+
+    def test_compile_edited_not_saved(self, email_test_message_template):
+        compiled_templates.clear()
+        email_test_message_template.compile(user="New user", domain="test.com")
+
+        email_test_message_template.message_text_template = "Bye [[user]]"
+        result = email_test_message_template.compile(user="New user", domain="test.com")
+
+        assert result["text"] == "Bye New user"
+
     def test_get_dict_values(self, email_test_message_template, user):
         params = {
             "user": user
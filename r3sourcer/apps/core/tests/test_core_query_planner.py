@@ -0,0 +1,117 @@
+import mock
+import pytest
+
+from django.db import connection
+from django.http import HttpResponse
+from rest_framework import serializers
+
+from r3sourcer.apps.core.api.query_planner import plan_queryset
+from r3sourcer.apps.core.api.serializers import ApiBaseModelSerializer
+from r3sourcer.apps.core.middleware import QueryCountHeaderMiddleware
+from r3sourcer.apps.core.models import City, Country
+
+
+class CityMinimalSerializer(ApiBaseModelSerializer):
+
+    class Meta:
+        model = City
+        fields = ('id', 'name', 'country', 'region')
+
+
+class CityNestedSerializer(ApiBaseModelSerializer):
+
+    class Meta:
+        model = City
+        fields = ('id', 'name', {
+            'country': ('id', 'name'),
+        })
+
+
+class CityColumnsSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = City
+        fields = ('id', 'name', 'country')
+
+
+class CityStringSerializer(serializers.ModelSerializer):
+    country = serializers.StringRelatedField()
+
+    class Meta:
+        model = City
+        fields = ('id', 'name', 'country')
+
+
+class CountryCitiesSerializer(serializers.ModelSerializer):
+    city_set = CityColumnsSerializer(many=True)
+
+    class Meta:
+        model = Country
+        fields = ('id', 'name', 'city_set')
+
+
+@pytest.mark.django_db
+class TestPlanQueryset:
+
+    def test_related_fields_selected(self):
+        queryset = plan_queryset(City.objects.all(), CityMinimalSerializer())
+
+        assert queryset.query.select_related == {'country': {}, 'region': {}}
+        assert queryset.query.deferred_loading == (frozenset(), True)
+
+    def test_nested_serializer_selected(self):
+        queryset = plan_queryset(City.objects.all(), CityNestedSerializer(many=True))
+
+        assert 'country' in queryset.query.select_related
+
+    def test_only_model_columns(self):
+        queryset = plan_queryset(City.objects.all(), CityColumnsSerializer())
+
+        assert queryset.query.select_related is False
+        assert queryset.query.deferred_loading == (frozenset({'id', 'name', 'country'}), False)
+
+    def test_string_related_field_not_deferred(self):
+        queryset = plan_queryset(City.objects.all(), CityStringSerializer())
+
+        assert 'country' in queryset.query.select_related
+        assert queryset.query.deferred_loading == (frozenset(), True)
+
+    def test_many_relation_prefetched(self):
+        queryset = plan_queryset(Country.objects.all(), CountryCitiesSerializer())
+
+        assert queryset._prefetch_related_lookups == ('city_set', )
+
+    def test_values_queryset_unchanged(self):
+        queryset = City.objects.values('id')
+
+        assert plan_queryset(queryset, CityMinimalSerializer()) is queryset
+
+    def test_serialized_queries(self, city, django_assert_num_queries):
+        queryset = plan_queryset(City.objects.filter(id=city.id), CityNestedSerializer(many=True))
+
+        with django_assert_num_queries(1):
+            CityNestedSerializer(list(queryset), many=True).data
+
+
+class TestQueryCountHeaderMiddleware:
+
+    @pytest.mark.django_db
+    def test_header(self, rf, settings):
+        settings.QUERY_COUNT_HEADER = True
+
+        def get_response(request):
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return HttpResponse()
+
+        response = QueryCountHeaderMiddleware(get_response)(rf.get('/'))
+
+        assert response['X-Query-Count'] == '1'
+
+    def test_header_disabled(self, rf, settings):
+        settings.QUERY_COUNT_HEADER = False
+        get_response = mock.Mock(return_value=HttpResponse())
+
+        response = QueryCountHeaderMiddleware(get_response)(rf.get('/'))
+
+        assert not response.has_header('X-Query-Count')
@@ -0,0 +1,81 @@
+import mock
+import pytest
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse
+
+from r3sourcer.apps.core.api.authentication import JWTAuthentication
+from r3sourcer.apps.core.api.permissions import SiteContactPermissions
+from r3sourcer.apps.core.middleware import RequestContextMiddleware
+from r3sourcer.apps.core.utils.companies import get_site_master_company
+from r3sourcer.apps.core.utils.request_context import RequestContext, get_request_context, get_request_role
+
+
+@pytest.fixture
+def context_request(rf):
+    request = rf.get('/')
+    request._request_context = RequestContext(request)
+    return request
+
+
+class TestRequestContext:
+
+    def test_resolve_once(self, context_request):
+        resolve_func = mock.Mock(return_value='value')
+        context = get_request_context(context_request)
+
+        assert context.resolve('key', resolve_func) == 'value'
+        assert context.resolve('key', resolve_func) == 'value'
+        assert resolve_func.call_count == 1
+
+    def test_middleware(self, rf):
+        get_response = mock.Mock(return_value=HttpResponse())
+        request = rf.get('/')
+
+        RequestContextMiddleware(get_response)(request)
+
+        assert isinstance(get_request_context(request), RequestContext)
+
+    def test_no_context(self, rf):
+        assert get_request_context(rf.get('/')) is None
+
+    @mock.patch('r3sourcer.apps.core.utils.companies._get_site_master_company')
+    def test_site_master_company_once(self, mock_get_company, context_request):
+        get_site_master_company(request=context_request)
+        get_site_master_company(request=context_request)
+
+        assert mock_get_company.call_count == 1
+
+    @mock.patch.object(SiteContactPermissions, '_is_master_related', return_value=True)
+    def test_is_master_related_once(self, mock_is_master_related, context_request, user):
+        permissions = SiteContactPermissions()
+
+        assert permissions.is_master_related(user, context_request)
+        assert permissions.is_master_related(user, context_request)
+        assert mock_is_master_related.call_count == 1
+
+    @pytest.mark.django_db
+    def test_get_request_role_invalid(self, rf):
+        assert get_request_role(rf.get('/', {'role': 'invalid'})) is None
+
+
+@pytest.mark.django_db
+class TestJWTUserCache:
+
+    @pytest.fixture
+    def jwt_cache(self, settings):
+        settings.JWT_USER_CACHE_TIMEOUT = 60
+        with mock.patch('r3sourcer.apps.core.api.authentication.cache', LocMemCache('jwt', {})) as jwt_cache:
+            yield jwt_cache
+
+    def test_user_cached(self, user, jwt_cache, django_assert_num_queries):
+        JWTAuthentication().authenticate_credentials({'user_id': str(user.id)})
+
+        with django_assert_num_queries(0):
+            assert JWTAuthentication().authenticate_credentials({'user_id': str(user.id)}) == user
+
+    def test_user_saved(self, user, jwt_cache):
+        JWTAuthentication().authenticate_credentials({'user_id': str(user.id)})
+        user.is_active = False
+        user.save()
+
+        assert jwt_cache.get('jwt_user:{}'.format(user.id)) is None
@@ -1,9 +1,10 @@
 import mock
 import pytest
+from django.core.cache import cache
 
-from r3sourcer.apps.core.models import CurrencyExchangeRates
+from r3sourcer.apps.core.models import Address, CurrencyExchangeRates
 from r3sourcer.apps.core.open_exchange.client import OpenExchangeClient
-from r3sourcer.apps.core.tasks import exchange_rates_sync
+from r3sourcer.apps.core.tasks import GEOCODE_PENDING_CURSOR_KEY, exchange_rates_sync, geocode_pending_addresses
 
 
 @pytest.mark.django_db
@@ -32,3 +33,21 @@ class TestExchangeRateSync:
         exchange_rates_sync()
 
         assert not CurrencyExchangeRates.objects.exists()
+
+
+@pytest.mark.django_db
+class TestGeocodePendingAddresses:
+
+    def setup_method(self):
+        cache.delete(GEOCODE_PENDING_CURSOR_KEY)
+
+    @mock.patch('r3sourcer.apps.core.utils.geocoding.geocode_addresses')
+    def test_invalid_addresses_skipped(self, mock_geocode, addresses):
+        mock_geocode.side_effect = lambda full_addresses: (dict.fromkeys(full_addresses, (None, None)), False)
+        Address.objects.update(latitude=0, longitude=0)
+
+        geocode_pending_addresses(batch_size=1)
+        geocode_pending_addresses(batch_size=1)
+
+        first, second = [call[0][0] for call in mock_geocode.call_args_list]
+        assert first != second
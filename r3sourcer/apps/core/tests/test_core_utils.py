@@ -3,10 +3,16 @@ import pytest
 import googlemaps
 from django.core.exceptions import ValidationError
 
-from r3sourcer.apps.core.models import CompanyContactRelationship
-from r3sourcer.apps.core.utils.companies import get_closest_companies, get_master_companies
-from r3sourcer.apps.core.utils.geo import fetch_geo_coord_by_address, calc_distance
+from r3sourcer.apps.core.models import Company, CompanyContactRelationship
+from r3sourcer.apps.core.utils.companies import (
+    get_closest_companies, get_master_companies, get_site_master_company,
+)
+from r3sourcer.apps.core.utils.company_hierarchy import company_hierarchy, company_hierarchy_changed
+from r3sourcer.apps.core.utils.geo import fetch_geo_coord_by_address, calc_distance, haversine_distances
+from r3sourcer.apps.core.utils.geo import GMapsException
+from r3sourcer.apps.core.utils.geocoding import geocode_addresses, geocoding_cache, normalize_address
 from r3sourcer.apps.core.utils.validators import string_is_numeric
+from r3sourcer.helpers.lru import LRUCache
 
 
 class TestGeo:
@@ -94,6 +100,64 @@ class TestGeo:
 
         assert res == []
 
+    def test_haversine_distances(self):
+        # Sydney to Melbourne is about 714 km
+        distances = haversine_distances(-33.8688, 151.2093, [-37.8136, -33.8688], [144.9631, 151.2093])
+
+        assert 710000 < distances[0] < 718000
+        assert distances[1] == 0
+
+    def test_haversine_distances_not_geocoded(self):
+        distances = haversine_distances(-33.8688, 151.2093, [0, None], [0, None])
+
+        assert all(distance != distance for distance in distances)
+
+
+@pytest.mark.django_db
+class TestGeocoding:
+
+    @pytest.fixture(autouse=True)
+    def cache_enabled(self, settings):
+        settings.GEOCODING_CACHE_ENABLED = True
+        geocoding_cache.clear()
+        yield
+        geocoding_cache.clear()
+
+    def test_normalize_address(self):
+        assert normalize_address('1 Test St,\nSydney  NSW,\nAustralia') == '1 test st sydney nsw australia'
+
+    def test_cache(self):
+        geocoding_cache.set('1 Test St, Sydney', (42, 24))
+        geocoding_cache.clear()
+
+        assert geocoding_cache.get('1 test st sydney') == (42, 24)
+
+    def test_cache_skips_failed(self):
+        geocoding_cache.set('1 Test St, Sydney', (False, False))
+
+        assert geocoding_cache.get('1 Test St, Sydney') is None
+
+    def test_geocode_addresses_deduplicated(self):
+        client = mock.MagicMock()
+        client.get_coordinates.return_value = (42, 24)
+
+        result, limit_reached = geocode_addresses(['1 Test St, Sydney', '1 test st sydney'], client=client)
+
+        assert client.get_coordinates.call_count == 1
+        assert result == {'1 Test St, Sydney': (42, 24), '1 test st sydney': (42, 24)}
+        assert not limit_reached
+
+    @mock.patch('r3sourcer.apps.core.utils.geocoding.time.sleep')
+    def test_geocode_addresses_over_query_limit(self, mock_sleep):
+        client = mock.MagicMock()
+        client.get_coordinates.side_effect = GMapsException(googlemaps.exceptions.ApiError('OVER_QUERY_LIMIT'))
+
+        result, limit_reached = geocode_addresses(['1 Test St, Sydney'], client=client, max_backoff=4)
+
+        assert limit_reached
+        assert result == {}
+        assert [call[0][0] for call in mock_sleep.call_args_list] == [1, 2, 4]
+
 
 class TestCompanies:
     def test_get_closest_companies(self, staff_user, staff_relationship):
@@ -121,6 +185,55 @@ class TestCompanies:
         assert company_rel.master_company in companies
 
 
+class TestCompanyHierarchy:
+
+    def test_get_master_company_ids(self, company, company_rel):
+        assert company_hierarchy.get_master_company_ids(company_rel.regular_company.id) == [str(company.id)]
+
+    def test_get_regular_company_ids(self, company, company_rel):
+        assert company_hierarchy.get_regular_company_ids(company.id) == [str(company_rel.regular_company.id)]
+
+    def test_get_master_company_ids_invalidated_by_rel(self, company, company_rel):
+        assert company_hierarchy.get_master_company_ids(company_rel.regular_company.id) == [str(company.id)]
+
+        company_rel.delete()
+
+        assert company_hierarchy.get_master_company_ids(company_rel.regular_company.id) == []
+
+    def test_company_hierarchy_changed_sent_by_rel(self, company, company_rel):
+        receiver = mock.Mock()
+        company_hierarchy_changed.connect(receiver)
+        try:
+            company_rel.delete()
+        finally:
+            company_hierarchy_changed.disconnect(receiver)
+
+        assert receiver.called
+
+    @mock.patch('r3sourcer.apps.core.signals.invalidate_company_hierarchy')
+    def test_company_saved_without_type_change(self, mock_invalidate, company):
+        Company.objects.get(id=company.id).save()
+
+        assert not mock_invalidate.called
+
+    @mock.patch('r3sourcer.apps.core.signals.invalidate_company_hierarchy')
+    def test_company_type_changed(self, mock_invalidate, company):
+        company = Company.objects.get(id=company.id)
+        company.type = Company.COMPANY_TYPES.regular if company.type == Company.COMPANY_TYPES.master \
+            else Company.COMPANY_TYPES.master
+        company.save()
+
+        assert mock_invalidate.called
+
+    def test_get_site_master_company_without_queries(self, site_company, django_assert_num_queries):
+        company_hierarchy.get_index()
+
+        with mock.patch('r3sourcer.apps.core.utils.company_hierarchy.get_companies') as mock_companies:
+            mock_companies.return_value = [site_company.company]
+            with django_assert_num_queries(0):
+                assert get_site_master_company(site='test.tt') == site_company.company
+
+
 class TestValidators:
 
     def test_not_numeric_values(self):
@@ -133,3 +246,34 @@ class TestValidators:
     def test_numeric_values(self):
         assert string_is_numeric('123') is None
         assert string_is_numeric('012') is None
+
+
+class TestLRUCache:
+
+    def test_least_recently_used_evicted(self):
+        lru = LRUCache(2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        assert lru.get('a') == 1
+
+        lru.set('c', 3)
+
+        assert 'b' not in lru
+        assert lru.get('a') == 1
+        assert lru.get('c') == 3
+
+    def test_get_or_build(self):
+        lru = LRUCache(2)
+        build = mock.Mock(return_value='value')
+
+        assert lru.get_or_build('key', build) == 'value'
+        assert lru.get_or_build('key', build) == 'value'
+        assert build.call_count == 1
+
+    def test_callable_size(self):
+        lru = LRUCache(lambda: 1)
+        lru.set('a', 1)
+        lru.set('b', 2)
+
+        assert len(lru) == 1
+        assert lru.get('b') == 2
@@ -2,9 +2,11 @@ import mock
 import pytest
 import uuid
 
+from django.contrib.contenttypes.models import ContentType
+
 from r3sourcer.apps.core.models import WorkflowNode, WorkflowObject, Company
 from r3sourcer.apps.core.workflow import (
-    WorkflowProcess, CompanyRelState60, OrderState50, OrderState90
+    WorkflowProcess, WorkflowStateCache, CompanyRelState60, OrderState50, OrderState90
 )
 from django_mock_queries.query import MockSet, MockModel
 from django.utils.translation import ugettext_lazy as _
@@ -414,6 +416,53 @@ class TestWorkflowProcess:
         ).exists()
 
 
+@pytest.mark.django_db
+class TestWorkflowStateCache:
+
+    @pytest.fixture
+    def state_cache(self):
+        cache = WorkflowStateCache()
+        with mock.patch('r3sourcer.apps.core.workflow.get_workflow_state_cache', return_value=cache):
+            yield cache
+
+    @pytest.fixture
+    def company(self):
+        return Company.objects.get(name='New C')
+
+    @pytest.fixture
+    def workflow_process(self, state_cache, company):
+        content_type = ContentType.objects.get_for_model(Company)
+        process = WorkflowProcess()
+        process.id = uuid.uuid4()
+
+        state_cache.states[(content_type.id, str(process.id))] = [
+            MockModel(id=1, state=self.get_node(10), active=True, node_company_id=company.id, created_at=1),
+            MockModel(id=2, state=self.get_node(20), active=False, node_company_id=company.id, created_at=2),
+            MockModel(id=3, state=self.get_node(30), active=True, node_company_id=None, created_at=3),
+        ]
+
+        with mock.patch.object(WorkflowProcess, 'content_type', new_callable=mock.PropertyMock) as mock_content:
+            mock_content.return_value = content_type
+            with mock.patch.object(WorkflowProcess, 'get_closest_company', return_value=company):
+                yield process
+
+    def get_node(self, number):
+        return WorkflowNode.objects.get(number=number)
+
+    def test_cached_checks_without_queries(self, workflow_process, django_assert_num_queries):
+        with django_assert_num_queries(0):
+            assert workflow_process._check_state(10)
+            assert not workflow_process._check_state(20)
+            assert not workflow_process._check_state(30)
+            assert workflow_process.has_state(20)
+            assert workflow_process.get_current_state().number == 10
+
+    def test_reset_workflow_states(self, workflow_process, state_cache):
+        workflow_process.reset_workflow_states()
+
+        assert state_cache.states == {}
+
+
 class TestCompanyRelState60:
 
     def test_check(self):
@@ -1,11 +1,13 @@
 from urllib.parse import urlparse
 
+from django.conf import settings
 from django.contrib.sites.shortcuts import get_current_site
 from django.contrib.sites.models import Site
 from django.core.cache import cache
 
 from crum import get_current_request
 
+from .request_context import get_request_context, resolve_for_request
 from .utils import get_host
 
 
@@ -58,17 +60,69 @@ def get_site_url(request=None, user=None, master_company=None):
     return '{}://{}'.format(url_parts.scheme or 'https', url_parts.netloc or url_parts.path)
 
 
-def get_site_master_company(site=None, request=None, user=None, default=True):
-    from r3sourcer.apps.core.models import Company
+SITE_COMPANY_CACHE_KEY = 'site_company:{}'
+
+
+def get_request_site(request):
+    """
+    Gets site of the request host, None if the host has no site
+    """
+    from .company_hierarchy import company_hierarchy
+
+    return resolve_for_request(request, 'site', lambda: company_hierarchy.get_site(get_host(request)))
+
+
+def get_site_company(company_id):
+    """
+    Gets master company of a site, the company is kept in the cache for SITE_COMPANY_CACHE_TIMEOUT seconds
+    """
+    from .company_hierarchy import get_companies
+
+    timeout = settings.SITE_COMPANY_CACHE_TIMEOUT
+    company = cache.get(SITE_COMPANY_CACHE_KEY.format(company_id)) if timeout else None
+    if company is None:
+        companies = get_companies([company_id])
+        company = companies[0] if companies else None
+
+        if company is not None and timeout:
+            cache.set(SITE_COMPANY_CACHE_KEY.format(company_id), company, timeout)
 
+    return company
+
+
+def forget_site_company(company_id):
+    cache.delete(SITE_COMPANY_CACHE_KEY.format(company_id))
+
+    context = get_request_context()
+    if context is not None:
+        context.forget(('site_master_company', True))
+        context.forget(('site_master_company', False))
+
+
+def get_site_master_company(site=None, request=None, user=None, default=True):
+    """
+    Gets master company of the site, of the request host or of the current request host.
+    Master company of the request is resolved once per request.
+    """
     if request is None:
         request = get_current_request()
 
+    if site is None and user is None and request is not None:
+        return resolve_for_request(
+            request, ('site_master_company', default),
+            lambda: _get_site_master_company(request=request, default=default)
+        )
+
+    return _get_site_master_company(site, request, user, default)
+
+
+def _get_site_master_company(site=None, request=None, user=None, default=True):
+    from .company_hierarchy import company_hierarchy
+
     if isinstance(site, str):
-        site = Site.objects.get_by_natural_key(site)
+        site = company_hierarchy.get_site(site) or Site.objects.get_by_natural_key(site)
     elif request:
-        host = get_host(request)
-        site = Site.objects.filter(domain__iexact=host).first()
+        site = get_request_site(request)
 
     if site is None:
         if not default:
@@ -77,11 +131,8 @@ def get_site_master_company(site=None, request=None, user=None, default=True):
         site = get_current_site(request)
 
     if user:
-        try:
-            site = Site.objects.get_by_natural_key(cache.get('user_site_%s' % str(user.id), site.domain))
-        except Site.DoesNotExist:
-            pass
+        site = company_hierarchy.get_site(cache.get('user_site_%s' % str(user.id), site.domain)) or site
 
-    site_company = site.site_companies.filter(company__type=Company.COMPANY_TYPES.master).first()
+    company_id = company_hierarchy.get_site_master_company_id(site.id)
 
-    return site_company and site_company.company
+    return get_site_company(company_id) if company_id else None
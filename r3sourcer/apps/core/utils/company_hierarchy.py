@@ -0,0 +1,197 @@
+import time
+import uuid
+from collections import defaultdict
+
+from django.contrib.sites.models import Site
+from django.core.cache import cache
+from django.db import transaction
+from django.dispatch import Signal
+
+from crum import get_current_request
+
+from r3sourcer.helpers.lru import LRUCache
+
+
+class CompanyHierarchyIndex:
+    """
+    Process-wide index of master/regular company relationships and of the
+    site to master company mapping.
+
+    The index is built with a few queries, shared between processes through
+    the cache and kept locally. Resolved master/regular companies are kept in
+    a bounded LRU. Changes of CompanyRel, SiteCompany, Company and Site drop
+    the index, other processes notice it through the version key which is
+    re-checked at most every `version_check_interval` seconds.
+    """
+
+    version_cache_key = 'company_hierarchy_version'
+    index_cache_key = 'company_hierarchy_index'
+    version_check_interval = 5
+    lru_size = 10000
+
+    def __init__(self):
+        self._index = None
+        self._resolved = LRUCache(self.lru_size)
+        self._version = None
+        self._version_checked_at = None
+
+    def _check_version(self):
+        now = time.monotonic()
+        if self._version_checked_at is not None and now - self._version_checked_at < self.version_check_interval:
+            return
+
+        version = cache.get(self.version_cache_key)
+        if version != self._version:
+            self._index = None
+            self._resolved.clear()
+            self._version = version
+
+        self._version_checked_at = now
+
+    def _build_index(self):
+        from r3sourcer.apps.core.models import Company, CompanyRel, SiteCompany
+
+        masters = defaultdict(list)
+        regulars = defaultdict(list)
+        company_types = {}
+        rels = CompanyRel.objects.order_by('created_at').values_list(
+            'master_company_id', 'regular_company_id', 'master_company__type', 'regular_company__type'
+        )
+        for master_id, regular_id, master_type, regular_type in rels:
+            masters[str(regular_id)].append(str(master_id))
+            regulars[str(master_id)].append(str(regular_id))
+            company_types[str(master_id)] = master_type
+            company_types[str(regular_id)] = regular_type
+
+        site_companies = {}
+        for site_id, company_id in SiteCompany.objects.filter(
+            company__type=Company.COMPANY_TYPES.master
+        ).order_by('pk').values_list('site_id', 'company_id'):
+            site_companies.setdefault(site_id, str(company_id))
+
+        sites = {}
+        for site_id, domain, name in Site.objects.order_by('pk').values_list('id', 'domain', 'name'):
+            sites.setdefault(domain.lower(), (site_id, domain, name))
+
+        return {
+            'masters': dict(masters),
+            'regulars': dict(regulars),
+            'types': company_types,
+            'site_companies': site_companies,
+            'sites': sites,
+        }
+
+    def get_index(self):
+        self._check_version()
+
+        if self._index is None:
+            index = cache.get(self.index_cache_key)
+            if index is None or index.get('version') != self._version:
+                index = self._build_index()
+                index['version'] = self._version
+                cache.set(self.index_cache_key, index, None)
+            self._index = index
+
+        return self._index
+
+    def _resolve(self, key, resolve_func):
+        self._check_version()
+
+        return self._resolved.get_or_build(key, lambda: resolve_func(self.get_index()))
+
+    def _walk(self, index, relations_key, company_id, company_type, visited=None):
+        visited = visited or set()
+        result = []
+        for related_id in index[relations_key].get(company_id, []):
+            if related_id in visited:
+                continue
+            visited.add(related_id)
+
+            if index['types'].get(related_id) == company_type:
+                result.append(related_id)
+            else:
+                result.extend(self._walk(index, relations_key, related_id, company_type, visited))
+        return result
+
+    def get_master_company_ids(self, company_id):
+        from r3sourcer.apps.core.models import Company
+
+        company_id = str(company_id)
+        return self._resolve(('masters', company_id), lambda index: self._walk(
+            index, 'masters', company_id, Company.COMPANY_TYPES.master
+        ))
+
+    def get_regular_company_ids(self, company_id):
+        from r3sourcer.apps.core.models import Company
+
+        company_id = str(company_id)
+        return self._resolve(('regulars', company_id), lambda index: self._walk(
+            index, 'regulars', company_id, Company.COMPANY_TYPES.regular
+        ))
+
+    def get_site(self, domain):
+        """
+        Gets site by domain (case insensitive), returns None if there is no site
+        """
+        site = self.get_index()['sites'].get(domain.lower()) if domain else None
+        if site is None:
+            return None
+
+        site_id, domain, name = site
+        return Site(id=site_id, domain=domain, name=name)
+
+    def get_site_master_company_id(self, site_id):
+        return self.get_index()['site_companies'].get(site_id)
+
+    def invalidate(self):
+        self._index = None
+        self._resolved.clear()
+        self._version = uuid.uuid4().hex
+        self._version_checked_at = time.monotonic()
+        cache.set(self.version_cache_key, self._version, None)
+        cache.delete(self.index_cache_key)
+
+
+company_hierarchy = CompanyHierarchyIndex()
+
+# sent when master/regular company relationships or the site companies change
+company_hierarchy_changed = Signal()
+
+
+def invalidate_company_hierarchy():
+    company_hierarchy.invalidate()
+    # index could be rebuilt by other process before the change is committed
+    transaction.on_commit(company_hierarchy.invalidate)
+    company_hierarchy_changed.send(sender=CompanyHierarchyIndex)
+
+
+def forget_company(company_id):
+    """
+    Drops company instance kept for the current request
+    """
+    request = get_current_request()
+    companies = getattr(request, '_company_hierarchy_companies', None) if request is not None else None
+    if companies is not None:
+        companies.pop(str(company_id), None)
+
+
+def get_companies(company_ids):
+    """
+    Gets companies by ids keeping the order of ids.
+    Companies are fetched with one query and kept for the current request.
+    """
+    from r3sourcer.apps.core.models import Company
+
+    request = get_current_request()
+    companies = getattr(request, '_company_hierarchy_companies', None) if request is not None else None
+    if companies is None:
+        companies = {}
+        if request is not None:
+            request._company_hierarchy_companies = companies
+
+    missing_ids = [company_id for company_id in company_ids if company_id not in companies]
+    if missing_ids:
+        for company in Company.objects.filter(id__in=missing_ids):
+            companies[str(company.id)] = company
+
+    return [companies[company_id] for company_id in company_ids if company_id in companies]
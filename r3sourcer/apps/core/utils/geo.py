@@ -3,14 +3,17 @@ from datetime import datetime, date, time
 
 import googlemaps
 import googlemaps.exceptions
+import numpy as np
 
 from django.conf import settings
+from django.utils.module_loading import import_string
 
 from r3sourcer.helpers.datetimes import utc_now
 
 MODE_DRIVING = 'driving'
 MODE_TRANSIT = 'transit'
 MAX_DIMENSIONS = 25
+EARTH_RADIUS = 6371008.8
 
 
 class GMapsException(Exception):
@@ -132,26 +135,27 @@ class GMaps(object):
         :param int|float retry_interval:
         :return tuple(float, float):
         """
-        try:
-            response = self._client.geocode(address)
-            if not response:
-                raise googlemaps.exceptions.ApiError(
-                    status='INVALID_REQUEST',
-                    message='Invalid address requested'
+        while True:
+            try:
+                response = self._client.geocode(address)
+                if not response:
+                    raise googlemaps.exceptions.ApiError(
+                        status='INVALID_REQUEST',
+                        message='Invalid address requested'
+                    )
+
+                return (
+                    response[0]['geometry']['location']['lat'],
+                    response[0]['geometry']['location']['lng']
                 )
+            except Exception as e:
+                exc = GMapsException(e)
+                if exc.code not in self._ignore_exceptions or retries <= 0:
+                    raise exc
 
-            return (
-                response[0]['geometry']['location']['lat'],
-                response[0]['geometry']['location']['lng']
-            )
-        except Exception as e:
-            exc = GMapsException(e)
-            if exc.code in self._ignore_exceptions and retries > 0:
+                retries -= 1
                 if retry_interval > 0:
                     sleep(retry_interval)
-                return self.get_coordinates(address, retries-1, retry_interval)
-
-            raise exc
 
     def get_distance(self, origins, destinations, mode=None, retries=5, retry_interval=0):
         """
@@ -243,3 +247,79 @@ def calc_distance(origins, destinations, mode=None):
         return None if e.code == GMapsException.INVALID_REQUEST[1] else []
     except ValueError:
         return None
+
+
+def haversine_distances(latitude, longitude, latitudes, longitudes):
+    """
+    Great-circle distances from one point to many points.
+    Not geocoded points (None or 0, 0 coordinates) get NaN distance.
+
+    :param latitude: origin latitude
+    :param longitude: origin longitude
+    :param latitudes: list of destination latitudes
+    :param longitudes: list of destination longitudes
+    :return numpy.ndarray: distances in meters
+    """
+    latitudes = np.array(latitudes, dtype=float)
+    longitudes = np.array(longitudes, dtype=float)
+    unknown = (latitudes == 0) & (longitudes == 0)
+    latitudes[unknown] = np.nan
+
+    lat1, lng1 = np.radians(float(latitude)), np.radians(float(longitude))
+    lat2, lng2 = np.radians(latitudes), np.radians(longitudes)
+
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(a))
+
+
+class DistanceMatrixBackend(object):
+    """
+    Distance matrix backend interface used by the distance pipeline
+    """
+    max_dimensions = MAX_DIMENSIONS
+
+    def get_distances(self, origin, destinations, mode=None):
+        """
+        Calculates distances from one origin to many destinations
+
+        :param str origin: origin address
+        :param list destinations: destination addresses
+        :param str|None mode: travel mode
+        :return list|bool|None: {"distance", "duration"} dicts in destinations order,
+            None when got invalid request, empty list otherwise
+        """
+        raise NotImplementedError
+
+
+class GoogleDistanceMatrixBackend(DistanceMatrixBackend):
+
+    def get_distances(self, origin, destinations, mode=None):
+        result = calc_distance(origin, destinations, mode=mode)
+        if not result:
+            return result
+
+        # get_distance flattens rows with one element
+        row = result[0]
+        return row if isinstance(row, list) else [row]
+
+
+class LocalDistanceMatrixBackend(DistanceMatrixBackend):
+    """
+    Offline backend for tests and local environments.
+
+    Returns distances set in `distances` by (origin, destination) and
+    `default` distance for the rest. Requested matrices are kept in `requests`.
+    """
+
+    def __init__(self, distances=None, default=None):
+        self.distances = distances or {}
+        self.default = default or {"distance": 1000, "duration": 60}
+        self.requests = []
+
+    def get_distances(self, origin, destinations, mode=None):
+        self.requests.append((origin, list(destinations), mode))
+        return [self.distances.get((origin, destination), self.default) for destination in destinations]
+
+
+def get_distance_matrix_backend():
+    return import_string(settings.DISTANCE_MATRIX_BACKEND)()
@@ -0,0 +1,159 @@
+import re
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+
+from r3sourcer.helpers.datetimes import utc_now
+from r3sourcer.helpers.lru import LRUCache
+
+
+def normalize_address(address):
+    """
+    Normalises address for the geocoding cache: case, separators and whitespace are ignored
+    """
+    return ' '.join(part for part in re.split(r'[\s,]+', address.lower()) if part)[:512]
+
+
+class GeocodingCacheStore:
+    """
+    Geocoding results cache kept in the GeocodingCache table and in a
+    bounded in-process LRU.
+
+    Coordinates are cached for `GEOCODING_CACHE_TTL` seconds, invalid
+    addresses for `GEOCODING_CACHE_INVALID_TTL` seconds. Failed requests
+    (False, False) are never cached. The LRU is shared by the threads of
+    the process.
+    """
+
+    def __init__(self):
+        self._lru = LRUCache(lambda: settings.GEOCODING_CACHE_LRU_SIZE)
+
+    @property
+    def enabled(self):
+        return settings.GEOCODING_CACHE_ENABLED
+
+    def _get_ttl(self, coordinates):
+        return settings.GEOCODING_CACHE_TTL if coordinates[0] is not None else settings.GEOCODING_CACHE_INVALID_TTL
+
+    def _remember(self, address, coordinates, expires_at):
+        self._lru.set(address, (coordinates, expires_at))
+
+    def _recall(self, address, now):
+        cached = self._lru.get(address)
+        if cached is None or cached[1] <= now:
+            return None
+
+        return cached[0]
+
+    def get_many(self, addresses):
+        """
+        Gets cached coordinates of the addresses
+        :param addresses: list of addresses
+        :return: dict of address => (latitude, longitude), (None, None) for invalid addresses
+        """
+        from r3sourcer.apps.core.models import GeocodingCache
+
+        if not self.enabled:
+            return {}
+
+        result = {}
+        missing = {}
+        now = time.time()
+        for address in addresses:
+            normalized = normalize_address(address)
+            coordinates = self._recall(normalized, now)
+            if coordinates is not None:
+                result[address] = coordinates
+            else:
+                missing.setdefault(normalized, []).append(address)
+
+        if missing:
+            rows = GeocodingCache.objects.filter(address__in=missing.keys()).values_list(
+                'address', 'latitude', 'longitude', 'updated_at'
+            )
+            for normalized, latitude, longitude, updated_at in rows:
+                coordinates = (latitude, longitude)
+                expires_at = updated_at + timedelta(seconds=self._get_ttl(coordinates))
+                if expires_at <= utc_now():
+                    continue
+
+                self._remember(normalized, coordinates, expires_at.timestamp())
+                for address in missing[normalized]:
+                    result[address] = coordinates
+
+        return result
+
+    def get(self, address):
+        return self.get_many([address]).get(address)
+
+    def set(self, address, coordinates):
+        from r3sourcer.apps.core.models import GeocodingCache
+
+        latitude, longitude = coordinates
+        if not self.enabled or latitude is False:
+            return
+
+        normalized = normalize_address(address)
+        GeocodingCache.objects.update_or_create(
+            address=normalized, defaults={'latitude': latitude, 'longitude': longitude}
+        )
+        self._remember(normalized, coordinates, time.time() + self._get_ttl(coordinates))
+
+    def clear(self):
+        self._lru.clear()
+
+
+geocoding_cache = GeocodingCacheStore()
+
+
+def geocode_addresses(addresses, client=None, max_backoff=None):
+    """
+    Geocodes addresses, every unique normalised address is requested once.
+
+    Requests back off exponentially on OVER_QUERY_LIMIT, if the limit is
+    still reached after `max_backoff` seconds the remaining addresses are
+    left for the next run.
+
+    :param addresses: list of addresses
+    :param client: GMaps client
+    :param max_backoff: maximum backoff in seconds
+    :return: tuple of dict address => (latitude, longitude) and flag if the query limit was reached
+    """
+    from r3sourcer.apps.core.utils.geo import GMaps, GMapsException
+
+    client = client or GMaps(key=settings.GOOGLE_GEO_CODING_API_KEY)
+    max_backoff = settings.GEOCODING_MAX_BACKOFF if max_backoff is None else max_backoff
+
+    result = geocoding_cache.get_many(addresses)
+    pending = OrderedDict()
+    for address in addresses:
+        if address not in result:
+            pending.setdefault(normalize_address(address), []).append(address)
+
+    backoff = 1
+    for same_addresses in pending.values():
+        while True:
+            try:
+                coordinates = client.get_coordinates(same_addresses[0])
+            except GMapsException as e:
+                if e.code == GMapsException.OVER_QUERY_LIMIT[1]:
+                    if backoff > max_backoff:
+                        return result, True
+
+                    time.sleep(backoff)
+                    backoff *= 2
+                    continue
+
+                coordinates = (None, None) if e.code == GMapsException.INVALID_REQUEST[1] else (False, False)
+            except ValueError:
+                coordinates = (None, None)
+
+            break
+
+        geocoding_cache.set(same_addresses[0], coordinates)
+        for address in same_addresses:
+            result[address] = coordinates
+
+    return result, False
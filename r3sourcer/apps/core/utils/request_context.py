@@ -0,0 +1,107 @@
+from django.core.exceptions import ValidationError
+
+from crum import get_current_request
+
+
+class RequestContext:
+    """
+    Values resolved once per request: site, master company, contact, role and permissions.
+
+    The context is created by RequestContextMiddleware, values are resolved
+    on first access. User dependent values are kept per user because
+    API authentication replaces request user during the request.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self._values = {}
+
+    def resolve(self, key, resolve_func):
+        if key not in self._values:
+            self._values[key] = resolve_func()
+        return self._values[key]
+
+    def forget(self, key):
+        self._values.pop(key, None)
+
+    @property
+    def user(self):
+        return getattr(self.request, 'user', None)
+
+    def _user_key(self, name):
+        return name, getattr(self.user, 'pk', None)
+
+    @property
+    def site(self):
+        from .companies import get_request_site
+
+        return get_request_site(self.request)
+
+    @property
+    def master_company(self):
+        from .companies import get_site_master_company
+
+        return get_site_master_company(request=self.request)
+
+    @property
+    def contact(self):
+        def get_contact():
+            user = self.user
+            return user.contact if user is not None and user.is_authenticated else None
+
+        return self.resolve(self._user_key('contact'), get_contact)
+
+    @property
+    def role(self):
+        return get_request_role(self.request)
+
+    @property
+    def permissions(self):
+        def get_permissions():
+            user = self.user
+            return user.get_all_permissions() if user is not None and user.is_authenticated else set()
+
+        return self.resolve(self._user_key('permissions'), get_permissions)
+
+
+def get_request_context(request=None):
+    """
+    Gets context of the request or of the current request, None outside of requests
+    """
+    if request is None:
+        request = get_current_request()
+
+    # DRF request wraps the Django one which is seen by the middleware
+    request = getattr(request, '_request', request)
+    return getattr(request, '_request_context', None)
+
+
+def resolve_for_request(request, key, resolve_func):
+    """
+    Resolves value once per request, resolve_func is called every time outside of requests
+    """
+    context = get_request_context(request)
+    if context is None:
+        return resolve_func()
+
+    return context.resolve(key, resolve_func)
+
+
+def get_request_role(request):
+    """
+    Gets Role from the `role` query param of the request, None if it is not set or not found
+    """
+    from r3sourcer.apps.core.models import Role
+
+    def get_role():
+        query_params = getattr(request, 'query_params', None) or request.GET
+        role_id = query_params.get('role')
+        if not role_id:
+            return None
+
+        try:
+            return Role.objects.select_related('company_contact_rel__company_contact__contact').get(id=role_id)
+        except (Role.DoesNotExist, ValidationError, ValueError):
+            return None
+
+    return resolve_for_request(request, 'role', get_role)
@@ -16,6 +16,12 @@ factory.register('get_default_user', get_default_user)
 
 
 def get_default_company():
+    from .request_context import resolve_for_request
+
+    return resolve_for_request(None, 'default_company', _get_default_company)
+
+
+def _get_default_company():
     from ..models import Company
 
     try:
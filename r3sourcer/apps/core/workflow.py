@@ -1,3 +1,4 @@
+from crum import get_current_request
 from django.contrib.contenttypes.models import ContentType
 from django.utils.translation import ugettext_lazy as _
 from django.db import models
@@ -10,25 +11,154 @@ from .utils.companies import get_site_master_company
 NEED_REQUIREMENTS, ALLOWED, ACTIVE, VISITED, NOT_ALLOWED = range(5)
 
 
+class WorkflowStateCache:
+    """
+    Per-request cache of the workflow objects and nodes.
+
+    Workflow objects are loaded for many objects with one query and kept with
+    the company of the node, so checks of the objects don't query db again.
+    """
+
+    def __init__(self):
+        self.states = {}
+        self.nodes = {}
+
+    def load_states(self, content_type, object_ids):
+        from .models import WorkflowObject
+
+        object_ids = {str(object_id) for object_id in object_ids if object_id is not None}
+        object_ids = [object_id for object_id in object_ids if (content_type.id, object_id) not in self.states]
+        if not object_ids:
+            return
+
+        for object_id in object_ids:
+            self.states[(content_type.id, object_id)] = []
+
+        workflow_objects = WorkflowObject.objects.filter(
+            object_id__in=object_ids, state__workflow__model=content_type
+        ).select_related('state').annotate(
+            node_company_id=models.F('state__company_workflow_nodes__company')
+        )
+
+        for workflow_object in workflow_objects:
+            self.states[(content_type.id, str(workflow_object.object_id))].append(workflow_object)
+
+    def get_states(self, content_type, object_id, company):
+        """
+        Gets all workflow objects of the object available for company
+        """
+        key = (content_type.id, str(object_id))
+        if key not in self.states:
+            self.load_states(content_type, [object_id])
+
+        company_id = company.id if company is not None else None
+        states = {
+            workflow_object.id: workflow_object
+            for workflow_object in self.states[key] if workflow_object.node_company_id == company_id
+        }
+        return list(states.values())
+
+    def get_node(self, content_type, number):
+        from .models import WorkflowNode
+
+        if content_type.id not in self.nodes:
+            nodes = {}
+            for node in WorkflowNode.objects.filter(workflow__model=content_type).order_by('pk'):
+                nodes.setdefault(node.number, node)
+            self.nodes[content_type.id] = nodes
+
+        return self.nodes[content_type.id].get(number)
+
+    def invalidate(self, object_id=None):
+        if object_id is None:
+            self.states.clear()
+            self.nodes.clear()
+            return
+
+        for key in [key for key in self.states if key[1] == str(object_id)]:
+            del self.states[key]
+
+
+def get_workflow_state_cache(create=True):
+    """
+    Gets workflow state cache of the current request, there is no cache outside of requests
+    """
+    request = get_current_request()
+    if request is None:
+        return None
+
+    cache = getattr(request, '_workflow_state_cache', None)
+    if cache is None and create:
+        cache = WorkflowStateCache()
+        request._workflow_state_cache = cache
+
+    return cache
+
+
+def invalidate_workflow_states(object_id=None):
+    cache = get_workflow_state_cache(create=False)
+    if cache is not None:
+        cache.invalidate(object_id)
+
+
 class WorkflowProcess(CompanyLookupMixin, models.Model):
     class Meta:
         abstract = True
 
     def __init__(self, *args, **kwargs):
-        is_fake = kwargs.pop('fake_wf', False)
+        self._is_fake_wf = kwargs.pop('fake_wf', False)
 
         super(WorkflowProcess, self).__init__(*args, **kwargs)
 
-        if not is_fake:
+    @property
+    def active_states(self):
+        # resolved on first use, loading of the objects doesn't look up closest company
+        if '_active_states' not in self.__dict__:
+            if self._is_fake_wf:
+                raise AttributeError('active_states')
+
             try:
-                self.active_states = self.get_active_states()
+                self._active_states = self.get_active_states()
             except ObjectDoesNotExist:
-                self.active_states = None
+                self._active_states = None
+
+        return self._active_states
+
+    @active_states.setter
+    def active_states(self, value):
+        self._active_states = value
 
     @property
     def content_type(self):
         return ContentType.objects.get_for_model(self)
 
+    @classmethod
+    def preload_workflow_states(cls, objects):
+        """
+        Loads workflow objects of the objects page with one query for the current request
+        """
+        cache = get_workflow_state_cache()
+        if cache is not None:
+            cache.load_states(ContentType.objects.get_for_model(cls), [obj.id for obj in objects])
+
+    def get_cached_states(self, active=None):
+        """
+        Gets workflow objects of the object from the request cache.
+        Returns None if there is no request cache.
+        """
+        cache = get_workflow_state_cache()
+        if cache is None or not getattr(self, 'id', None):
+            return None
+
+        states = cache.get_states(self.content_type, self.id, self.get_closest_company())
+        if active is not None:
+            states = [state for state in states if state.active == active]
+        return states
+
+    def reset_workflow_states(self):
+        self.__dict__.pop('_active_states', None)
+        invalidate_workflow_states(self.id)
+
     def create_state(self, number, comment='', active=True):
         """
         Creates state by number
@@ -49,6 +179,7 @@ class WorkflowProcess(CompanyLookupMixin, models.Model):
         if state:
             workflow_object = WorkflowObject(object_id=self.id, state=state, comment=comment, active=active)
             workflow_object.save()
+            self.reset_workflow_states()
 
     def get_active_states(self):
         """
@@ -94,6 +225,13 @@ class WorkflowProcess(CompanyLookupMixin, models.Model):
         """
         from .models import WorkflowObject
 
+        cached_states = self.get_cached_states()
+        if cached_states is not None:
+            return any(
+                workflow_object.state.number == state if isinstance(state, int) else workflow_object.state == state
+                for workflow_object in cached_states
+            )
+
         qry = models.Q(object_id=self.id, state__workflow__model=self.content_type)
         if isinstance(state, int):
             qry &= models.Q(state__number=state)
@@ -111,6 +249,11 @@ class WorkflowProcess(CompanyLookupMixin, models.Model):
         :return: last state
         """
         from .models import WorkflowObject
+
+        cached_states = self.get_cached_states(active=True)
+        if cached_states is not None:
+            return max(cached_states, key=lambda state: state.created_at).state if cached_states else None
+
         try:
             result = WorkflowObject.objects.filter(
                 object_id=self.id, state__workflow__model=self.content_type, active=True,
@@ -170,6 +313,10 @@ class WorkflowProcess(CompanyLookupMixin, models.Model):
         Checks if state number is in active states of object
         :param state: int value of the state
         """
+        cached_states = self.get_cached_states(active=True)
+        if cached_states is not None:
+            return any(workflow_object.state.number == state for workflow_object in cached_states)
+
         return self.active_states.filter(state__number=state).exists()
 
     def _check_function(self, func):
@@ -185,16 +332,24 @@ class WorkflowProcess(CompanyLookupMixin, models.Model):
         :param new_state: WorkflowNode value of new state
         :return: True or False
         """
-        from .models import WorkflowNode, WorkflowObject
+        from .models import WorkflowNode
+        cache = get_workflow_state_cache()
         if isinstance(new_state, int):
-            new_state = WorkflowNode.objects.filter(
-                workflow__model=ContentType.objects.get_for_model(self),
-                number=new_state
-            ).first()
-
-        active_numbers = self.active_states.values_list(
-            'state__number', flat=True
-        )
+            if cache is not None:
+                new_state = cache.get_node(self.content_type, new_state)
+            else:
+                new_state = WorkflowNode.objects.filter(
+                    workflow__model=ContentType.objects.get_for_model(self),
+                    number=new_state
+                ).first()
+
+        cached_states = self.get_cached_states(active=True)
+        if cached_states is not None:
+            active_numbers = [workflow_object.state.number for workflow_object in cached_states]
+        else:
+            active_numbers = self.active_states.values_list(
+                'state__number', flat=True
+            )
 
         if new_state is None or new_state.number in active_numbers:
             return False
@@ -264,6 +419,11 @@ class WorkflowProcess(CompanyLookupMixin, models.Model):
     def _get_state_name(self, state_number):
         from .models.workflow import WorkflowNode
 
+        cache = get_workflow_state_cache()
+        if cache is not None:
+            node = cache.get_node(self.content_type, state_number)
+            return node.name_before_activation if node else str(state_number)
+
         if WorkflowNode.objects.filter(
                 workflow__model=self.content_type, number=state_number).exists():
             return WorkflowNode.objects \
@@ -327,6 +487,8 @@ class WorkflowProcess(CompanyLookupMixin, models.Model):
                     state.active = True
                     state.save(update_fields=['active'])
 
+        self.reset_workflow_states()
+
     def active_true_workflow(self, state):
         states = self.get_active_states()
         rules = state.rules
@@ -339,6 +501,8 @@ class WorkflowProcess(CompanyLookupMixin, models.Model):
                     state.active = False
                     state.save(update_fields=['active'])
 
+        self.reset_workflow_states()
+
     def workflow(self, new_state):
         """
         Process the workflow: set active states and execute 'actions'
@@ -621,7 +621,12 @@ class JobFillinSerialzier(FillinAvailableMixin, core_serializers.ApiBaseModelSer
             return 0
 
     def get_distance_to_jobsite(self, obj):
-        return hr_utils.meters_to_km(obj.distance_to_jobsite) if obj.distance_to_jobsite > -1 else -1
+        distance = obj.distance_to_jobsite
+        if distance < 0:
+            # road distance isn't cached yet, straight line distance is the closest estimate
+            distance = self.context.get('straight_line_distances', {}).get(obj.id)
+
+        return hr_utils.meters_to_km(distance) if distance is not None else -1
 
     def get_time_to_jobsite(self, obj):
         return hr_utils.seconds_to_hrs(obj.time_to_jobsite) if obj.time_to_jobsite and obj.time_to_jobsite > 0 else -1
@@ -748,11 +753,30 @@ class CandidateJobOfferSerializer(core_serializers.ApiBaseModelSerializer):
             )
         return (status, hr_models.JobOffer.CANDIDATE_STATUS_CHOICES[status])
 
+    @staticmethod
+    def get_preloaded_context(job_offers):
+        """
+        Loads status changes of the job offers page at once, result is passed to the serializer context
+        """
+        job_offer_ids = [jo.id for jo in job_offers if jo.status != hr_models.JobOffer.STATUS_CHOICES.undefined]
+        return {
+            'job_offer_status_changes': endless_logger.get_recent_field_changes(
+                hr_models.JobOffer, job_offer_ids, 'status'
+            ),
+        }
+
+    def get_recent_status_change(self, obj):
+        status_changes = self.context.get('job_offer_status_changes')
+        if status_changes is not None:
+            return status_changes.get(str(obj.id), {})
+
+        return endless_logger.get_recent_field_change(hr_models.JobOffer, obj.id, 'status')
+
     def get_status(self, obj):
         if obj.status == hr_models.JobOffer.STATUS_CHOICES.undefined:
             return self.get_status_tuple(obj.status)
 
-        last_change = endless_logger.get_recent_field_change(hr_models.JobOffer, obj.id, 'status')
+        last_change = self.get_recent_status_change(obj)
         if not last_change:
             return self.get_status_tuple(obj.status)
 
@@ -782,9 +806,10 @@ class CandidateJobOfferSerializer(core_serializers.ApiBaseModelSerializer):
                 return self.get_status_tuple(
                     hr_models.JobOffer.CANDIDATE_STATUS_CHOICES.cancelled_by_job_site_contact)
             else:
+                updated_by = last_change.get('user') or core_models.User.objects.get(id=updated_by_id)
                 return self.get_status_tuple(
                     hr_models.JobOffer.CANDIDATE_STATUS_CHOICES.cancelled_by,
-                    additional_text=core_models.User.objects.get(id=updated_by_id))
+                    additional_text=updated_by)
 
         return self.get_status_tuple(obj.status)
 
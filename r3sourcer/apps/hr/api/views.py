@@ -1,10 +1,11 @@
+from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from r3sourcer.apps.candidate import models as candidate_models
 from r3sourcer.apps.core import models as core_models
 from r3sourcer.apps.hr import models as hr_models
-from r3sourcer.apps.hr.utils import job as job_utils
+from r3sourcer.apps.hr.utils import job as job_utils, pdf as pdf_utils
 from r3sourcer.apps.hr.utils.utils import calculate_distances_for_jobsite
 
 
@@ -37,7 +38,7 @@ class AvailableCandidatesDateView(APIView):
         result = []
         if job:
             job = hr_models.Job.objects.get(pk=job)
-            job_shifts = hr_models.Shift.objects.filter(id__in=shifts, date__job=job)
+            job_shifts = hr_models.Shift.objects.filter(id__in=shifts, date__job=job).select_related('date')
             candidate_contacts = job_utils.get_available_candidate_list(job)
 
             partially_available = job_utils.get_partially_available_candidate_ids(
@@ -45,6 +46,16 @@ class AvailableCandidatesDateView(APIView):
             )
             result = [
                 partial for partial, data in partially_available.items()
-                if len(data['shifts']) == job_shifts.count()
+                if len(data['shifts']) == len(job_shifts)
             ]
         return Response({'result': result})
+
+
+class PDFJobView(APIView):
+
+    def get(self, request, job_id, *args, **kwargs):
+        result = pdf_utils.get_pdf_job_result(job_id, request.user)
+        if result is None:
+            return Response({'status': 'error', 'error': 'Not Found'}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response(result)
@@ -6,11 +6,10 @@ import operator
 from functools import reduce
 
 from django.conf import settings
-from django.core.exceptions import ValidationError, ObjectDoesNotExist
+from django.core.exceptions import ValidationError
 from django.db import transaction
 from django.db.models import Q, Case, When, BooleanField, Value, IntegerField, F, Sum, Max, Min, Count
 from django.utils import dateparse
-from django.utils.formats import date_format
 from django.utils.translation import ugettext_lazy as _
 from rest_framework import exceptions, mixins, status, filters
 from rest_framework.decorators import action
@@ -18,23 +17,24 @@ from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 from rest_framework.settings import api_settings
 from rest_framework.viewsets import GenericViewSet
-from filer.models import File
 
 from r3sourcer.apps.candidate import models as candidate_models
 from r3sourcer.apps.core.api.fields import ApiBaseRelatedField
 from r3sourcer.apps.core.api.filters import ApiOrderingFilter
 from r3sourcer.apps.core.api.mixins import GoogleAddressMixin
+from r3sourcer.apps.core.api.pagination import COUNT_ESTIMATED
 from r3sourcer.apps.core.api.permissions import SiteMasterCompanyFilterBackend
 from r3sourcer.apps.core.api.viewsets import BaseApiViewset, BaseViewsetMixin
 from r3sourcer.apps.core.utils.companies import get_site_master_company
+from r3sourcer.apps.core.utils.request_context import get_request_role
 from r3sourcer.apps.core.models import Role, Address
 from r3sourcer.apps.core_adapter import constants
 from r3sourcer.apps.hr import models as hr_models
 from r3sourcer.apps.hr.api.filters import TimesheetFilter, ShiftFilter
 from r3sourcer.apps.hr.api.serializers import timesheet as timesheet_serializers, job as job_serializers
 from r3sourcer.apps.hr.payment.invoices import InvoiceService
-from r3sourcer.apps.hr.tasks import generate_invoice, generate_salary_summary_pdf, generate_gross_profit_pdf
-from r3sourcer.apps.hr.utils import job as job_utils, utils as hr_utils
+from r3sourcer.apps.hr.tasks import generate_invoice
+from r3sourcer.apps.hr.utils import job as job_utils, utils as hr_utils, distances as hr_distances, pdf as hr_pdf
 from r3sourcer.apps.myob.tasks import sync_time_sheet
 from r3sourcer.helpers.datetimes import utc_now
 
@@ -127,6 +127,8 @@ class BaseTimeSheetViewsetMixin:
 
 
 class TimeSheetViewset(BaseTimeSheetViewsetMixin, BaseApiViewset):
+    count_mode = COUNT_ESTIMATED
+    keyset_fields = ('-created_at', )
 
     def get_queryset(self):
         query = Q(job_offer__candidate_contact__candidate_rels__master_company=self.request.user.contact.get_closest_company(),
@@ -139,13 +141,12 @@ class TimeSheetViewset(BaseTimeSheetViewsetMixin, BaseApiViewset):
         return qs
 
     def get_contact(self):
-        role_id = self.request.query_params.get('role')
+        role = get_request_role(self.request)
 
-        try:
-            role = Role.objects.get(id=role_id)
+        if role is not None:
             company_contact_rel = role.company_contact_rel
             contact = company_contact_rel.company_contact.contact, company_contact_rel
-        except ObjectDoesNotExist:
+        else:
             contact = self.request.user.contact, None
 
         return contact
@@ -435,54 +436,29 @@ class TimeSheetViewset(BaseTimeSheetViewsetMixin, BaseApiViewset):
             'status': 'success',
         })
 
-    @action(methods=['post'], detail=False)
-    def generate_pdf_timesheet(self, request, *args, **kwargs):
-        from r3sourcer.apps.hr.tasks import generate_pdf
-        if not request.data.get("timesheets"):
+    def _start_pdf_job(self, request, job_type):
+        timesheet_ids = request.data.get("timesheets")
+        if not timesheet_ids:
             return Response({"error": "No timesheets were selected"})
-        else:
-            pdf_file = generate_pdf(request.data.get("timesheets"), request)
-        if pdf_file:
-            return Response({'pdf_url': pdf_file.url})
-        else:
-            return Response({
-            'status': 'Not Found',
-            'message': _("Can't view PDF without submitted timesheets")
-        }, status=status.HTTP_404_NOT_FOUND)
-
-    @action(methods=['post'], detail=False)
-    def generate_summary_pdf(self, request, *args, **kwargs):
-        if not request.data.get("timesheets"):
-            return Response({"error": "No timesheets were selected"})
-        else:
-            timesheet_ids = request.data.get("timesheets")
 
-        pdf_url = generate_salary_summary_pdf(timesheet_ids, request)
+        job_id = hr_pdf.start_pdf_job(job_type, request.user, timesheet_ids)
 
         return Response({
-            'status': 'success',
-            'pdf': pdf_url,
-        })
+            'status': 'pending',
+            'job_id': job_id,
+        }, status=status.HTTP_202_ACCEPTED)
 
     @action(methods=['post'], detail=False)
-    def generate_gross_profit_pdf(self, request, *args, **kwargs):
-        if not request.data.get("timesheets"):
-            return Response({"error": "No timesheets were selected"})
-        else:
-            timesheet_ids = request.data.get("timesheets")
-
-        ret_status, result = generate_gross_profit_pdf(timesheet_ids, request)
+    def generate_pdf_timesheet(self, request, *args, **kwargs):
+        return self._start_pdf_job(request, 'timesheets')
 
-        if not ret_status:
-            return Response({
-                'status': 'error',
-                'error': result
-            }, status=status.HTTP_400_BAD_REQUEST)
+    @action(methods=['post'], detail=False)
+    def generate_summary_pdf(self, request, *args, **kwargs):
+        return self._start_pdf_job(request, 'salary_summary')
 
-        return Response({
-            'status': 'success',
-            'pdf': result,
-        })
+    @action(methods=['post'], detail=False)
+    def generate_gross_profit_pdf(self, request, *args, **kwargs):
+        return self._start_pdf_job(request, 'gross_profit')
 
 
 class InvoiceViewset(BaseApiViewset):
@@ -501,30 +477,18 @@ class InvoiceViewset(BaseApiViewset):
     def pdf(self, request, *args, **kwargs):
         invoice = self.get_object()
 
-        try:
-            pdf_file_obj = File.objects.filter(
-                name='invoice_{}_{}.pdf'.format(
-                    invoice.number,
-                    date_format(invoice.date, 'Y_m_d')
-                )
-            ).order_by('-uploaded_at').first()
-            if pdf_file_obj is None:
-                raise ObjectDoesNotExist
-
-            if invoice.updated_at > pdf_file_obj.modified_at:
-                raise ObjectDoesNotExist
-
-        except ObjectDoesNotExist:
-            client_company = invoice.customer_company
-            rule = client_company.invoice_rules.first()
-            show_candidate = rule.show_candidate_name if rule else False
-            pdf_file_obj = InvoiceService.generate_pdf(invoice, show_candidate)
+        pdf_file_obj = InvoiceService.get_pdf(invoice)
+        if pdf_file_obj is None:
+            job_id = hr_pdf.start_pdf_job('invoice', request.user, [invoice.id])
 
-        pdf_url = pdf_file_obj.url
+            return Response({
+                'status': 'pending',
+                'job_id': job_id,
+            }, status=status.HTTP_202_ACCEPTED)
 
         return Response({
             'status': 'success',
-            'pdf': pdf_url,
+            'pdf': pdf_file_obj.url,
         })
 
     def perform_destroy(self, instance):
@@ -535,6 +499,8 @@ class InvoiceViewset(BaseApiViewset):
 
 
 class JobOfferViewset(BaseApiViewset):
+    count_mode = COUNT_ESTIMATED
+    keyset_fields = ('-created_at', )
 
     def get_queryset(self):
         qs = super().get_queryset()
@@ -748,6 +714,14 @@ class JobViewset(BaseApiViewset):
 
         job_tags = job.tags.values_list('tag_id', flat=True)
 
+        # candidates farther in a straight line can't be inside radius by road, works before distances are cached
+        straight_line_distances = hr_distances.get_candidate_distances(candidate_contacts, job.jobsite)
+        restrict_radius = int(request.GET.get('distance_to_jobsite', -1))
+        if restrict_radius > -1:
+            candidate_contacts = candidate_contacts.exclude(id__in=hr_distances.get_candidates_outside_radius(
+                straight_line_distances, restrict_radius * 1000
+            ))
+
         candidate_contacts = candidate_contacts.annotate(
             distance_to_jobsite=Max(Case(
                 When(contact__distance_caches__jobsite=job.jobsite,
@@ -774,7 +748,6 @@ class JobViewset(BaseApiViewset):
         if not tags_filter:
             candidate_contacts = candidate_contacts.filter(tag_rels__tag_id__in=job_tags)
 
-        restrict_radius = int(request.GET.get('distance_to_jobsite', -1))
         if restrict_radius > -1:
             candidate_contacts = candidate_contacts.filter(distance_to_jobsite__lte=restrict_radius * 1000)
 
@@ -792,6 +765,7 @@ class JobViewset(BaseApiViewset):
             # 'booked_before_list': booked_before_list,
             # 'carrier_list': carrier_list,
             'init_shifts': init_shifts,
+            'straight_line_distances': straight_line_distances,
         }
 
         jobsite_address = job.jobsite.get_address()
@@ -841,23 +815,14 @@ class JobViewset(BaseApiViewset):
             if len(all_workers) > subscription_worker_count:
                 raise exceptions.ValidationError(_('You are not allowed to book more than {}'.format(subscription_worker_count)))
 
-        for candidate_id in candidate_ids:
-            for shift in shifts:
-                if fill_shifts and str(shift.id) not in fill_shifts:
-                    continue
+        if fill_shifts:
+            shifts = [shift for shift in shifts if str(shift.id) in fill_shifts]
 
-                # unavailable = job_utils.get_partially_available_candidate_ids_for_vs(
-                #     candidate_models.CandidateContact.objects.filter(id=candidate_id),
-                #     shift.date.shift_date, shift.time
-                # )
-                # if len(unavailable) == 0:
-                hr_models.JobOffer.objects.create(
-                    shift=shift,
-                    candidate_contact_id=candidate_id,
-                )
+        results = job_utils.book_candidates(job, candidate_ids, shifts)
 
         return Response({
             'status': 'ok',
+            'results': results,
         })
 
     def _get_undefined_jo_lookups(self, init_shifts):
@@ -1033,7 +998,12 @@ class JobViewset(BaseApiViewset):
 
             distances_to_update = candidate_contacts.exclude(contact__distance_caches__jobsite=job.jobsite)
 
-            hr_utils.calculate_distances_for_jobsite([c.contact for c in distances_to_update], job.jobsite)
+            # only candidates inside the requested radius are sent to the paid distance matrix API
+            restrict_radius = int(request.GET.get('distance_to_jobsite', -1))
+            hr_utils.calculate_distances_for_jobsite(
+                [c.contact for c in distances_to_update], job.jobsite,
+                max_radius=restrict_radius * 1000 if restrict_radius > 0 else None
+            )
 
         return self._paginate(
             request, job_serializers.JobExtendFillinSerialzier,
@@ -1127,6 +1097,22 @@ class JobOffersCandidateViewset(
             .order_by('-shift__date__shift_date')
         return by
 
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        job_offers = page if page is not None else list(queryset)
+
+        serializer_class = self.get_serializer_class()
+        context = self.get_serializer_context()
+        if hasattr(serializer_class, 'get_preloaded_context'):
+            context.update(serializer_class.get_preloaded_context(job_offers))
+
+        serializer = serializer_class(job_offers, many=True, context=context)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+
+        return Response(serializer.data)
+
 
 class ShiftViewset(BaseApiViewset):
 
@@ -1156,10 +1142,9 @@ class ShiftViewset(BaseApiViewset):
         return queryset
 
     def get_contact(self):
-        role_id = self.request.query_params.get('role')
+        role = get_request_role(self.request)
 
         try:
-            role = Role.objects.get(id=role_id)
             company_contact_rel = role.company_contact_rel
             contact = company_contact_rel.company_contact.contact, company_contact_rel
         except Exception:
@@ -0,0 +1,58 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def batch_ids(queryset, n):
+    ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+    for ndx in range(0, len(ids), n):
+        yield ids[ndx:ndx + n]
+
+
+def fill_busy_intervals(apps, schema_editor):
+    from r3sourcer.apps.core.models import ContactUnavailability
+    from r3sourcer.apps.hr.models import CandidateBusyInterval, JobOffer, TimeSheet
+
+    syncs = (
+        (JobOffer, CandidateBusyInterval.sync_job_offers),
+        (TimeSheet, CandidateBusyInterval.sync_time_sheets),
+        (ContactUnavailability, CandidateBusyInterval.sync_unavailabilities),
+    )
+    for model, sync in syncs:
+        for ids in batch_ids(model.objects.all(), 1000):
+            sync(model.objects.filter(pk__in=ids))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0065_timesheet_manager_who_approved'),
+        ('candidate', '0051_auto_20211213_1418'),
+        ('core', '0155_address_tz_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CandidateBusyInterval',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reason', models.PositiveSmallIntegerField(choices=[(0, 'Job Offer'), (1, 'Time Sheet'), (2, 'Unavailable')], verbose_name='Reason')),
+                ('source_id', models.UUIDField(verbose_name='Source')),
+                ('busy_from', models.DateTimeField(verbose_name='Busy from')),
+                ('busy_until', models.DateTimeField(verbose_name='Busy until')),
+                ('candidate_contact', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='busy_intervals', to='candidate.CandidateContact', verbose_name='Candidate Contact')),
+            ],
+            options={
+                'verbose_name': 'Candidate Busy Interval',
+                'verbose_name_plural': 'Candidate Busy Intervals',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='candidatebusyinterval',
+            index=models.Index(fields=['candidate_contact', 'busy_from', 'busy_until'], name='hr_busy_candidate_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='candidatebusyinterval',
+            index=models.Index(fields=['source_id'], name='hr_busy_source_idx'),
+        ),
+        migrations.RunPython(fill_busy_intervals, migrations.RunPython.noop),
+    ]
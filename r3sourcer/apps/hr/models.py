@@ -14,6 +14,8 @@ from django.contrib.contenttypes.models import ContentType
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError, ObjectDoesNotExist
 from django.db import models, IntegrityError, transaction
+from django.db.models.signals import post_save, post_delete
+from django.utils import timezone
 from django.utils.formats import date_format
 from django.utils.translation import ugettext_lazy as _
 from filer.models import Folder
@@ -31,7 +33,7 @@ from r3sourcer.apps.candidate.models import CandidateContact
 from r3sourcer.apps.skills.models import SkillBaseRate, SkillRateRange, WorkType
 from r3sourcer.apps.sms_interface.models import SMSMessage
 from r3sourcer.apps.pricing.models import Industry, PriceListRate
-from r3sourcer.apps.hr.utils import utils as hr_utils
+from r3sourcer.apps.hr.utils import job as hr_job_utils, utils as hr_utils
 from r3sourcer.celeryapp import app
 from r3sourcer.helpers.datetimes import utc_now, tz2utc
 from r3sourcer.helpers.models.abs import UUIDModel, TimeZoneUUIDModel
@@ -362,6 +364,8 @@ class Job(core_models.AbstractBaseOrder):
         return f'{self.position} - {self.jobsite} ({self.workers} workers)'
     get_title.short_description = _('Title')
 
+    tz_address_path = 'jobsite__address'
+
     @property
     def geo(self):
         return self.__class__.objects.filter(
@@ -614,6 +618,8 @@ class ShiftDate(TimeZoneUUIDModel):
     def __str__(self):
         return date_format(self.shift_date, settings.DATE_FORMAT)
 
+    tz_address_path = 'job__jobsite__address'
+
     @property
     def geo(self):
         return self.__class__.objects.filter(
@@ -689,6 +695,8 @@ class Shift(TimeZoneUUIDModel):
             settings.DATETIME_FORMAT
         )
 
+    tz_address_path = 'date__job__jobsite__address'
+
     @property
     def geo(self):
         return self.__class__.objects.filter(
@@ -764,6 +772,8 @@ class JobOffer(TimeZoneUUIDModel):
         verbose_name = _("Job Offer")
         verbose_name_plural = _("Job Offers")
 
+    tz_address_path = 'shift__date__job__jobsite__address'
+
     @property
     def geo(self):
         return self.__class__.objects.filter(
@@ -987,7 +997,9 @@ class JobOffer(TimeZoneUUIDModel):
                 shift=self.shift
             ).exclude(status=JobOffer.STATUS_CHOICES.accepted)
             jo_with_sms_sent = list(qs.filter(job_offer_smses__offer_sent_by_sms__isnull=False).distinct())
+            cancelled_ids = list(qs.values_list('id', flat=True))
             qs.update(status=JobOffer.STATUS_CHOICES.cancelled)
+            CandidateBusyInterval.sync_job_offers(JobOffer.objects.filter(id__in=cancelled_ids))
 
             # send placement rejection sms
             for sent_jo in jo_with_sms_sent:
@@ -1043,49 +1055,66 @@ class JobOffer(TimeZoneUUIDModel):
             ).exists():
                 self.move_candidate_to_carrier_list(new_offer=True)
 
-            # offer = JobOffer.objects.get(pk=self.pk)
-            tomorrow = self.now_tz + timedelta(days=1)
-            tomorrow_end = tomorrow.replace(hour=5, minute=0, second=0, microsecond=0) + timedelta(days=1)
-            # TODO: maybe need to rethink, but it should work
-            # compute eta to schedule SMS sending
-            if is_resend:
-                eta = self.now_tz + timedelta(seconds=10)
-            elif self.start_time_tz <= tomorrow_end:
-                # today and tomorrow day and night shifts
-                eta = self.now_tz.replace(hour=10, minute=0, second=0, microsecond=0)
-
-                if self.now_tz >= self.start_time_tz - timedelta(hours=1):
-                    if self.now_tz >= self.start_time_tz + timedelta(hours=2):
-                        eta = None
-                    else:
-                        eta = self.now_tz + timedelta(seconds=10)
-                elif eta <= self.now_tz or eta >= self.start_time_tz - timedelta(hours=1, minutes=30):
-                    eta = self.now_tz + timedelta(seconds=10)
-            else:
-                if not self.has_future_accepted_jo() \
-                        and not self.has_previous_jo() \
-                        and self.start_time_tz <= self.now_tz + timedelta(days=4):
-                    eta = self.now_tz + timedelta(seconds=10)
-                else:
-                    # future date day shift
-                    __target = self.start_time_tz.replace(hour=10, minute=0, second=0, microsecond=0)
-                    eta = __target - timedelta(days=1)
+            eta = self.get_sms_eta(is_resend)
             if eta:
                 utc_eta = tz2utc(eta)
                 self.scheduled_sms_datetime = utc_eta
                 self.save(update_fields=['scheduled_sms_datetime'])
-                if self.is_first() and not self.is_accepted():
-                    task = send_jo_confirmation
-                elif self.is_recurring():
-                    task = send_recurring_jo_confirmation
-                else:
-                    # FIXME: send job confirmation SMS because there is pending job's JOs for candidate
-                    task = send_jo_confirmation
+                task = self.get_confirmation_task()
 
                 master_company = self.candidate_contact.contact.get_closest_company()
 
                 task.apply_async(args=[self.id, master_company.id], eta=utc_eta)
 
+    def get_sms_eta(self, is_resend=False, has_future_accepted_jo=None, has_previous_jo=None, now_tz=None):
+        """
+        Computes when the job offer SMS should be sent, None if it's too late to send it.
+        Precomputed has_future_accepted_jo/has_previous_jo flags are used instead of the queries if passed.
+        """
+        now_tz = now_tz or self.now_tz
+        tomorrow = now_tz + timedelta(days=1)
+        tomorrow_end = tomorrow.replace(hour=5, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        # TODO: maybe need to rethink, but it should work
+        # compute eta to schedule SMS sending
+        if is_resend:
+            eta = now_tz + timedelta(seconds=10)
+        elif self.start_time_tz <= tomorrow_end:
+            # today and tomorrow day and night shifts
+            eta = now_tz.replace(hour=10, minute=0, second=0, microsecond=0)
+
+            if now_tz >= self.start_time_tz - timedelta(hours=1):
+                if now_tz >= self.start_time_tz + timedelta(hours=2):
+                    eta = None
+                else:
+                    eta = now_tz + timedelta(seconds=10)
+            elif eta <= now_tz or eta >= self.start_time_tz - timedelta(hours=1, minutes=30):
+                eta = now_tz + timedelta(seconds=10)
+        else:
+            if not (self.has_future_accepted_jo() if has_future_accepted_jo is None else has_future_accepted_jo) \
+                    and not (self.has_previous_jo() if has_previous_jo is None else has_previous_jo) \
+                    and self.start_time_tz <= now_tz + timedelta(days=4):
+                eta = now_tz + timedelta(seconds=10)
+            else:
+                # future date day shift
+                __target = self.start_time_tz.replace(hour=10, minute=0, second=0, microsecond=0)
+                eta = __target - timedelta(days=1)
+
+        return eta
+
+    def get_confirmation_task(self, is_first=None, is_recurring=None):
+        """
+        Gets the task sending the job offer SMS.
+        Precomputed is_first/is_recurring flags are used instead of the queries if passed.
+        """
+        if (self.is_first() if is_first is None else is_first) and not self.is_accepted():
+            return send_jo_confirmation
+        elif self.is_recurring() if is_recurring is None else is_recurring:
+            return send_recurring_jo_confirmation
+
+        # FIXME: send job confirmation SMS because there is pending job's JOs for candidate
+        return send_jo_confirmation
+
+
 class JobOfferSMS(UUIDModel):
 
     job_offer = models.ForeignKey(
@@ -1313,6 +1342,8 @@ class TimeSheet(TimeZoneUUIDModel, WorkflowProcess):
         fields = [self.shift_started_at_tz, self.candidate_submitted_at_tz]
         return ' '.join([str(x) for x in fields])
 
+    tz_address_path = 'job_offer__shift__date__job__jobsite__address'
+
     @property
     def geo(self):
         return self.__class__.objects.filter(
@@ -2174,6 +2205,163 @@ class ContactJobsiteDistanceCache(UUIDModel):
         unique_together = ("contact", "jobsite")
 
 
+class CandidateBusyInterval(models.Model):
+    """
+    Maintained index of the periods in which candidates can't be booked for a shift.
+
+    Rows are built from accepted/undefined job offers and time sheets (shift start only)
+    and contact unavailabilities (whole days) and are kept up to date by model signals,
+    so availability of the candidates is checked with one indexed query.
+    """
+
+    REASON_CHOICES = Choices(
+        (hr_job_utils.HAS_JOBOFFER, 'job_offer', _("Job Offer")),
+        (hr_job_utils.HAS_TIMESHEET, 'time_sheet', _("Time Sheet")),
+        (hr_job_utils.UNAVAILABLE, 'unavailable', _("Unavailable")),
+    )
+
+    candidate_contact = models.ForeignKey(
+        'candidate.CandidateContact',
+        on_delete=models.CASCADE,
+        related_name='busy_intervals',
+        verbose_name=_("Candidate Contact")
+    )
+
+    reason = models.PositiveSmallIntegerField(choices=REASON_CHOICES, verbose_name=_("Reason"))
+
+    # id of the job offer, time sheet or contact unavailability
+    source_id = models.UUIDField(verbose_name=_("Source"))
+
+    busy_from = models.DateTimeField(verbose_name=_("Busy from"))
+
+    busy_until = models.DateTimeField(verbose_name=_("Busy until"))
+
+    class Meta:
+        verbose_name = _("Candidate Busy Interval")
+        verbose_name_plural = _("Candidate Busy Intervals")
+        indexes = [
+            models.Index(fields=['candidate_contact', 'busy_from', 'busy_until'], name='hr_busy_candidate_idx'),
+            models.Index(fields=['source_id'], name='hr_busy_source_idx'),
+        ]
+
+    def __str__(self):
+        return '{}: {} - {}'.format(self.get_reason_display(), self.busy_from, self.busy_until)
+
+    @staticmethod
+    def _make_aware(value):
+        return timezone.make_aware(value, timezone.get_default_timezone(), is_dst=False)
+
+    @classmethod
+    def _replace(cls, reason, source_ids, intervals):
+        with transaction.atomic():
+            cls.objects.filter(reason=reason, source_id__in=source_ids).delete()
+            cls.objects.bulk_create(intervals)
+
+    @classmethod
+    def sync_job_offers(cls, job_offers):
+        """
+        Rebuilds intervals of the job offers queryset, only accepted and undefined job offers are busy
+        """
+        source_ids, intervals = set(), []
+        rows = job_offers.values_list('id', 'candidate_contact_id', 'status', 'shift__date__shift_date', 'shift__time')
+        for job_offer_id, candidate_id, status, shift_date, shift_time in rows:
+            source_ids.add(job_offer_id)
+            if status == JobOffer.STATUS_CHOICES.cancelled:
+                continue
+
+            started_at = cls._make_aware(datetime.combine(shift_date, shift_time))
+            intervals.append(cls(
+                candidate_contact_id=candidate_id, reason=cls.REASON_CHOICES.job_offer, source_id=job_offer_id,
+                busy_from=started_at, busy_until=started_at,
+            ))
+
+        cls._replace(cls.REASON_CHOICES.job_offer, source_ids, intervals)
+
+    @classmethod
+    def sync_time_sheets(cls, time_sheets):
+        """
+        Rebuilds intervals of the time sheets queryset
+        """
+        source_ids, intervals = set(), []
+        rows = time_sheets.values_list('id', 'job_offer__candidate_contact_id', 'shift_started_at')
+        for time_sheet_id, candidate_id, shift_started_at in rows:
+            source_ids.add(time_sheet_id)
+            if shift_started_at is None:
+                continue
+
+            intervals.append(cls(
+                candidate_contact_id=candidate_id, reason=cls.REASON_CHOICES.time_sheet, source_id=time_sheet_id,
+                busy_from=shift_started_at, busy_until=shift_started_at,
+            ))
+
+        cls._replace(cls.REASON_CHOICES.time_sheet, source_ids, intervals)
+
+    @classmethod
+    def sync_unavailabilities(cls, unavailabilities):
+        """
+        Rebuilds intervals of the contact unavailabilities queryset for every candidate of the contacts
+        """
+        source_ids, intervals = set(), []
+        rows = unavailabilities.values_list(
+            'id', 'contact__candidate_contacts', 'unavailable_from', 'unavailable_until'
+        )
+        for unavailability_id, candidate_id, unavailable_from, unavailable_until in rows:
+            source_ids.add(unavailability_id)
+            if candidate_id is None or unavailable_from is None or unavailable_until is None:
+                continue
+
+            intervals.append(cls(
+                candidate_contact_id=candidate_id, reason=cls.REASON_CHOICES.unavailable,
+                source_id=unavailability_id,
+                busy_from=cls._make_aware(datetime.combine(unavailable_from, time.min)),
+                busy_until=cls._make_aware(datetime.combine(unavailable_until, time.max)),
+            ))
+
+        cls._replace(cls.REASON_CHOICES.unavailable, source_ids, intervals)
+
+    @classmethod
+    def delete_for_source(cls, sender, instance, **kwargs):
+        cls.objects.filter(source_id=instance.pk).delete()
+
+    @classmethod
+    def job_offer_saved(cls, sender, instance, **kwargs):
+        cls.sync_job_offers(JobOffer.objects.filter(pk=instance.pk))
+
+    @classmethod
+    def shift_saved(cls, sender, instance, created=False, **kwargs):
+        if not created:
+            cls.sync_job_offers(JobOffer.objects.filter(shift=instance))
+
+    @classmethod
+    def shift_date_saved(cls, sender, instance, created=False, **kwargs):
+        if not created:
+            cls.sync_job_offers(JobOffer.objects.filter(shift__date=instance))
+
+    @classmethod
+    def time_sheet_saved(cls, sender, instance, **kwargs):
+        cls.sync_time_sheets(TimeSheet.objects.filter(pk=instance.pk))
+
+    @classmethod
+    def unavailability_saved(cls, sender, instance, **kwargs):
+        cls.sync_unavailabilities(core_models.ContactUnavailability.objects.filter(pk=instance.pk))
+
+    @classmethod
+    def candidate_contact_saved(cls, sender, instance, created=False, **kwargs):
+        if created:
+            cls.sync_unavailabilities(core_models.ContactUnavailability.objects.filter(contact_id=instance.contact_id))
+
+
+post_save.connect(CandidateBusyInterval.job_offer_saved, sender=JobOffer)
+post_delete.connect(CandidateBusyInterval.delete_for_source, sender=JobOffer)
+post_save.connect(CandidateBusyInterval.shift_saved, sender=Shift)
+post_save.connect(CandidateBusyInterval.shift_date_saved, sender=ShiftDate)
+post_save.connect(CandidateBusyInterval.time_sheet_saved, sender=TimeSheet)
+post_delete.connect(CandidateBusyInterval.delete_for_source, sender=TimeSheet)
+post_save.connect(CandidateBusyInterval.unavailability_saved, sender=core_models.ContactUnavailability)
+post_delete.connect(CandidateBusyInterval.delete_for_source, sender=core_models.ContactUnavailability)
+post_save.connect(CandidateBusyInterval.candidate_contact_saved, sender=CandidateContact)
+
+
 class Payslip(UUIDModel):
 
     payment_date = models.DateField(
@@ -1,14 +1,13 @@
 import copy
 from datetime import timedelta, datetime
-from io import BytesIO
 
-import weasyprint
 from django.db.models import Q
 
 from r3sourcer.apps.pricing.models import (
     RateCoefficientModifier,
     AllowanceMixin,
 )
+from r3sourcer.apps.hr.utils.pdf import get_file_from_str
 from r3sourcer.helpers.datetimes import tz2utc, date2utc_date
 
 class BasePaymentService:
@@ -44,38 +43,27 @@ class BasePaymentService:
 
     @classmethod
     def _get_file_from_str(cls, str):
-        pdf = weasyprint.HTML(string=str)
-        pdf_file = BytesIO()
-        pdf_file.write(pdf.write_pdf())
-        pdf_file.seek(0)
+        return get_file_from_str(str)
 
-        return pdf_file
-
-    def lines_iter(self, coeffs_hours, skill, hourly_rate, timesheet):
+    def lines_iter(self, coeffs_hours, skill, hourly_rate, timesheet, modifiers=None):
         for coeff_hours in coeffs_hours:
             coefficient = coeff_hours['coefficient']
             notes = str(skill)
             if coefficient != 'base':
-                if self.modifier_type == RateCoefficientModifier.TYPE_CHOICES.company:
-                    modifier_rel = coefficient.price_list_rate_modifiers.filter(
-                        price_list_rate__price_list__company=timesheet.regular_company,
-                    ).first()
-                elif self.modifier_type == RateCoefficientModifier.TYPE_CHOICES.candidate:
-                    modifier_rel = coefficient.candidate_skill_coefficient_rels.filter(
-                        skill_rel__candidate_contact=timesheet.candidate_contact,
-                    ).first()
-
-                modifier = modifier_rel and modifier_rel.rate_coefficient_modifier
-
-                if not modifier:
-                    modifier = coefficient.rate_coefficient_modifiers.filter(
-                        type=self.modifier_type, default=True,
-                    ).first()
-
-                is_allowance = any([
-                    isinstance(rule.rule, AllowanceMixin)
-                    for rule in coefficient.rate_coefficient_rules.all()]
-                )
+                if modifiers is not None:
+                    modifier = modifiers.get_modifier(
+                        coefficient,
+                        company_id=timesheet.job_offer.shift.date.job.jobsite.regular_company_id,
+                        candidate_id=timesheet.job_offer.candidate_contact_id,
+                    )
+                    is_allowance = modifiers.is_allowance(coefficient)
+                else:
+                    modifier = self._get_modifier(coefficient, timesheet)
+                    is_allowance = any([
+                        isinstance(rule.rule, AllowanceMixin)
+                        for rule in coefficient.rate_coefficient_rules.all()]
+                    )
+
                 if is_allowance:
                     rate = modifier.fixed_override
                 else:
@@ -89,3 +77,22 @@ class BasePaymentService:
             line['notes'] = notes
 
             yield line
+
+    def _get_modifier(self, coefficient, timesheet):
+        if self.modifier_type == RateCoefficientModifier.TYPE_CHOICES.company:
+            modifier_rel = coefficient.price_list_rate_modifiers.filter(
+                price_list_rate__price_list__company=timesheet.regular_company,
+            ).first()
+        elif self.modifier_type == RateCoefficientModifier.TYPE_CHOICES.candidate:
+            modifier_rel = coefficient.candidate_skill_coefficient_rels.filter(
+                skill_rel__candidate_contact=timesheet.candidate_contact,
+            ).first()
+
+        modifier = modifier_rel and modifier_rel.rate_coefficient_modifier
+
+        if not modifier:
+            modifier = coefficient.rate_coefficient_modifiers.filter(
+                type=self.modifier_type, default=True,
+            ).first()
+
+        return modifier
@@ -3,7 +3,6 @@ import math
 from copy import copy
 from hashlib import md5
 
-from django.core.files.base import ContentFile
 from django.db.models import Count
 from django.utils.formats import date_format
 from filer.models import Folder, File
@@ -12,6 +11,7 @@ from r3sourcer.apps.core.models import Invoice, InvoiceLine, InvoiceRule
 from r3sourcer.apps.core.utils.utils import get_thumbnail_picture
 from r3sourcer.apps.hr.models import TimeSheet
 from r3sourcer.apps.hr.payment.base import BasePaymentService
+from r3sourcer.apps.hr.utils.pdf import get_or_render_pdf_file
 from r3sourcer.apps.pricing.models import PriceListRate
 from r3sourcer.apps.pdf_templates.models import PDFTemplate
 from r3sourcer.helpers.datetimes import utc_now
@@ -138,28 +138,34 @@ class InvoiceService(BasePaymentService):
             'show_candidate': show_candidate,
         }
 
-        pdf_file = cls._get_file_from_str(str(template.render(context)))
-
         folder, created = Folder.objects.get_or_create(
             parent=invoice.customer_company.files,
             name='invoices',
         )
 
-        file_name = 'invoice_{}_{}.pdf'.format(
+        file_obj = get_or_render_pdf_file(str(template.render(context)), folder, cls.get_pdf_file_name(invoice))
+
+        return file_obj
+
+    @classmethod
+    def get_pdf_file_name(cls, invoice):
+        return 'invoice_{}_{}.pdf'.format(
             invoice.number,
             date_format(invoice.date, 'Y_m_d')
         )
 
-        file_obj, _ = File.objects.get_or_create(
-            folder=folder,
-            name='invoice_{}_{}.pdf'.format(
-                invoice.number,
-                date_format(invoice.date, 'Y_m_d')
-            ),
-            file=ContentFile(pdf_file.read(), name=file_name)
-        )
-
-        return file_obj
+    @classmethod
+    def get_pdf(cls, invoice):
+        """
+        Gets invoice PDF rendered after the last invoice update or None
+        """
+        pdf_file_obj = File.objects.filter(
+            name=cls.get_pdf_file_name(invoice)
+        ).order_by('-uploaded_at').first()
+        if pdf_file_obj is None or invoice.updated_at > pdf_file_obj.modified_at:
+            return None
+
+        return pdf_file_obj
 
     @property
     def invoice_line_keys(se1f):
@@ -33,23 +33,21 @@ class PayslipService(BasePaymentService):
         coefficient_service = CoefficientService()
         prices = {}
 
+        timesheets = list(timesheets.select_related(
+            'job_offer__shift__date__job__position', *coefficient_service.timesheet_related_fields
+        ))
+        coeffs_hours_map, modifiers = coefficient_service.calc_many(
+            timesheets, RateCoefficientModifier.TYPE_CHOICES.company, local_breaks=False
+        )
+
         for timesheet in timesheets:
-            jobsite = timesheet.job_offer.job.jobsite
-            industry = jobsite.industry
             skill = timesheet.job_offer.job.position
             skill_rate = self._get_skill_rate(candidate, skill)
 
-            coeffs_hours = coefficient_service.calc(
-                timesheet.master_company, industry,
-                RateCoefficientModifier.TYPE_CHOICES.company,
-                timesheet.shift_started_at_tz,
-                timesheet.shift_duration,
-                break_started=timesheet.break_started_at,
-                break_ended=timesheet.break_ended_at,
+            lines_iter = self.lines_iter(
+                coeffs_hours_map[timesheet.pk], skill, skill_rate, timesheet, modifiers=modifiers
             )
 
-            lines_iter = self.lines_iter(coeffs_hours, skill, skill_rate)
-
             for raw_line in lines_iter:
                 units = Decimal(raw_line['hours'].total_seconds() / 3600)
                 rate = raw_line['rate']
@@ -7,7 +7,6 @@ from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
-from django.core.files.base import ContentFile
 from django.db import transaction, models
 from django.utils import formats, timezone
 from django.utils.formats import date_format
@@ -23,6 +22,7 @@ from r3sourcer.apps.email_interface.models import EmailMessage
 from r3sourcer.apps.email_interface.utils import get_email_service
 from r3sourcer.apps.hr import models as hr_models
 from r3sourcer.apps.hr.utils import utils
+from r3sourcer.apps.hr.utils.pdf import get_or_render_pdf_file, set_pdf_job_result
 from r3sourcer.apps.login.models import TokenLogin
 from r3sourcer.apps.myob.helpers import get_myob_client
 from r3sourcer.apps.pricing.models import RateCoefficientModifier, PriceListRate
@@ -42,19 +42,18 @@ GOING_TO_WORK, SHIFT_ENDING, RECRUITEE_SUBMITTED, SUPERVISOR_DECLINED = range(4)
 
 @shared_task(queue='hr')
 def update_all_distances():
+    from r3sourcer.apps.hr.utils.distances import DistanceMatrixPipeline
 
-    all_calculated_jobsites = hr_models.Jobsite.objects.filter(
-        id__in=hr_models.ContactJobsiteDistanceCache.objects.filter(
-            updated_at__isnull=True
-        ).values('jobsite')
-    )
-
-    for jobsite in all_calculated_jobsites:
-        if not (jobsite.latitude == 0 and jobsite.longitude == 0):
+    stale_distances = hr_models.ContactJobsiteDistanceCache.objects.filter(
+        updated_at__isnull=True
+    ).select_related('contact', 'jobsite__address')
 
-            contacts = core_models.Contact.objects.filter(distance_caches__jobsite=jobsite)
-            if not utils.calculate_distances_for_jobsite(contacts, jobsite):
-                break
+    DistanceMatrixPipeline().calculate([
+        (distance.contact, distance.jobsite) for distance in stale_distances
+        if distance.jobsite.address and not (
+            distance.jobsite.address.latitude == 0 and distance.jobsite.address.longitude == 0
+        )
+    ])
 
 
 def send_job_offer(job_offer, tpl_name, master_company_id, action_sent=None):
@@ -1145,17 +1144,6 @@ def auto_approve_timesheet(timesheet_id):
         supervisor_approved_at=utc_now())
 
 
-def get_file_from_str(str):
-    from io import BytesIO
-    import weasyprint
-    pdf = weasyprint.HTML(string=str)
-    pdf_file = BytesIO()
-    pdf_file.write(pdf.write_pdf())
-    pdf_file.seek(0)
-
-    return pdf_file
-
-
 def group_timsheet_rates(timesheet_rates):
     from itertools import groupby
 
@@ -1187,11 +1175,14 @@ def get_value_for_rate_type(coeffs_hours, rate_type):
     return timedelta()
 
 
-def generate_pdf(timesheet_ids, request=None, master_company=None):
+def generate_pdf(timesheet_ids, request=None, master_company=None, user=None):
     template_slug = 'timesheets-list'
 
     timesheet_rates = hr_models.TimeSheetRate.objects.filter(timesheet__pk__in=timesheet_ids).order_by(
-        'timesheet__job_offer__shift__date__job__jobsite', 'is_hourly', 'timesheet__shift_started_at')
+        'timesheet__job_offer__shift__date__job__jobsite', 'is_hourly', 'timesheet__shift_started_at'
+    ).select_related(
+        'worktype', *['timesheet__{}'.format(field) for field in CoefficientService.timesheet_related_fields]
+    )
     if not timesheet_rates:
         return None
     if not master_company:
@@ -1210,6 +1201,10 @@ def generate_pdf(timesheet_ids, request=None, master_company=None):
         raise Exception('Cannot find pdf template with slug %s for language %s', template_slug, company_language)
 
     coefficient_service = CoefficientService()
+    timesheets = {timesheet_rate.timesheet.pk: timesheet_rate.timesheet for timesheet_rate in timesheet_rates}
+    coeffs_hours_map, _ = coefficient_service.calc_many(
+        timesheets.values(), RateCoefficientModifier.TYPE_CHOICES.candidate
+    )
     total_base_units = []
     total_15_coef = []
     total_2_coef = []
@@ -1233,15 +1228,7 @@ def generate_pdf(timesheet_ids, request=None, master_company=None):
 
         for timesheet_rate in rates:
 
-            jobsite = timesheet_rate.timesheet.job_offer.job.jobsite
-            industry = jobsite.industry
-            coeffs_hours = coefficient_service.calc(timesheet_rate.timesheet.master_company,
-                                                    industry,
-                                                    RateCoefficientModifier.TYPE_CHOICES.candidate,
-                                                    timesheet_rate.timesheet.shift_started_at_tz,
-                                                    timesheet_rate.timesheet.shift_duration,
-                                                    break_started=timesheet_rate.timesheet.break_started_at_tz,
-                                                    break_ended=timesheet_rate.timesheet.break_ended_at_tz)
+            coeffs_hours = coeffs_hours_map[timesheet_rate.timesheet.pk]
             timesheet_rate.timesheet.coeffs_hours = coeffs_hours
             name_mapping = {'base': 'base', '1.5': 'c_1_5x', '2': 'c_2x', 'meal': 'meal', 'travel': 'travel'}
 
@@ -1286,10 +1273,9 @@ def generate_pdf(timesheet_ids, request=None, master_company=None):
         'total_travel': total_travel,
         'total_meal': total_meal,
         'total_skill_activities': total_skill_activities,
-        'user': request.user
+        'user': user or getattr(request, 'user', None)
     }
 
-    pdf_file = get_file_from_str(str(template.render(context)))
     folder, created = Folder.objects.get_or_create(
         parent=master_company.files,
         name='timesheet',
@@ -1298,16 +1284,12 @@ def generate_pdf(timesheet_ids, request=None, master_company=None):
         master_company,
         date_format(timesheet_rates[0].timesheet.shift_started_at_tz, 'Y_m_d')
     )
-    file_obj, created = File.objects.get_or_create(
-        folder=folder,
-        name=file_name,
-        file=ContentFile(pdf_file.read(), name=file_name)
-    )
+    file_obj = get_or_render_pdf_file(str(template.render(context)), folder, file_name)
 
     return file_obj
 
 
-def generate_salary_summary_pdf(timesheet_ids, request=None, master_company=None):
+def generate_salary_summary_pdf(timesheet_ids, request=None, master_company=None, user=None):
     template_slug = 'salary-summary'
 
     timesheets = hr_models.TimeSheet.objects.filter(pk__in=timesheet_ids)
@@ -1333,10 +1315,9 @@ def generate_salary_summary_pdf(timesheet_ids, request=None, master_company=None
         'master_company': master_company,
         'master_company_logo': master_logo,
         'timesheets': timesheets,
-        'user': request.user
+        'user': user or getattr(request, 'user', None)
     }
 
-    pdf_file = get_file_from_str(str(template.render(context)))
     folder, created = Folder.objects.get_or_create(
         parent=master_company.files,
         name='salary_summary',
@@ -1345,15 +1326,11 @@ def generate_salary_summary_pdf(timesheet_ids, request=None, master_company=None
         master_company,
         date_format(timesheets[0].shift_started_at_tz, 'Y_m_d')
     )
-    file_obj, created = File.objects.get_or_create(
-        folder=folder,
-        name=file_name,
-        file=ContentFile(pdf_file.read(), name=file_name)
-    )
+    file_obj = get_or_render_pdf_file(str(template.render(context)), folder, file_name)
     return file_obj.url
 
 
-def generate_gross_profit_pdf(timesheet_ids, request=None, master_company=None):
+def generate_gross_profit_pdf(timesheet_ids, request=None, master_company=None, user=None):
     template_slug = 'gross-profit-summary'
 
     timesheets = hr_models.TimeSheet.objects.filter(pk__in=timesheet_ids)
@@ -1386,10 +1363,9 @@ def generate_gross_profit_pdf(timesheet_ids, request=None, master_company=None):
         'master_company': master_company,
         'master_company_logo': master_logo,
         'timesheets': timesheets,
-        'user': request.user
+        'user': user or getattr(request, 'user', None)
     }
 
-    pdf_file = get_file_from_str(str(template.render(context)))
     folder, created = Folder.objects.get_or_create(
         parent=master_company.files,
         name='gross-profit-summary',
@@ -1398,14 +1374,63 @@ def generate_gross_profit_pdf(timesheet_ids, request=None, master_company=None):
         master_company,
         date_format(timesheets[0].shift_started_at_tz, 'Y_m_d')
     )
-    file_obj, created = File.objects.get_or_create(
-        folder=folder,
-        name=file_name,
-        file=ContentFile(pdf_file.read(), name=file_name)
-    )
+    file_obj = get_or_render_pdf_file(str(template.render(context)), folder, file_name)
     return "success", file_obj.url
 
 
+@shared_task(bind=True)
+def render_pdf_job(self, job_type, user_id, object_ids):
+    """
+    Renders PDF for the pdf job, see hr.utils.pdf.start_pdf_job.
+    Task results are not stored (task_ignore_result), so the result is saved to the pdf job cache entry.
+    :param job_type: timesheets, salary_summary, gross_profit or invoice
+    :param user_id: id of the user requested the PDF
+    :param object_ids: timesheet ids or invoice id
+    :return: dict with status and pdf url or error
+    """
+    try:
+        result = _render_pdf_job(job_type, user_id, object_ids)
+    except Exception as e:
+        set_pdf_job_result(self.request.id, user_id, {'status': 'error', 'error': str(e)})
+        raise
+
+    set_pdf_job_result(self.request.id, user_id, result)
+    return result
+
+
+def _render_pdf_job(job_type, user_id, object_ids):
+    user = core_models.User.objects.filter(id=user_id).first()
+
+    if job_type == 'timesheets':
+        pdf_file = generate_pdf(object_ids, user=user)
+        if not pdf_file:
+            return {'status': 'error', 'error': str(_("Can't view PDF without submitted timesheets"))}
+        pdf_url = pdf_file.url
+    elif job_type == 'salary_summary':
+        pdf_url = generate_salary_summary_pdf(object_ids, user=user)
+        if not pdf_url:
+            return {'status': 'error', 'error': str(_('No timesheets were selected'))}
+    elif job_type == 'gross_profit':
+        result = generate_gross_profit_pdf(object_ids, user=user)
+        if not result:
+            return {'status': 'error', 'error': str(_('No timesheets were selected'))}
+
+        ret_status, pdf_url = result
+        if not ret_status:
+            return {'status': 'error', 'error': pdf_url}
+    elif job_type == 'invoice':
+        from r3sourcer.apps.hr.payment.invoices import InvoiceService
+
+        invoice = core_models.Invoice.objects.get(pk=object_ids[0])
+        rule = invoice.customer_company.invoice_rules.first()
+        show_candidate = rule.show_candidate_name if rule else False
+        pdf_url = InvoiceService.generate_pdf(invoice, show_candidate).url
+    else:
+        raise ValueError('Unknown pdf job type: {}'.format(job_type))
+
+    return {'status': 'success', 'pdf': pdf_url}
+
+
 @shared_task
 def send_invoice_email(invoice_id):
     tpl_name='client-invoice'
@@ -1,13 +1,17 @@
 from datetime import timedelta, datetime, date, time
 from decimal import Decimal
 
+import mock
 import pytest
 
 from django.utils import timezone
 from freezegun import freeze_time
 
 # from r3sourcer.apps.hr.payment.base import BasePaymentService, calc_worked_delta
+from r3sourcer.apps.hr.models import TimeSheet
 from r3sourcer.apps.hr.payment.base import BasePaymentService
+from r3sourcer.apps.pricing import models as pricing_models
+from r3sourcer.apps.pricing.services import CoefficientService, CompiledRateCoefficients
 
 
 hour_1 = timedelta(hours=1)
@@ -176,3 +180,44 @@ class TestInvoiceService:
         ))
 
         assert len(res) == 0
+
+    def test_lines_iter_calc_many(self, service, timesheet_approved, master_company, allowance_rate_coefficient):
+        pricing_models.DynamicCoefficientRule.objects.filter(
+            rate_coefficient=allowance_rate_coefficient
+        ).update(used=True)
+        pricing_models.RateCoefficientModifier.objects.filter(
+            rate_coefficient=allowance_rate_coefficient
+        ).update(default=True)
+        pricing_models.RateCoefficientRel.objects.create(
+            rate_coefficient=allowance_rate_coefficient, company=master_company
+        )
+
+        coeffs_hours_map, modifiers = CoefficientService().calc_many(
+            TimeSheet.objects.filter(pk=timesheet_approved.pk), service.modifier_type
+        )
+        coeffs_hours = coeffs_hours_map[timesheet_approved.pk]
+
+        assert len(coeffs_hours) == 1
+        assert coeffs_hours[0]['coefficient'] == allowance_rate_coefficient
+        assert coeffs_hours[0]['hours'] == hour_1
+        assert modifiers.is_allowance(allowance_rate_coefficient)
+
+        res = list(service.lines_iter(
+            coeffs_hours, 'skill', Decimal(20), timesheet_approved, modifiers=modifiers
+        ))
+
+        assert len(res) == 1
+        assert res[0]['rate'] == Decimal(10)
+
+    @mock.patch.object(CompiledRateCoefficients, 'process', return_value=[])
+    def test_calc_many_local_breaks(self, mock_process, service, timesheet_approved):
+        timesheets = TimeSheet.objects.filter(pk=timesheet_approved.pk)
+
+        CoefficientService().calc_many(timesheets, service.modifier_type)
+        CoefficientService().calc_many(timesheets, service.modifier_type, local_breaks=False)
+
+        timesheet_approved.refresh_from_db()
+        local_call, utc_call = mock_process.call_args_list
+        assert local_call[0][2] == timesheet_approved.break_started_at_tz
+        assert utc_call[0][2] == timesheet_approved.break_started_at
+        assert utc_call[0][3] == timesheet_approved.break_ended_at
@@ -0,0 +1,100 @@
+import mock
+import pytest
+
+from r3sourcer.apps.candidate.models import CandidateContact
+from r3sourcer.apps.core.models import Address, ContactAddress
+from r3sourcer.apps.core.utils.geo import LocalDistanceMatrixBackend
+from r3sourcer.apps.hr.api.serializers.job import JobFillinSerialzier
+from r3sourcer.apps.hr.models import ContactJobsiteDistanceCache
+from r3sourcer.apps.hr.utils.distances import (
+    DistanceMatrixPipeline, bulk_upsert_distance_caches, get_candidate_distances, get_candidates_outside_radius,
+)
+
+
+@pytest.mark.django_db
+class TestDistanceMatrixPipeline:
+
+    @pytest.fixture
+    def contacts(self, contact, contact_another, address):
+        ContactAddress.objects.create(contact=contact, address=address)
+        ContactAddress.objects.create(contact=contact_another, address=address)
+        return [contact, contact_another]
+
+    def test_calculate_deduplicates_addresses(self, contacts, jobsite):
+        backend = LocalDistanceMatrixBackend()
+        pipeline = DistanceMatrixPipeline(backend=backend, rate_limit=1000)
+
+        assert pipeline.calculate([(contact, jobsite) for contact in contacts])
+
+        assert len(backend.requests) == 1
+        assert len(backend.requests[0][1]) == 1
+        assert ContactJobsiteDistanceCache.objects.filter(jobsite=jobsite, distance=1000).count() == 2
+
+    def test_calculate_failed_request(self, contacts, jobsite):
+        backend = LocalDistanceMatrixBackend()
+        backend.get_distances = lambda *args, **kwargs: []
+        pipeline = DistanceMatrixPipeline(backend=backend, rate_limit=1000)
+
+        assert not pipeline.calculate([(contact, jobsite) for contact in contacts])
+        assert not ContactJobsiteDistanceCache.objects.exists()
+
+    def test_calculate_without_address(self, contact, jobsite):
+        backend = LocalDistanceMatrixBackend()
+        pipeline = DistanceMatrixPipeline(backend=backend, rate_limit=1000)
+
+        assert pipeline.calculate([(contact, jobsite)])
+        assert backend.requests == []
+
+    @pytest.fixture
+    def far_jobsite_address(self, address):
+        # contacts are in Sydney, jobsite is in Melbourne
+        address.latitude, address.longitude = -33.8688, 151.2093
+        address.save(update_fields=['latitude', 'longitude'])
+
+        return Address(
+            street_address='far street', postal_code='3000', city=address.city, state=address.state,
+            country=address.country, latitude=-37.8136, longitude=144.9631,
+        )
+
+    def test_calculate_skips_far_pairs(self, contacts, jobsite, far_jobsite_address):
+        backend = LocalDistanceMatrixBackend()
+        pipeline = DistanceMatrixPipeline(backend=backend, rate_limit=1000, max_radius=100000)
+
+        with mock.patch.object(jobsite, 'get_address', return_value=far_jobsite_address):
+            assert pipeline.calculate([(contact, jobsite) for contact in contacts])
+
+        assert backend.requests == []
+
+    def test_calculate_far_pairs_without_radius(self, settings, contacts, jobsite, far_jobsite_address):
+        settings.DISTANCE_MATRIX_MAX_RADIUS = None
+        backend = LocalDistanceMatrixBackend()
+        pipeline = DistanceMatrixPipeline(backend=backend, rate_limit=1000)
+
+        with mock.patch.object(jobsite, 'get_address', return_value=far_jobsite_address):
+            assert pipeline.calculate([(contact, jobsite) for contact in contacts])
+
+        assert len(backend.requests) == 1
+
+    def test_get_candidates_outside_radius(self, candidate_contact, contacts, jobsite, far_jobsite_address):
+        candidate_contacts = CandidateContact.objects.all()
+
+        with mock.patch.object(jobsite, 'get_address', return_value=far_jobsite_address):
+            distances = get_candidate_distances(candidate_contacts, jobsite)
+
+        assert get_candidates_outside_radius(distances, 100000) == [candidate_contact.id]
+        assert get_candidates_outside_radius(distances, 1000000) == []
+
+    def test_distance_to_jobsite_straight_line_fallback(self):
+        serializer = JobFillinSerialzier(context={'straight_line_distances': {1: 12345.0, 2: None}})
+
+        assert serializer.get_distance_to_jobsite(mock.Mock(id=1, distance_to_jobsite=2000)) == 2
+        assert serializer.get_distance_to_jobsite(mock.Mock(id=1, distance_to_jobsite=-1)) == 12.3
+        assert serializer.get_distance_to_jobsite(mock.Mock(id=2, distance_to_jobsite=-1)) == -1
+
+    def test_bulk_upsert_distance_caches(self, contact, jobsite):
+        bulk_upsert_distance_caches({(contact.id, jobsite.id): (1000, 60)})
+        bulk_upsert_distance_caches({(contact.id, jobsite.id): (2000, 120)})
+
+        distance = ContactJobsiteDistanceCache.objects.get(contact=contact, jobsite=jobsite)
+        assert distance.distance == 2000
+        assert distance.time == 120
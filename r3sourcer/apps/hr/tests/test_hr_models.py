@@ -15,8 +15,10 @@ from django_mock_queries.query import MockSet, MockModel
 
 from r3sourcer.apps.hr.models import (
     TimeSheet, JobsiteUnavailability, CandidateEvaluation, JobOffer, ShiftDate, TimeSheetIssue, BlackList,
-    FavouriteList, Job, CarrierList, Shift, JobOfferSMS, NOT_FULFILLED, FULFILLED, LIKELY_FULFILLED, IRRELEVANT
+    FavouriteList, Job, CarrierList, Shift, JobOfferSMS, NOT_FULFILLED, FULFILLED, LIKELY_FULFILLED, IRRELEVANT,
+    CandidateBusyInterval,
 )
+from r3sourcer.apps.core.models import ContactUnavailability
 from r3sourcer.helpers.datetimes import utc_tomorrow
 from r3sourcer.helpers.models.abs.timezone_models import TimeZone
 from r3sourcer.apps.hr.models import TimeSheet
@@ -362,6 +364,18 @@ class TestJobOffer:
     def test_is_accepted(self, jo, expected):
         assert jo.is_accepted() == expected
 
+    def test_tz_from_address(self, job_offer, address):
+        job_offer = JobOffer.objects.get(pk=job_offer.pk)
+
+        assert address.tz_name
+        assert job_offer.tz.zone == address.tz_name
+
+    def test_tz_from_loaded_relations(self, job_offer, address, django_assert_num_queries):
+        job_offer = JobOffer.objects.select_related('shift__date__job__jobsite__address').get(pk=job_offer.pk)
+
+        with django_assert_num_queries(0):
+            assert job_offer.tz.zone == address.tz_name
+
     def test_is_first(self, job_offer):
         assert job_offer.is_first()
 
@@ -807,3 +821,53 @@ class TestFavouriteList:
 
         with pytest.raises(ValidationError):
             favourite_list.clean()
+
+
+@pytest.mark.django_db
+class TestCandidateBusyInterval:
+
+    def test_job_offer_interval(self, job_offer, candidate_contact):
+        interval = CandidateBusyInterval.objects.get(source_id=job_offer.id)
+
+        assert interval.candidate_contact == candidate_contact
+        assert interval.reason == CandidateBusyInterval.REASON_CHOICES.job_offer
+        assert localtime(interval.busy_from).replace(tzinfo=None) == datetime.datetime(2017, 1, 2, 8, 30)
+
+    def test_job_offer_interval_moved_with_shift(self, job_offer, shift):
+        shift.time = datetime.time(hour=10)
+        shift.save()
+
+        interval = CandidateBusyInterval.objects.get(source_id=job_offer.id)
+        assert localtime(interval.busy_from).replace(tzinfo=None) == datetime.datetime(2017, 1, 2, 10)
+
+    def test_cancelled_job_offer_interval_deleted(self, job_offer):
+        job_offer.status = JobOffer.STATUS_CHOICES.cancelled
+        job_offer.save()
+
+        assert not CandidateBusyInterval.objects.filter(source_id=job_offer.id).exists()
+
+    def test_timesheet_interval(self, timesheet, candidate_contact):
+        timesheet.shift_started_at = make_aware(datetime.datetime(2017, 1, 2, 8, 30))
+        timesheet.save()
+
+        interval = CandidateBusyInterval.objects.get(source_id=timesheet.id)
+        assert interval.candidate_contact == candidate_contact
+        assert interval.busy_from == timesheet.shift_started_at
+
+        timesheet.delete()
+
+        assert not CandidateBusyInterval.objects.filter(source_id=timesheet.id).exists()
+
+    def test_unavailability_interval(self, candidate_contact, contact):
+        unavailability = ContactUnavailability.objects.create(
+            contact=contact, unavailable_from=datetime.date(2017, 1, 2), unavailable_until=datetime.date(2017, 1, 3)
+        )
+
+        interval = CandidateBusyInterval.objects.get(source_id=unavailability.id)
+        assert interval.candidate_contact == candidate_contact
+        assert localtime(interval.busy_from).replace(tzinfo=None) == datetime.datetime(2017, 1, 2)
+        assert localtime(interval.busy_until).date() == datetime.date(2017, 1, 3)
+
+        unavailability.delete()
+
+        assert not CandidateBusyInterval.objects.filter(source_id=unavailability.id).exists()
@@ -0,0 +1,75 @@
+from io import BytesIO
+
+import mock
+import pytest
+from django.core.cache.backends.locmem import LocMemCache
+from filer.models import Folder
+
+from r3sourcer.apps.hr.tasks import render_pdf_job
+from r3sourcer.apps.hr.utils.pdf import get_or_render_pdf_file, get_pdf_job_result, start_pdf_job
+
+
+@pytest.fixture
+def pdf_cache():
+    with mock.patch('r3sourcer.apps.hr.utils.pdf.cache', LocMemCache('pdf', {})) as pdf_cache:
+        yield pdf_cache
+
+
+@pytest.mark.django_db
+class TestPdfRendering:
+
+    @pytest.fixture
+    def folder(self):
+        return Folder.objects.create(name='test folder')
+
+    @mock.patch('r3sourcer.apps.hr.utils.pdf.get_file_from_str')
+    def test_get_or_render_pdf_file_same_html(self, mock_render, folder, pdf_cache):
+        mock_render.side_effect = lambda html: BytesIO(b'%PDF-1.4')
+
+        file_obj = get_or_render_pdf_file('<p>test</p>', folder, 'test.pdf')
+
+        assert get_or_render_pdf_file('<p>test</p>', folder, 'test.pdf').id == file_obj.id
+        assert mock_render.call_count == 1
+
+    @mock.patch('r3sourcer.apps.hr.utils.pdf.get_file_from_str')
+    def test_get_or_render_pdf_file_changed_html(self, mock_render, folder, pdf_cache):
+        mock_render.side_effect = lambda html: BytesIO(b'%PDF-1.4')
+
+        file_obj = get_or_render_pdf_file('<p>test</p>', folder, 'test.pdf')
+
+        assert get_or_render_pdf_file('<p>changed</p>', folder, 'test.pdf').id != file_obj.id
+        assert mock_render.call_count == 2
+
+
+@pytest.mark.django_db
+class TestPdfJobs:
+
+    @mock.patch('r3sourcer.apps.hr.tasks.render_pdf_job.apply_async')
+    def test_get_pdf_job_result_pending(self, mock_apply, user, pdf_cache):
+        job_id = start_pdf_job('timesheets', user, ['timesheet-id'])
+
+        assert get_pdf_job_result(job_id, user) == {'status': 'pending'}
+
+    @mock.patch('r3sourcer.apps.hr.tasks.render_pdf_job.apply_async')
+    def test_get_pdf_job_result_another_user(self, mock_apply, user, user_another, pdf_cache):
+        job_id = start_pdf_job('timesheets', user, ['timesheet-id'])
+
+        assert get_pdf_job_result(job_id, user_another) is None
+
+    @mock.patch('r3sourcer.apps.hr.tasks.generate_pdf')
+    def test_get_pdf_job_result_eager(self, mock_generate, user, pdf_cache):
+        mock_generate.return_value = mock.Mock(url='/media/test.pdf')
+
+        with mock.patch.object(render_pdf_job, 'apply_async', side_effect=render_pdf_job.apply):
+            job_id = start_pdf_job('timesheets', user, ['timesheet-id'])
+
+        assert get_pdf_job_result(job_id, user) == {'status': 'success', 'pdf': '/media/test.pdf'}
+
+    @mock.patch('r3sourcer.apps.hr.tasks.generate_pdf')
+    def test_get_pdf_job_result_eager_failed(self, mock_generate, user, pdf_cache):
+        mock_generate.side_effect = ValueError('render failed')
+
+        with mock.patch.object(render_pdf_job, 'apply_async', side_effect=render_pdf_job.apply):
+            job_id = start_pdf_job('timesheets', user, ['timesheet-id'])
+
+        assert get_pdf_job_result(job_id, user) == {'status': 'error', 'error': 'render failed'}
@@ -17,9 +17,9 @@ from r3sourcer.apps.hr.utils.utils import (
     )
 from r3sourcer.apps.hr.utils.job import (
     get_partially_available_candidate_ids_for_vs,
-    get_partially_available_candidate_ids, get_partially_available_candidates,
+    get_partially_available_candidate_ids, get_partially_available_candidates, book_candidates,
 )
-from r3sourcer.apps.hr.models import TimeSheet
+from r3sourcer.apps.hr.models import TimeSheet, JobOffer, Shift
 
 fun_test_data = [
     (TimeSheet.today_5_am, timezone.make_aware(datetime(2017, 1, 1, 5, 0))),
@@ -400,3 +400,58 @@ class TestJobUtils():
 
         assert len(candidates) > 0
         assert len(partial) == 1
+
+    @freezegun.freeze_time(datetime(2017,1,1,0,0,0))
+    def test_get_partially_available_candidate_ids_queries_count(self, client, user, job_with_four_shifts,
+                                                                 shift_first, shift_second, shift_third,
+                                                                 shift_fourth, skill_rel, skill_rel_second,
+                                                                 candidate_rel, candidate_rel_second,
+                                                                 job_offer_for_candidate, django_assert_num_queries):
+        candidates = CandidateContact.objects.all()
+        shifts = [shift_first, shift_second, shift_third, shift_fourth]
+
+        with django_assert_num_queries(1):
+            partial = get_partially_available_candidate_ids(candidates, shifts)
+
+        assert len(partial) == 1
+
+    @freezegun.freeze_time(datetime(2016,12,1,0,0,0))
+    def test_book_candidates(self, job_with_four_shifts, shift_first, shift_second, candidate_contact,
+                             job_offer_for_candidate):
+        shifts = [shift_first, shift_second]
+
+        results = book_candidates(job_with_four_shifts, [str(candidate_contact.id)], shifts)
+
+        assert [result['status'] for result in results] == ['exists', 'created']
+        assert JobOffer.objects.filter(candidate_contact=candidate_contact, shift=shift_second).exists()
+        assert JobOffer.objects.get(id=results[1]['job_offer']).scheduled_sms_datetime is not None
+
+    def test_book_candidates_not_found(self, job_with_four_shifts, shift_first):
+        results = book_candidates(job_with_four_shifts, ['00000000-0000-0000-0000-000000000000'], [shift_first])
+
+        assert results[0]['status'] == 'not_found'
+        assert not JobOffer.objects.exists()
+
+    def test_book_candidates_malformed_id(self, job_with_four_shifts, shift_first):
+        results = book_candidates(job_with_four_shifts, ['invalid'], [shift_first])
+
+        assert results[0]['status'] == 'not_found'
+        assert not JobOffer.objects.exists()
+
+    @freezegun.freeze_time(datetime(2016, 12, 1, 0, 0, 0))
+    def test_book_candidates_filled(self, job_with_four_shifts, shift_first, candidate_contact_second,
+                                    job_offer_for_candidate):
+        results = book_candidates(job_with_four_shifts, [str(candidate_contact_second.id)], [shift_first])
+
+        assert results[0]['status'] == 'filled'
+        assert not JobOffer.objects.filter(candidate_contact=candidate_contact_second).exists()
+
+    @freezegun.freeze_time(datetime(2016, 12, 1, 0, 0, 0))
+    def test_book_candidates_overlap(self, job_with_four_shifts, shift_first, candidate_contact,
+                                     job_offer_for_candidate):
+        shift = Shift.objects.create(date=shift_first.date, time=time(hour=9, minute=0))
+
+        results = book_candidates(job_with_four_shifts, [str(candidate_contact.id)], [shift])
+
+        assert results[0]['status'] == 'overlap'
+        assert not JobOffer.objects.filter(shift=shift).exists()
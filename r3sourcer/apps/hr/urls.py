@@ -8,4 +8,5 @@ urlpatterns = [
     url(r'^available_recruitees_for_date/',
         views.AvailableCandidatesDateView.as_view(),
         name='available_recruitees_for_date'),
+    url(r'^pdf-jobs/(?P<job_id>[\w-]+)/$', views.PDFJobView.as_view(), name='pdf_job'),
 ]
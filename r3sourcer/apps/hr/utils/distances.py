@@ -0,0 +1,267 @@
+import logging
+import math
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from r3sourcer.apps.candidate.models import CandidateContact
+from r3sourcer.apps.core.models import Address, ContactAddress
+from r3sourcer.apps.core.utils.companies import get_site_master_company
+from r3sourcer.apps.core.utils.geo import MODE_TRANSIT, get_distance_matrix_backend, haversine_distances
+from r3sourcer.helpers.datetimes import utc_now
+
+log = logging.getLogger(__name__)
+
+UPSERT_BATCH_SIZE = 500
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter allowing at most `rate` calls per second
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self._next_call_at = 0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            call_at = max(now, self._next_call_at)
+            self._next_call_at = call_at + self.interval
+
+        if call_at > now:
+            time.sleep(call_at - now)
+
+
+class DistanceMatrixPipeline:
+    """
+    Calculates distances for many (contact, jobsite) pairs.
+
+    Pairs are grouped by travel mode and jobsite address, identical contact
+    addresses are requested once, matrix requests are sent concurrently
+    within the rate limit and results are saved with one upsert per batch.
+    Pairs farther than `max_radius` meters in a straight line are not
+    requested, road distance can't be shorter. Callers pass the radius the
+    user filters by, `DISTANCE_MATRIX_MAX_RADIUS` (no limit by default) is
+    used otherwise.
+    """
+
+    def __init__(self, backend=None, concurrency=None, rate_limit=None, max_radius=None):
+        self.backend = backend or get_distance_matrix_backend()
+        self.concurrency = concurrency or settings.DISTANCE_MATRIX_CONCURRENCY
+        self.rate_limiter = RateLimiter(rate_limit or settings.DISTANCE_MATRIX_RATE_LIMIT)
+        self.max_radius = max_radius or settings.DISTANCE_MATRIX_MAX_RADIUS
+
+    def get_modes(self, contacts):
+        master_company = get_site_master_company()
+        transportation = {}
+        candidates = CandidateContact.objects.filter(
+            contact__in=contacts, candidate_rels__master_company=master_company
+        ).values_list('contact_id', 'transportation_to_work')
+        for contact_id, transportation_to_work in candidates:
+            transportation.setdefault(contact_id, transportation_to_work)
+
+        return {
+            contact.id: MODE_TRANSIT
+            if transportation.get(contact.id) == CandidateContact.TRANSPORTATION_CHOICES.public else None
+            for contact in contacts
+        }
+
+    def get_addresses(self, contacts):
+        addresses = {}
+        contact_addresses = ContactAddress.objects.filter(
+            contact__in=contacts, is_active=True
+        ).select_related('address__city', 'address__state', 'address__country')
+        for contact_address in contact_addresses:
+            addresses.setdefault(contact_address.contact_id, contact_address.address)
+
+        return addresses
+
+    def get_far_pairs(self, pairs, addresses):
+        """
+        Gets (contact id, jobsite id) pairs farther than max radius in a straight line
+        """
+        if not self.max_radius:
+            return set()
+
+        jobsite_contacts = defaultdict(dict)
+        for contact, jobsite in pairs:
+            if contact.id in addresses:
+                jobsite_contacts[jobsite][contact.id] = addresses[contact.id]
+
+        far_pairs = set()
+        for jobsite, contact_addresses in jobsite_contacts.items():
+            distances = get_straight_line_distances(jobsite, contact_addresses)
+            far_pairs.update(
+                (contact_id, jobsite.id) for contact_id, distance in distances.items()
+                if distance is not None and distance > self.max_radius
+            )
+
+        return far_pairs
+
+    def get_requests(self, pairs):
+        """
+        Groups pairs to the distance matrix requests
+        :return: dict of (mode, origin) => OrderedDict of destination => set of (contact id, jobsite id)
+        """
+        contacts = list({contact.id: contact for contact, _ in pairs}.values())
+        modes = self.get_modes(contacts)
+        addresses = self.get_addresses(contacts)
+        far_pairs = self.get_far_pairs(pairs, addresses)
+
+        requests = defaultdict(OrderedDict)
+        jobsite_addresses = {}
+        full_addresses = {}
+        for contact, jobsite in pairs:
+            if jobsite.id not in jobsite_addresses:
+                jobsite_address = jobsite.get_address()
+                jobsite_addresses[jobsite.id] = jobsite_address.get_full_address() if jobsite_address else None
+
+            address = addresses.get(contact.id)
+            if jobsite_addresses[jobsite.id] is None or address is None or (contact.id, jobsite.id) in far_pairs:
+                continue
+
+            if address.id not in full_addresses:
+                full_addresses[address.id] = address.get_full_address()
+            origin, destination = jobsite_addresses[jobsite.id], full_addresses[address.id]
+
+            requests[(modes[contact.id], origin)].setdefault(destination, set()).add((contact.id, jobsite.id))
+
+        return requests
+
+    def _get_distances(self, origin, destinations, mode):
+        self.rate_limiter.wait()
+        try:
+            return self.backend.get_distances(origin, destinations, mode=mode)
+        except Exception:
+            log.exception('Distance matrix request failed')
+            return []
+
+    def calculate(self, pairs):
+        """
+        Calculates and saves distances between contacts and jobsites
+        :param pairs: list of (contact, jobsite)
+        :return: limit of queries is not reached
+        """
+        chunks = []
+        for (mode, origin), destinations in self.get_requests(pairs).items():
+            destinations = list(destinations.items())
+            for start in range(0, len(destinations), self.backend.max_dimensions):
+                chunks.append((mode, origin, destinations[start:start + self.backend.max_dimensions]))
+
+        if not chunks:
+            return True
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            results = list(executor.map(
+                lambda chunk: self._get_distances(chunk[1], [destination for destination, _ in chunk[2]], chunk[0]),
+                chunks
+            ))
+
+        rows = {}
+        succeeded = True
+        for (_, _, destinations), result in zip(chunks, results):
+            if not result:
+                succeeded = False
+                continue
+
+            for (_, contact_jobsites), distance in zip(destinations, result):
+                if not distance or not distance['distance']:
+                    continue
+
+                for contact_jobsite in contact_jobsites:
+                    rows[contact_jobsite] = (distance['distance'], distance['duration'])
+
+        bulk_upsert_distance_caches(rows)
+
+        return succeeded
+
+
+def get_straight_line_distances(jobsite, addresses):
+    """
+    Calculates straight line distances between jobsite and addresses
+    :param jobsite: jobsite object
+    :param addresses: dict of key => Address
+    :return: dict of key => distance in meters, None if jobsite or address is not geocoded
+    """
+    jobsite_address = jobsite.get_address()
+    keys = list(addresses.keys())
+    if jobsite_address is None or (jobsite_address.latitude == 0 and jobsite_address.longitude == 0):
+        return {key: None for key in keys}
+
+    distances = haversine_distances(
+        jobsite_address.latitude, jobsite_address.longitude,
+        [addresses[key].latitude for key in keys], [addresses[key].longitude for key in keys]
+    )
+
+    return {key: None if math.isnan(distance) else float(distance) for key, distance in zip(keys, distances)}
+
+
+def get_candidate_distances(candidate_contacts, jobsite):
+    """
+    Gets straight line distances between the jobsite and the candidates
+
+    :param candidate_contacts: queryset of CandidateContacts
+    :param jobsite: jobsite object
+    :return: dict of candidate contact id => distance in meters, None if not geocoded
+    """
+    addresses = {}
+    contact_addresses = ContactAddress.objects.filter(
+        contact__candidate_contacts__in=candidate_contacts, is_active=True
+    ).values_list('contact__candidate_contacts', 'address__latitude', 'address__longitude')
+    for candidate_id, latitude, longitude in contact_addresses:
+        addresses.setdefault(candidate_id, Address(latitude=latitude, longitude=longitude))
+
+    return get_straight_line_distances(jobsite, addresses)
+
+
+def get_candidates_outside_radius(distances, radius):
+    """
+    Gets ids of the candidates farther from the jobsite than radius in a straight line.
+    Not geocoded candidates are not considered outside.
+
+    :param distances: dict of candidate contact id => distance from `get_candidate_distances`
+    :param radius: radius in meters
+    :return: list of candidate contact ids
+    """
+    return [
+        candidate_id for candidate_id, distance in distances.items() if distance is not None and distance > radius
+    ]
+
+
+def bulk_upsert_distance_caches(rows):
+    """
+    Inserts or updates ContactJobsiteDistanceCache rows with INSERT ... ON CONFLICT
+    :param rows: dict of (contact id, jobsite id) => (distance, time)
+    """
+    from r3sourcer.apps.hr.models import ContactJobsiteDistanceCache
+
+    if not rows:
+        return
+
+    rows = list(rows.items())
+    now = utc_now()
+    sql = (
+        'INSERT INTO {table} (id, contact_id, jobsite_id, distance, time, created_at, updated_at) VALUES {values} '
+        'ON CONFLICT (contact_id, jobsite_id) DO UPDATE '
+        'SET distance = EXCLUDED.distance, time = EXCLUDED.time, updated_at = EXCLUDED.updated_at'
+    )
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            batch = rows[start:start + UPSERT_BATCH_SIZE]
+            params = []
+            for (contact_id, jobsite_id), (distance, duration) in batch:
+                params.extend([uuid.uuid4(), contact_id, jobsite_id, distance, duration, now, now])
+
+            cursor.execute(sql.format(
+                table=ContactJobsiteDistanceCache._meta.db_table,
+                values=', '.join(['(%s, %s, %s, %s, %s, %s, %s)'] * len(batch))
+            ), params)
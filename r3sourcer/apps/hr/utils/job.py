@@ -1,9 +1,13 @@
 from datetime import timedelta, datetime
 from collections import defaultdict
+import functools
+import uuid
 
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
 from django.db.models import Q, Count
+from django.utils import timezone
 
 HAS_JOBOFFER, HAS_TIMESHEET, UNAVAILABLE = range(3)
 
@@ -23,7 +27,7 @@ def get_available_candidate_list(job):
         state__number=70,
         state__workflow__model=content_type,
         active=True,
-    ).distinct('object_id').values_list('object_id', flat=True)
+    ).values_list('object_id', flat=True)
 
     candidate_contacts = candidate_models.CandidateContact.objects.filter(
         contact__is_available=True,
@@ -36,69 +40,99 @@ def get_available_candidate_list(job):
     candidate_contacts = candidate_contacts.annotate(skilLrates_count=Count("candidate_skills__skill_rates")) \
         .filter(candidate_skills__skill__name=job.position.name, skilLrates_count__gt=0)
 
-    if candidate_contacts.exists():
-        blacklists_candidates = hr_models.BlackList.objects.filter(
-            Q(jobsite=job.jobsite) | Q(company_contact=job.jobsite.primary_contact),
-            candidate_contact__in=candidate_contacts
-        ).values_list('candidate_contact', flat=True)
+    blacklists_candidates = hr_models.BlackList.objects.filter(
+        Q(jobsite=job.jobsite) | Q(company_contact=job.jobsite.primary_contact),
+        candidate_contact__in=candidate_contacts
+    ).values_list('candidate_contact', flat=True)
 
-        candidate_contacts = candidate_contacts.exclude(id__in=blacklists_candidates)
+    candidate_contacts = candidate_contacts.exclude(id__in=blacklists_candidates)
 
-        if job.transportation_to_work:
-            candidate_contacts = candidate_contacts.filter(transportation_to_work=job.transportation_to_work)
+    if job.transportation_to_work:
+        candidate_contacts = candidate_contacts.filter(transportation_to_work=job.transportation_to_work)
 
     return candidate_contacts
 
 
-def get_partially_available_candidate_ids_for_vs(candidate_contacts, shift_date, shift_time):
+def get_shift_window(shift_date, shift_time):
     """
-    Get unavailable/partially available candidates for ShiftDate
+    Gets the time window around the shift start in which candidate can't be booked for another shift
+    :return: tuple of shift start, window start and window end datetimes
+    """
+    shift_start_time = datetime.combine(shift_date, shift_time)
+    delta = timedelta(hours=settings.VACANCY_FILLING_TIME_DELTA)
+
+    return shift_start_time, shift_start_time - delta, shift_start_time + delta
+
+
+def get_unavailable_reasons(candidate_contacts, shift_windows):
+    """
+    Gets unavailability reasons of the candidates for every shift window.
+
+    Busy intervals of the candidates (job offers, time sheets and
+    unavailabilities) are read from the CandidateBusyInterval index with one
+    query for the whole range of the windows and matched to the windows in
+    python, so the number of queries doesn't depend on the number of shifts.
+
     :param candidate_contacts: queryset of CandidateContacts to search for
-    :param shift_start_time: shift_start_time value of ShiftDate
-    :return: set of ids of unavailable or partially available recruits
+    :param shift_windows: dict of key => (shift start, window start, window end)
+    :return: dict of key => {candidate_id: set of reasons}
     """
-    from r3sourcer.apps.hr.models import JobOffer
+    from r3sourcer.apps.hr.models import CandidateBusyInterval
 
-    shift_start_time = datetime.combine(shift_date, shift_time)
+    reasons = {key: defaultdict(set) for key in shift_windows}
+    if not shift_windows:
+        return reasons
 
-    from_date = shift_start_time - timedelta(hours=settings.VACANCY_FILLING_TIME_DELTA)
-    to_date = shift_start_time + timedelta(hours=settings.VACANCY_FILLING_TIME_DELTA)
-    candidate_ids = defaultdict(set)
-
-    candidate_ids = update_unavailable_reason(candidate_ids, candidate_contacts.filter(
-        Q(job_offers__shift__date__shift_date=from_date.date(),
-          job_offers__shift__time__gte=from_date.timetz()) |
-        Q(job_offers__shift__date__shift_date__gt=from_date.date()),
-        Q(job_offers__shift__date__shift_date=to_date.date(),
-          job_offers__shift__time__lte=to_date.timetz()) |
-        Q(job_offers__shift__date__shift_date__lt=to_date.date()),
-        Q(job_offers__status=JobOffer.STATUS_CHOICES.accepted) |
-        Q(job_offers__status=JobOffer.STATUS_CHOICES.undefined)
-    ).values_list('id', flat=True), HAS_JOBOFFER)
-
-    candidate_ids = update_unavailable_reason(
-        candidate_ids, candidate_contacts.filter(
-            job_offers__time_sheets__shift_started_at__range=[from_date, to_date]
-        ).values_list('id', flat=True), HAS_TIMESHEET
-    )
+    # naive windows are compared in the default timezone as the intervals are stored
+    default_timezone = timezone.get_default_timezone()
+    range_from = min(window_from for _, window_from, _ in shift_windows.values())
+    range_to = max(window_to for _, _, window_to in shift_windows.values())
 
-    candidate_ids = update_unavailable_reason(
-        candidate_ids, candidate_contacts.filter(
-            contact__contact_unavailabilities__unavailable_from__lte=shift_start_time,
-            contact__contact_unavailabilities__unavailable_until__gte=shift_start_time,
-        ).values_list('id', flat=True), UNAVAILABLE
-    )
+    intervals = CandidateBusyInterval.objects.filter(
+        candidate_contact__in=candidate_contacts,
+        busy_from__lte=timezone.make_aware(range_to, default_timezone, is_dst=False),
+        busy_until__gte=timezone.make_aware(range_from, default_timezone, is_dst=False),
+    ).values_list('candidate_contact_id', 'reason', 'busy_from', 'busy_until')
+
+    for candidate_id, reason, busy_from, busy_until in intervals:
+        busy_from = timezone.make_naive(busy_from, default_timezone)
+        busy_until = timezone.make_naive(busy_until, default_timezone)
+
+        for key, (shift_start, window_from, window_to) in shift_windows.items():
+            if reason == UNAVAILABLE:
+                # unavailable days are matched by the shift start
+                is_matched = busy_from <= shift_start <= busy_until
+            else:
+                is_matched = busy_from <= window_to and busy_until >= window_from
 
-    return candidate_ids
+            if is_matched:
+                reasons[key][candidate_id].add(reason)
+
+    return reasons
+
+
+def get_partially_available_candidate_ids_for_vs(candidate_contacts, shift_date, shift_time):
+    """
+    Get unavailable/partially available candidates for ShiftDate
+    :param candidate_contacts: queryset of CandidateContacts to search for
+    :param shift_start_time: shift_start_time value of ShiftDate
+    :return: set of ids of unavailable or partially available recruits
+    """
+    return get_unavailable_reasons(candidate_contacts, {
+        None: get_shift_window(shift_date, shift_time)
+    })[None]
 
 
 def get_partially_available_candidate_ids(candidate_contacts, job_shifts):
     partial = {}
 
-    for job_shift in job_shifts:
-        vs_id, shift_time, shift_date = job_shift.id, job_shift.time, job_shift.date.shift_date
-        partially_available = get_partially_available_candidate_ids_for_vs(candidate_contacts, shift_date, shift_time)
-        for candidate_id, reasons in partially_available.items():
+    shift_windows = {
+        job_shift.id: get_shift_window(job_shift.date.shift_date, job_shift.time) for job_shift in job_shifts
+    }
+    unavailable_reasons = get_unavailable_reasons(candidate_contacts, shift_windows)
+
+    for vs_id in shift_windows:
+        for candidate_id, reasons in unavailable_reasons[vs_id].items():
             if candidate_id not in partial:
                 partial[candidate_id] = {
                     'reasons': reasons,
@@ -109,13 +143,6 @@ def get_partially_available_candidate_ids(candidate_contacts, job_shifts):
     return partial
 
 
-def update_unavailable_reason(candidate_ids, updates, reason):
-    for candidate_id in updates:
-        candidate_ids[candidate_id].add(reason)
-
-    return candidate_ids
-
-
 def get_partially_available_candidates(candidate_contacts, shifts):
     partially_available_candidates = {}
     if shifts:
@@ -130,3 +157,160 @@ def get_partially_available_candidates(candidate_contacts, shifts):
             partially_available_candidates.pop(key)
 
     return partially_available_candidates
+
+
+def book_candidates(job, candidate_ids, shifts):
+    """
+    Creates job offers for every candidate and shift of the job fillin matrix.
+
+    Existing job offers of the candidates for the job are fetched once and all
+    checks which JobOffer.save does one by one (duplicates, SMS eta, carrier
+    list, confirmation task) are done in memory. Job offers are inserted with
+    one bulk insert, which writes one batched log, and confirmation SMS tasks
+    are scheduled after commit.
+
+    Result statuses: `created`, `not_found` for unknown or malformed ids,
+    `exists` if the candidate already has the shift offered, `filled` if
+    the shift has enough accepted job offers, `unavailable` if the candidate
+    is unavailable on the shift date and `overlap` if the candidate has
+    another job offer or time sheet close to the shift start.
+
+    :param job: job object
+    :param candidate_ids: list of candidate contact ids
+    :param shifts: list of shifts ordered by date and time, with selected dates
+    :return: list of per candidate/shift results
+    """
+    from r3sourcer.apps.candidate.models import CandidateContact
+    from r3sourcer.apps.hr.models import CandidateBusyInterval, CarrierList, JobOffer
+    from r3sourcer.helpers.datetimes import tz2utc
+
+    candidate_uuids = []
+    for candidate_id in candidate_ids:
+        try:
+            candidate_uuids.append(uuid.UUID(str(candidate_id)))
+        except ValueError:
+            candidate_uuids.append(None)
+
+    candidate_contacts = CandidateContact.objects.filter(
+        id__in=[candidate_uuid for candidate_uuid in candidate_uuids if candidate_uuid is not None]
+    )
+    candidates = {candidate.id: candidate for candidate in candidate_contacts.select_related('contact')}
+
+    shift_windows = {shift.id: get_shift_window(shift.date.shift_date, shift.time) for shift in shifts}
+    unavailable_reasons = get_unavailable_reasons(candidate_contacts, shift_windows) if candidates else {}
+
+    accepted_counts = dict(JobOffer.objects.filter(
+        shift__in=shifts, status=JobOffer.STATUS_CHOICES.accepted
+    ).order_by().values('shift_id').annotate(accepted_count=Count('id')).values_list('shift_id', 'accepted_count'))
+
+    # (candidate id, shift id, shift start, status) of the job offers in the job
+    known_offers = defaultdict(list)
+    existing_offers = job.get_job_offers().filter(candidate_contact_id__in=list(candidates)).values_list(
+        'candidate_contact_id', 'shift_id', 'shift__date__shift_date', 'shift__time', 'status'
+    )
+    for candidate_id, shift_id, shift_date, shift_time, status in existing_offers:
+        known_offers[str(candidate_id)].append((shift_id, shift_date, shift_time, status))
+
+    tz = job.tz
+    now_tz = datetime.now(tz)
+    now_local = now_tz.replace(tzinfo=None)
+
+    results = []
+    job_offers = []
+    confirmation_tasks = {}
+    for candidate_id, candidate_uuid in zip(candidate_ids, candidate_uuids):
+        candidate = candidates.get(candidate_uuid)
+
+        for shift in shifts:
+            result = {'candidate_contact': candidate_id, 'shift': str(shift.id), 'job_offer': None}
+            results.append(result)
+
+            if candidate is None:
+                result['status'] = 'not_found'
+                continue
+
+            offers = known_offers[str(candidate.id)]
+            if any(shift_id == shift.id and status != JobOffer.STATUS_CHOICES.cancelled
+                   for shift_id, _, _, status in offers):
+                result['status'] = 'exists'
+                continue
+
+            if accepted_counts.get(shift.id, 0) >= shift.workers:
+                result['status'] = 'filled'
+                continue
+
+            reasons = unavailable_reasons[shift.id][candidate.id]
+            if reasons:
+                result['status'] = 'unavailable' if UNAVAILABLE in reasons else 'overlap'
+                continue
+
+            job_offer = JobOffer(shift=shift, candidate_contact=candidate)
+            job_offer.tz = tz
+            shift_date, shift_time = shift.date.shift_date, shift.time
+            offers.append((shift.id, shift_date, shift_time, job_offer.status))
+
+            # the new job offer overlaps with the next selected shifts as well
+            shift_start = datetime.combine(shift_date, shift_time)
+            for shift_id, (_, window_from, window_to) in shift_windows.items():
+                if shift_id != shift.id and window_from <= shift_start <= window_to:
+                    unavailable_reasons[shift_id][candidate.id].add(HAS_JOBOFFER)
+
+            # the same lookups as JobOffer.has_future_accepted_jo, has_previous_jo, is_first and is_recurring
+            eta = job_offer.get_sms_eta(
+                has_future_accepted_jo=any(
+                    status == JobOffer.STATUS_CHOICES.accepted and offer_time > shift_time and offer_date >= shift_date
+                    for _, offer_date, offer_time, status in offers
+                ),
+                has_previous_jo=any(
+                    now_local <= datetime.combine(offer_date, offer_time) <= shift_start
+                    for _, offer_date, offer_time, _ in offers
+                ),
+                now_tz=now_tz,
+            )
+            if eta:
+                job_offer.scheduled_sms_datetime = tz2utc(eta)
+                confirmation_tasks[job_offer.id] = job_offer.get_confirmation_task(
+                    is_first=not any(offer_date < shift_date for _, offer_date, _, _ in offers),
+                    is_recurring=any(
+                        status == JobOffer.STATUS_CHOICES.accepted and offer_date < shift_date
+                        for _, offer_date, _, status in offers
+                    ),
+                )
+
+            job_offers.append(job_offer)
+            result.update(status='created', job_offer=str(job_offer.id))
+
+    if not job_offers:
+        return results
+
+    default_timezone = timezone.get_default_timezone()
+    carrier_lists = set(CarrierList.objects.filter(
+        candidate_contact_id__in={job_offer.candidate_contact_id for job_offer in job_offers},
+        target_date__in={job_offer.start_time_utc for job_offer in job_offers},
+    ).values_list('candidate_contact_id', 'target_date'))
+
+    with transaction.atomic():
+        JobOffer.objects.bulk_create(job_offers)
+        CandidateBusyInterval.sync_job_offers(JobOffer.objects.filter(id__in=[jo.id for jo in job_offers]))
+
+        for job_offer in job_offers:
+            target_date = timezone.make_naive(job_offer.start_time_utc, default_timezone).date()
+            if (job_offer.candidate_contact_id, target_date) in carrier_lists:
+                job_offer.move_candidate_to_carrier_list(new_offer=True)
+
+    master_companies = {}
+    for job_offer in job_offers:
+        if job_offer.id not in confirmation_tasks:
+            continue
+
+        contact = job_offer.candidate_contact.contact
+        if contact.id not in master_companies:
+            master_companies[contact.id] = contact.get_closest_company()
+
+        transaction.on_commit(functools.partial(
+            confirmation_tasks[job_offer.id].apply_async,
+            args=[job_offer.id, master_companies[contact.id].id],
+            eta=job_offer.scheduled_sms_datetime,
+        ))
+
+    return results
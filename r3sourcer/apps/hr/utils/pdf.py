@@ -0,0 +1,100 @@
+import hashlib
+import uuid
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from filer.models import File
+
+PDF_FILE_CACHE_KEY = 'pdf_file:{}'
+PDF_JOB_CACHE_KEY = 'pdf_job:{}'
+
+
+def get_file_from_str(html):
+    """
+    Renders html to the PDF file object
+    """
+    import weasyprint
+
+    pdf = weasyprint.HTML(string=html)
+    pdf_file = BytesIO()
+    pdf_file.write(pdf.write_pdf())
+    pdf_file.seek(0)
+
+    return pdf_file
+
+
+def get_pdf_hash(html, folder, file_name):
+    """
+    Content address of the PDF: hash of the rendered template (template and
+    context) and of the file location
+    """
+    content = '\n'.join([str(folder.id), file_name, html])
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def get_or_render_pdf_file(html, folder, file_name):
+    """
+    Gets PDF file rendered from the same html earlier or renders a new one
+    :param html: rendered html template
+    :param folder: filer Folder to save the PDF
+    :param file_name: name of the PDF file
+    :return: filer File
+    """
+    cache_key = PDF_FILE_CACHE_KEY.format(get_pdf_hash(html, folder, file_name))
+    file_id = cache.get(cache_key)
+    if file_id is not None:
+        file_obj = File.objects.filter(id=file_id, folder=folder).first()
+        if file_obj is not None and file_obj.file:
+            return file_obj
+
+    pdf_file = get_file_from_str(html)
+    file_obj, created = File.objects.get_or_create(
+        folder=folder,
+        name=file_name,
+        file=ContentFile(pdf_file.read(), name=file_name)
+    )
+    cache.set(cache_key, file_obj.id, settings.PDF_CACHE_TIMEOUT)
+
+    return file_obj
+
+
+def start_pdf_job(job_type, user, object_ids):
+    """
+    Enqueues PDF rendering to the pdf queue
+    :param job_type: one of render_pdf_job types
+    :param user: user requested the PDF, only this user can get the result
+    :param object_ids: list of object ids to render
+    :return: job id
+    """
+    from r3sourcer.apps.hr.tasks import render_pdf_job
+
+    # the job entry is saved before the task is sent, the task may finish first
+    job_id = str(uuid.uuid4())
+    cache.set(PDF_JOB_CACHE_KEY.format(job_id), {'user_id': str(user.id)}, settings.PDF_JOB_TIMEOUT)
+    render_pdf_job.apply_async(args=[job_type, str(user.id), [str(pk) for pk in object_ids]], task_id=job_id)
+
+    return job_id
+
+
+def set_pdf_job_result(job_id, user_id, result):
+    """
+    Saves result of the PDF job to its cache entry
+    """
+    cache.set(
+        PDF_JOB_CACHE_KEY.format(job_id), {'user_id': str(user_id), 'result': result}, settings.PDF_JOB_TIMEOUT
+    )
+
+
+def get_pdf_job_result(job_id, user):
+    """
+    Gets state of the PDF job
+    :return: dict with status (pending, success or error) and pdf url or error,
+        None if there is no such job for the user
+    """
+    job = cache.get(PDF_JOB_CACHE_KEY.format(job_id))
+    if not job or job.get('user_id') != str(user.id):
+        return None
+
+    return job.get('result') or {'status': 'pending'}
@@ -1,5 +1,4 @@
 import logging
-from collections import defaultdict
 from datetime import timedelta
 from functools import reduce
 from itertools import chain
@@ -11,12 +10,9 @@ from django.template.defaulttags import register
 from django.templatetags.static import static
 from django.utils import formats
 
-from r3sourcer.apps.candidate.models import CandidateContact
 from r3sourcer.apps.core.models import InvoiceRule, Invoice, CompanyContact
-from r3sourcer.apps.core.utils.geo import calc_distance, MODE_TRANSIT, MAX_DIMENSIONS
 from r3sourcer.celeryapp import app
 from r3sourcer.helpers.datetimes import utc_now, date2utc_date
-from r3sourcer.apps.core.utils.companies import get_site_master_company
 
 log = logging.getLogger(__name__)
 
@@ -70,49 +66,17 @@ def create_or_update_distance_cache(contact, jobsite, distance):
         )
 
 
-def calculate_distances_for_jobsite(contacts, jobsite):
+def calculate_distances_for_jobsite(contacts, jobsite, max_radius=None):
     """
     Calculates and save distances between jobsite and contacts
     :param contacts: contacts list
     :param jobsite: jobsite object
+    :param max_radius: contacts farther in a straight line are skipped, meters
     :return: limit of queries is not reached
     """
-    contacts_dict = defaultdict(list)
-    for contact in contacts:
-        candidate = contact.candidate_contacts.filter(candidate_rels__master_company=get_site_master_company()).first()
-        is_public = candidate.transportation_to_work == CandidateContact.TRANSPORTATION_CHOICES.public
-        if hasattr(contact, 'candidate_contacts') and is_public:
-            contacts_dict[MODE_TRANSIT].append(contact)
-        else:
-            contacts_dict[None].append(contact)
-
-    for mode, contact_list in contacts_dict.items():
-        addresses = []
-        for contact in contact_list:
-            active_address = contact.active_address
-            if active_address:
-                addresses.append(active_address.get_full_address())
-
-        jobsite_address = jobsite.get_address()
-        if jobsite_address is None:
-            continue
-
-        s = 0
-        while s < len(addresses):
-            segments = addresses[s:s + MAX_DIMENSIONS]
-            s = s + MAX_DIMENSIONS
-
-            result = calc_distance(jobsite_address.get_full_address(), segments, mode=mode)
-            if not result:
-                return bool(result)
-
-            if len(contact_list) == 1:
-                result = [result]
-
-            for distance, contact in zip(result[0], contact_list):
-                create_or_update_distance_cache(contact, jobsite, distance)
+    from r3sourcer.apps.hr.utils.distances import DistanceMatrixPipeline
 
-    return True
+    return DistanceMatrixPipeline(max_radius=max_radius).calculate([(contact, jobsite) for contact in contacts])
 
 
 def send_jo_rejection(job_offer):  # pragme: no cover
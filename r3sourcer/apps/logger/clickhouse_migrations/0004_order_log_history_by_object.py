@@ -0,0 +1,79 @@
+import logging
+
+from infi.clickhouse_orm import migrations
+from r3sourcer.apps.logger import models
+
+
+log = logging.getLogger(__name__)
+
+NEW_TABLE = 'loghistory_0004'
+OLD_TABLE = 'loghistory_0003'
+
+
+def count_rows(database, table, where='1'):
+    return int(database.raw("SELECT count() FROM $db.`{}` WHERE {}".format(table, where)).strip())
+
+
+def missing_rows_query(table, since):
+    """
+    Selects rows of the old table written since `since` which are not in `table`,
+    rows are matched on (model, object_id, field, updated_at)
+    """
+    keys = 'model, object_id, field, updated_at'
+    return (
+        "FROM $db.`{old}` WHERE updated_at >= {since} AND ({keys}) NOT IN "
+        "(SELECT {keys} FROM $db.`{table}` WHERE updated_at >= {since})"
+    ).format(old=OLD_TABLE, table=table, keys=keys, since=since)
+
+
+def reorder_log_history(database):
+    """
+    Rebuilds LogHistory ordered by (model, object_id, field, updated_at).
+
+    The new table is filled from the live one under a temporary name and
+    swapped in with one RENAME, the live table is never missing. Rows written
+    to the old table during the backfill are copied to the new one after the
+    swap. The old table is dropped only if all its rows are in the new one,
+    otherwise it is kept as `loghistory_0003` for manual reconciliation.
+    Applied by the locked `migrate_logger` command only.
+    """
+    table = models.LogHistory.table_name()
+    engine = models.LogHistory.engine
+
+    database.raw("DROP TABLE IF EXISTS $db.`{}`".format(NEW_TABLE))
+    create_sql = "CREATE TABLE $db.`{new}` AS $db.`{table}` ENGINE = MergeTree({date}, ({keys}), {granularity})"
+    database.raw(create_sql.format(
+        new=NEW_TABLE, table=table, date=engine.date_col, keys=', '.join(engine.key_cols),
+        granularity=engine.index_granularity
+    ))
+
+    # rows written after the backfill starts have updated_at >= the latest one seen before it
+    backfill_start = int(database.raw("SELECT max(updated_at) FROM $db.`{}`".format(table)).strip() or 0)
+
+    fields_list = ', '.join('`{}`'.format(name) for name, _ in models.LogHistory._fields)
+    database.raw("INSERT INTO $db.`{new}` ({fields}) SELECT {fields} FROM $db.`{table}`".format(
+        new=NEW_TABLE, fields=fields_list, table=table
+    ))
+
+    database.raw("RENAME TABLE $db.`{table}` TO $db.`{old}`, $db.`{new}` TO $db.`{table}`".format(
+        table=table, old=OLD_TABLE, new=NEW_TABLE
+    ))
+
+    database.raw("INSERT INTO $db.`{table}` ({fields}) SELECT {fields} {missing}".format(
+        table=table, fields=fields_list, missing=missing_rows_query(table, backfill_start)
+    ))
+
+    before_backfill = 'updated_at < {}'.format(backfill_start)
+    missing = int(database.raw("SELECT count() {}".format(missing_rows_query(table, backfill_start))).strip())
+    if missing == 0 and count_rows(database, OLD_TABLE, before_backfill) == count_rows(
+        database, table, before_backfill
+    ):
+        database.raw("DROP TABLE $db.`{}`".format(OLD_TABLE))
+    else:
+        log.warning('%s is kept, not all of its rows were copied to %s (%s written during the backfill)',
+                    OLD_TABLE, table, missing)
+
+
+operations = [
+    migrations.RunPython(reorder_log_history)
+]
@@ -4,7 +4,14 @@ LOGGER_PASSWORD = ''
 LOGGER_HOST = 'localhost'
 LOGGER_PORT = 8123
 
+LOGGER_BUFFER_ENABLED = True
+LOGGER_BUFFER_SIZE = 500
+LOGGER_BUFFER_MAX_SIZE = 10000
+LOGGER_FLUSH_INTERVAL = 2
+LOGGER_SPOOL_DIR = None
+
 
 __all__ = [
-    'LOGGER_DB', 'LOGGER_USER', 'LOGGER_PASSWORD', 'LOGGER_HOST', 'LOGGER_PORT'
+    'LOGGER_DB', 'LOGGER_USER', 'LOGGER_PASSWORD', 'LOGGER_HOST', 'LOGGER_PORT', 'LOGGER_BUFFER_ENABLED',
+    'LOGGER_BUFFER_SIZE', 'LOGGER_BUFFER_MAX_SIZE', 'LOGGER_FLUSH_INTERVAL', 'LOGGER_SPOOL_DIR',
 ]
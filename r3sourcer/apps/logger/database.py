@@ -0,0 +1,167 @@
+import logging
+import os
+import pkgutil
+import threading
+from importlib import import_module
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from infi.clickhouse_orm.database import Database, DatabaseException
+from infi.clickhouse_orm.migrations import MigrationHistory
+from six import string_types
+
+
+log = logging.getLogger(__name__)
+
+MIGRATIONS_PACKAGE = 'r3sourcer.apps.logger.clickhouse_migrations'
+MIGRATIONS_CACHE_KEY = 'logger_clickhouse_migrations_version'
+MIGRATIONS_LOCK_KEY = 'logger_clickhouse_migrations_lock'
+MIGRATIONS_LOCK_TIMEOUT = 60 * 60
+
+
+class LoggerDatabase(Database):
+    """
+    ClickHouse database sending all requests through one pooled HTTP session
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.request_session = requests.Session()
+        super().__init__(*args, **kwargs)
+
+    def _send(self, data, settings=None, stream=False):
+        if isinstance(data, string_types):
+            data = data.encode('utf-8')
+        params = self._build_params(settings)
+        r = self.request_session.post(self.db_url, params=params, data=data, stream=stream)
+        if r.status_code != 200:
+            raise DatabaseException(r.text)
+        return r
+
+
+def get_migrations_version():
+    """
+    Name of the latest ClickHouse migration module
+    """
+    package = import_module(MIGRATIONS_PACKAGE)
+    modules = [name for _, name, is_package in pkgutil.iter_modules(package.__path__) if not is_package]
+    return max(modules) if modules else None
+
+
+def get_applied_migrations_version(database):
+    """
+    Name of the latest ClickHouse migration applied to the database, None if nothing is applied
+    """
+    query = "SELECT module_name FROM $table WHERE package_name = '{}'".format(MIGRATIONS_PACKAGE)
+    try:
+        modules = [migration.module_name for migration in database.select(query, MigrationHistory)]
+    except DatabaseException:
+        return None
+
+    return max(modules) if modules else None
+
+
+def check_logger_database(database):
+    """
+    Checks that the local migrations are applied to the logger database, never migrates.
+
+    Applied version is cached by `migrate_logger_database` so processes
+    usually compare the cached version with the local migration modules
+    instead of querying ClickHouse.
+    """
+    version = get_migrations_version()
+    applied_version = cache.get(MIGRATIONS_CACHE_KEY)
+    if applied_version is None or applied_version < version:
+        applied_version = get_applied_migrations_version(database)
+
+    if applied_version is None or applied_version < version:
+        log.error('Logger database is migrated up to %s, %s is expected, run migrate_logger command',
+                  applied_version, version)
+        return False
+
+    cache.set(MIGRATIONS_CACHE_KEY, applied_version, None)
+    return True
+
+
+def migrate_logger_database(database, force=False):
+    """
+    Applies ClickHouse migrations once per migrations version.
+
+    Used by `migrate_logger` command only, the lock keeps concurrent
+    deployments from running the same migrations twice.
+    """
+    version = get_migrations_version()
+    if not force and cache.get(MIGRATIONS_CACHE_KEY) == version:
+        return False
+
+    with cache.lock(MIGRATIONS_LOCK_KEY, timeout=MIGRATIONS_LOCK_TIMEOUT):
+        if not force and cache.get(MIGRATIONS_CACHE_KEY) == version:
+            return False
+
+        database.migrate(MIGRATIONS_PACKAGE)
+        cache.set(MIGRATIONS_CACHE_KEY, version, None)
+
+    return True
+
+
+class LoggerDatabasePool:
+    """
+    Lazy process-wide holder of the logger ClickHouse connection.
+
+    The connection is created on first use, not at import time, and is
+    re-created after fork. Migrations are only checked here, they are
+    applied by `migrate_logger` command.
+    """
+
+    def __init__(self):
+        self._database = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def get_database(self):
+        if self._database is not None and self._pid == os.getpid():
+            return self._database
+
+        with self._lock:
+            if self._database is None or self._pid != os.getpid():
+                database = LoggerDatabase(
+                    settings.LOGGER_DB,
+                    db_url="http://{}:{}/".format(settings.LOGGER_HOST, settings.LOGGER_PORT),
+                    username=settings.LOGGER_USER,
+                    password=settings.LOGGER_PASSWORD
+                )
+                check_logger_database(database)
+
+                self._database = database
+                self._pid = os.getpid()
+
+        return self._database
+
+    def reset(self):
+        """
+        Drops the process connection and the cached migrations version,
+        next use connects and checks migrations again
+        """
+        with self._lock:
+            self._database = None
+            self._pid = None
+            cache.delete(MIGRATIONS_CACHE_KEY)
+
+
+database_pool = LoggerDatabasePool()
+
+
+class LazyLoggerDatabase:
+    """
+    Proxy to the pooled logger database, connects on first attribute access
+    """
+
+    def __getattr__(self, name):
+        return getattr(database_pool.get_database(), name)
+
+
+logger_database = LazyLoggerDatabase()
+
+
+def get_logger_database():
+    return logger_database
@@ -1,5 +1,7 @@
 from functools import wraps
 
+from .mixins import get_instance_snapshot, get_logger_old_instance
+
 
 def save_decorator(method, endless_logger):
     """
@@ -10,16 +12,18 @@ def save_decorator(method, endless_logger):
     def wrapper(self, *args, **kwargs):
         just_added = self._state.adding
         old_instance = None
+        if not just_added and self.id:
+            old_instance = get_logger_old_instance(self)
+
         result = method(self, *args, **kwargs)
         if self.id:
-            if not just_added:
-                old_instance = self.__class__.objects.get(id=self.id)
-
-            if just_added:
+            if just_added or old_instance is None:
                 endless_logger.log_instance_change(self, transaction_type='create')
             else:
                 endless_logger.log_instance_change(self, old_instance=old_instance, transaction_type='update')
 
+            self._logger_snapshot = get_instance_snapshot(self)
+
         return result
     return wrapper
 
@@ -31,7 +35,7 @@ def delete_decorator(method, endless_logger):
     """
     @wraps(method)
     def wrapper(self, *args, **kwargs):
-        old_instance = self.__class__.objects.get(id=self.id)
+        old_instance = get_logger_old_instance(self) or self
         result = method(self, *args, **kwargs)
         endless_logger.log_instance_change(self, old_instance=old_instance, transaction_type='delete')
         return result
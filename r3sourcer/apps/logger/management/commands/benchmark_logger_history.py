@@ -0,0 +1,113 @@
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from infi.clickhouse_orm import engines
+
+from r3sourcer.apps.logger.database import LoggerDatabase
+from r3sourcer.apps.logger.models import LogHistory
+
+
+class LegacyLogHistory(LogHistory):
+    """
+    LogHistory with the table layout used before 0004 migration
+    """
+
+    engine = engines.MergeTree('date', ('updated_by', 'object_id'))
+
+    @classmethod
+    def table_name(cls):
+        return 'loghistory_legacy'
+
+
+class Command(BaseCommand):
+    """
+    Compares object history lookup latency of the legacy and current LogHistory layouts.
+
+    Tables are filled with generated rows in a separate `<LOGGER_DB>_benchmark` database,
+    which is dropped afterwards unless `--keep` is passed.
+    """
+
+    fields = ('status', 'name', 'updated_at', 'candidate_contact', 'shift')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000000, help='Number of generated log rows')
+        parser.add_argument('--objects', type=int, default=100000, help='Number of distinct objects')
+        parser.add_argument('--models', type=int, default=20, help='Number of distinct models')
+        parser.add_argument('--lookups', type=int, default=200, help='Number of history lookups per layout')
+        parser.add_argument('--keep', action='store_true', default=False, help='Keep the benchmark database')
+
+    def handle(self, *args, **options):
+        database = LoggerDatabase(
+            '{}_benchmark'.format(settings.LOGGER_DB),
+            db_url="http://{}:{}/".format(settings.LOGGER_HOST, settings.LOGGER_PORT),
+            username=settings.LOGGER_USER,
+            password=settings.LOGGER_PASSWORD
+        )
+
+        try:
+            lookups = self.get_lookups(options)
+            for model_class in (LegacyLogHistory, LogHistory):
+                self.fill_table(database, model_class, options)
+                self.report(model_class, self.run_lookups(database, model_class, lookups))
+        finally:
+            if not options['keep']:
+                database.drop_database()
+
+    def fill_table(self, database, model_class, options):
+        database.drop_table(model_class)
+        database.create_table(model_class)
+
+        started_at = time.monotonic()
+        # rows are generated by ClickHouse, so filling doesn't depend on the client speed
+        database.raw(
+            "INSERT INTO $db.`{table}` "
+            "SELECT concat('benchmark.Model', toString(number % {models})) AS model, "
+            "arrayElement([{fields}], number % {fields_count} + 1) AS field, "
+            "toString(intHash32(number) % {objects}) AS object_id, "
+            "toString(number - 1) AS old_value, toString(number) AS new_value, "
+            "toString(number % 50) AS updated_by, 1500000000000 + number * 1000 AS updated_at, "
+            "'update' AS transaction_type, toDate(1500000000 + intDiv(number, 10)) AS date "
+            "FROM system.numbers LIMIT {rows}".format(
+                table=model_class.table_name(),
+                models=options['models'],
+                fields=', '.join("'{}'".format(field) for field in self.fields),
+                fields_count=len(self.fields),
+                objects=options['objects'],
+                rows=options['rows'],
+            )
+        )
+        database.raw("OPTIMIZE TABLE $db.`{}` FINAL".format(model_class.table_name()))
+        self.stdout.write('{}: {} rows generated in {:.1f}s'.format(
+            model_class.table_name(), options['rows'], time.monotonic() - started_at
+        ))
+
+    def get_lookups(self, options):
+        return [
+            (
+                'benchmark.Model{}'.format(random.randrange(options['models'])),
+                str(random.randrange(options['objects'])),
+                random.choice(self.fields),
+            ) for _ in range(options['lookups'])
+        ]
+
+    def run_lookups(self, database, model_class, lookups):
+        latencies = []
+        for model, object_id, field in lookups:
+            started_at = time.monotonic()
+            list(model_class.objects_in(database).filter(
+                model=model, object_id=object_id, field__in=[field]
+            ).order_by('-updated_at'))
+            latencies.append((time.monotonic() - started_at) * 1000)
+        return latencies
+
+    def report(self, model_class, latencies):
+        latencies = sorted(latencies)
+        self.stdout.write('{}: median {:.1f}ms, p95 {:.1f}ms, max {:.1f}ms'.format(
+            model_class.table_name(),
+            statistics.median(latencies),
+            latencies[int(len(latencies) * 0.95) - 1],
+            latencies[-1],
+        ))
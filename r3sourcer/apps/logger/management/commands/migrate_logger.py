@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from r3sourcer.apps.logger.database import (
+    LoggerDatabase, MIGRATIONS_PACKAGE, get_migrations_version, migrate_logger_database,
+)
+
+
+class Command(BaseCommand):
+    """
+    Applies ClickHouse migrations of the logger database
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true', default=False,
+            help='Check applied migrations in ClickHouse even if cached version is up to date',
+        )
+
+    def handle(self, *args, **options):
+        database = LoggerDatabase(
+            settings.LOGGER_DB,
+            db_url="http://{}:{}/".format(settings.LOGGER_HOST, settings.LOGGER_PORT),
+            username=settings.LOGGER_USER,
+            password=settings.LOGGER_PASSWORD
+        )
+
+        if migrate_logger_database(database, force=options['force']):
+            self.stdout.write('Applied {} up to {}'.format(MIGRATIONS_PACKAGE, get_migrations_version()))
+        else:
+            self.stdout.write('Logger database is up to date')
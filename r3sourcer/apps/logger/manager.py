@@ -1,13 +1,15 @@
+import uuid
 from datetime import date, datetime
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.utils.formats import date_format
-from infi.clickhouse_orm.database import Database
 from infi.clickhouse_orm.fields import DateTimeField
 
+from .database import get_logger_database
 from .models import LogHistory
-from .utils import get_current_user, get_field_value, format_range
+from .utils import get_current_user, get_field_value, bind_params
+from .writer import get_log_writer
 from ...helpers.datetimes import utc_now
 
 
@@ -23,13 +25,24 @@ class EndlessLogger(object):
         :param old_instance: old instance if exists
         :param transaction_type: type of the transaction operation
         """
-        if transaction_type == 'create' and isinstance(instance, get_user_model())\
-                and instance.email == settings.SYSTEM_USER:
+        if transaction_type == 'create' and self.is_system_user(instance):
             return
         general_logger_fields = self.get_general_fields(instance, transaction_type, user)
         method_name = "log_{}_instance".format(transaction_type)
         getattr(self, method_name)(instance, general_logger_fields, old_instance)
 
+    def log_instances_create(self, instances, user=None):
+        """
+        Logs creation of the many instances
+        :param instances: created instances
+        """
+        for instance in instances:
+            self.log_instance_change(instance, user=user, transaction_type='create')
+
+    @staticmethod
+    def is_system_user(instance):
+        return isinstance(instance, get_user_model()) and instance.email == settings.SYSTEM_USER
+
     def log_create_instance(self, instance, general_logger_fields, old_instance=None):
         raise NotImplementedError
 
@@ -49,6 +62,14 @@ class EndlessLogger(object):
          """
         raise NotImplementedError
 
+    def log_update_fields(self, field_changes):
+        """
+        Logs changes of the many fields
+        :param field_changes: list of (field_name, general_logger_fields, new_value, old_value)
+        """
+        for field_name, general_logger_fields, new_value, old_value in field_changes:
+            self.log_update_field(field_name, general_logger_fields, new_value=new_value, old_value=old_value)
+
     def get_general_fields(self, instance, transaction_type, user=None):
         """
         Generates dictionary with general fields for instance logging
@@ -155,14 +176,58 @@ class EndlessLogger(object):
         history = self.get_history_for_fields(model, object_id, [field]).get(field, [])
         return history[0] if len(history) > 0 else {}
 
+    def get_recent_field_changes(self, model, object_ids, field, transaction_type=None):
+        """
+        Gets the most recent changes of the field for many objects
+        :param model: model of the objects
+        :param object_ids: ids of the objects for retrieving
+        :param field: name of the field
+        :param transaction_type: type of the transaction operation
+        :return: :dict: {
+            "object_id": {
+                "updated_by": "user_id",
+                "user": user instance or None,
+                "updated_at": timestamp,
+                "transaction_type": "update",
+                "old_value": "some value",
+                "new_value": "some value",
+            },
+            ...
+        }
+        :rtype: dict
+        """
+        changes = {}
+        for object_id in object_ids:
+            change = self.get_recent_field_change(model, object_id, field)
+            if change:
+                changes[str(object_id)] = change
+
+        self.resolve_updated_by(changes.values())
+        return changes
+
+    @staticmethod
+    def resolve_updated_by(changes):
+        """
+        Sets users who made the changes with one query
+        :param changes: list of the changes with "updated_by" user ids
+        """
+        user_ids = set()
+        for change in changes:
+            try:
+                user_ids.add(str(uuid.UUID(change['updated_by'])))
+            except (TypeError, ValueError):
+                continue
+
+        users = {str(user.id): user for user in get_user_model().objects.filter(id__in=user_ids)} if user_ids else {}
+
+        for change in changes:
+            change['user'] = users.get(change['updated_by'])
+
 
 class ClickHouseLogger(EndlessLogger):
     def __init__(self):
-        self.logger_database = Database(settings.LOGGER_DB,
-                                        db_url="http://{}:{}/".format(settings.LOGGER_HOST, settings.LOGGER_PORT),
-                                        username=settings.LOGGER_USER,
-                                        password=settings.LOGGER_PASSWORD)
-        self.logger_database.migrate('r3sourcer.apps.logger.clickhouse_migrations')
+        self.logger_database = get_logger_database()
+        self.writer = get_log_writer(self.logger_database)
 
     @staticmethod
     def date_to_db_representation(date_value):
@@ -179,15 +244,29 @@ class ClickHouseLogger(EndlessLogger):
         :param general_logger_fields: dictionary of the fields for logging
         :param old_instance: old instance of object
         """
+        self.writer.insert(self.get_create_logs(instance, general_logger_fields))
+
+    def log_instances_create(self, instances, user=None):
+        """
+        Logs creation of the many instances with one insert
+        :param instances: created instances
+        """
         log_array = []
-        for field in instance._meta.local_fields:
-            log = LogHistory(
+        for instance in instances:
+            if self.is_system_user(instance):
+                continue
+            general_logger_fields = self.get_general_fields(instance, 'create', user)
+            log_array.extend(self.get_create_logs(instance, general_logger_fields))
+        self.writer.insert(log_array)
+
+    def get_create_logs(self, instance, general_logger_fields):
+        return [
+            LogHistory(
                 field=field.name,
                 new_value=str(get_field_value(instance, field)),
                 **general_logger_fields
-            )
-            log_array.append(log)
-        self.logger_database.insert(log_array)
+            ) for field in instance._meta.local_fields
+        ]
 
     def log_update_instance(self, instance, general_logger_fields, old_instance):
         """
@@ -197,8 +276,13 @@ class ClickHouseLogger(EndlessLogger):
         :param old_instance: old instance of object
         """
         log_array = []
+        # deferred values are not loaded, comparing them would fetch them from db
+        deferred_fields = instance.get_deferred_fields() | old_instance.get_deferred_fields()
         for field in instance._meta.local_fields:
-            if getattr(instance, field.name) != getattr(old_instance, field.name):
+            if field.attname in deferred_fields:
+                continue
+
+            if getattr(instance, field.attname) != getattr(old_instance, field.attname):
                 log = LogHistory(
                     field=field.name,
                     new_value=str(get_field_value(instance, field)),
@@ -206,7 +290,7 @@ class ClickHouseLogger(EndlessLogger):
                     **general_logger_fields
                 )
                 log_array.append(log)
-        self.logger_database.insert(log_array)
+        self.writer.insert(log_array)
 
     def log_delete_instance(self, instance, general_logger_fields, old_instance):
         """
@@ -224,7 +308,7 @@ class ClickHouseLogger(EndlessLogger):
                 **general_logger_fields
             )
             log_array.append(log)
-        self.logger_database.insert(log_array)
+        self.writer.insert(log_array)
 
     def log_update_field(self, field_name, general_logger_fields, new_value='', old_value=''):
         """
@@ -234,13 +318,22 @@ class ClickHouseLogger(EndlessLogger):
         :param new_value: new value of the field
         :param old_value: old value of the field
         """
-        log = LogHistory(
-            field=field_name,
-            new_value=str(new_value),
-            old_value=str(old_value),
-            **general_logger_fields
-        )
-        self.logger_database.insert([log])
+        self.log_update_fields([(field_name, general_logger_fields, new_value, old_value)])
+
+    def log_update_fields(self, field_changes):
+        """
+        Logs changes of the many fields to the ClickHouse db with one insert
+        :param field_changes: list of (field_name, general_logger_fields, new_value, old_value)
+        """
+        log_array = [
+            LogHistory(
+                field=field_name,
+                new_value=str(new_value),
+                old_value=str(old_value),
+                **general_logger_fields
+            ) for field_name, general_logger_fields, new_value, old_value in field_changes
+        ]
+        self.writer.insert(log_array)
 
     def get_object_history(self, model, object_id=None, by_user=None, from_date=None, to_date=None, desc=True,
                            offset=0, limit=None):
@@ -248,24 +341,12 @@ class ClickHouseLogger(EndlessLogger):
         Gets history of the model or object from ClickHouse db and returns it in structured view
         """
         query = "SELECT object_id, updated_at, updated_by, field, new_value, old_value, transaction_type " \
-                "FROM $table " \
-                "WHERE model='{}.{}' "\
-            .format(model.__module__, model.__name__)
-        if object_id:
-            query = "{} and object_id='{}'".format(query, object_id)
-
-        if by_user:
-            query = "{} and updated_by='{}'".format(query, by_user.id)
-
-        if from_date:
-            query = "{} and updated_at>={}".format(query, self.date_to_db_representation(from_date))
-
-        if to_date:
-            query = "{} and updated_at<={}".format(query, self.date_to_db_representation(to_date))
-
-        query = "{} ORDER BY updated_at {} ".format(query, "desc" if desc else '')
+                "FROM $table WHERE {} ORDER BY updated_at {}".format(
+                    self._get_history_conditions(model, object_id, by_user, from_date, to_date),
+                    "DESC" if desc else "ASC"
+                )
         if limit:
-            query = "{} LIMIT {}, {}".format(query, offset, limit)
+            query = bind_params("{} LIMIT {{offset}}, {{limit}}".format(query), offset=int(offset), limit=int(limit))
         return self._convert_query_result_to_dictionary(self.logger_database.select(query, LogHistory),
                                                         include_object_id=not object_id)
 
@@ -325,9 +406,10 @@ class ClickHouseLogger(EndlessLogger):
         return result_array
 
     def get_object_changes(self, model, object_id, timestamp):
-        query = "SELECT * FROM $table " \
-                "WHERE model='{}.{}' and object_id='{}' and updated_at={}" \
-            .format(model.__module__, model.__name__, object_id, timestamp)
+        query = bind_params(
+            "SELECT * FROM $table WHERE model={model} AND object_id={object_id} AND updated_at={timestamp}",
+            model=self.get_model_name(model), object_id=str(object_id), timestamp=int(timestamp)
+        )
         object_state = {}
         data = list(self.logger_database.select(query, LogHistory))
         if data and len(data) > 0:
@@ -342,19 +424,37 @@ class ClickHouseLogger(EndlessLogger):
         return object_state
 
     def get_result_length(self, model, object_id=None, by_user=None, from_date=None, to_date=None):
-        conditions = "model='{}.{}' ".format(model.__module__, model.__name__)
+        conditions = self._get_history_conditions(model, object_id, by_user, from_date, to_date)
+        return self.logger_database.count(LogHistory, conditions)
+
+    @staticmethod
+    def get_model_name(model):
+        return '{}.{}'.format(model.__module__, model.__name__)
+
+    def _get_history_conditions(self, model, object_id=None, by_user=None, from_date=None, to_date=None):
+        """
+        Builds WHERE conditions of the history lookups, conditions follow the table ordering key
+        """
+        conditions = ["model={model}"]
+        params = {'model': self.get_model_name(model)}
+
         if object_id:
-            conditions = "{} and object_id='{}'".format(conditions, object_id)
+            conditions.append("object_id={object_id}")
+            params['object_id'] = str(object_id)
 
         if by_user:
-            conditions = "{} and updated_by='{}'".format(conditions, by_user.id)
+            conditions.append("updated_by={updated_by}")
+            params['updated_by'] = str(by_user.id)
 
         if from_date:
-            conditions = "{} and updated_at>={}".format(conditions, self.date_to_db_representation(from_date))
+            conditions.append("updated_at>={from_date}")
+            params['from_date'] = self.date_to_db_representation(from_date)
 
         if to_date:
-            conditions = "{} and updated_at<={}".format(conditions, self.date_to_db_representation(to_date))
-        return self.logger_database.count(LogHistory, conditions)
+            conditions.append("updated_at<={to_date}")
+            params['to_date'] = self.date_to_db_representation(to_date)
+
+        return bind_params(" AND ".join(conditions), **params)
 
     def get_log_queryset(self):
         return LogHistory.objects_in(self.logger_database)
@@ -362,21 +462,22 @@ class ClickHouseLogger(EndlessLogger):
     def get_history_object_ids(self, model, field, new_value, ids=None,
                                old_value=None, transaction_types=None):
         filter_kwargs = {
+            'model': self.get_model_name(model),
             'field': field,
             'new_value': new_value,
         }
 
         if ids:
-            filter_kwargs['object_id__in'] = format_range(ids)
+            filter_kwargs['object_id__in'] = [str(object_id) for object_id in ids]
 
         if old_value is not None:
-            filter_kwargs['old_value='] = old_value
+            filter_kwargs['old_value'] = old_value
 
         if transaction_types:
             if isinstance(transaction_types, (tuple, list)):
-                transaction_types = format_range(transaction_types)
-
-            filter_kwargs['transaction_type'] = transaction_types
+                filter_kwargs['transaction_type__in'] = transaction_types
+            else:
+                filter_kwargs['transaction_type'] = transaction_types
 
         # TODO: fix aggregation (attribute error: infi.clickhouse_orm.query.QuerySet)
         res = self.get_log_queryset().filter(**filter_kwargs).only(
@@ -388,10 +489,8 @@ class ClickHouseLogger(EndlessLogger):
         if not isinstance(fields, (list, tuple)):
             fields = [fields]
 
-        model = '%s.%s' % (model.__module__, model.__name__)
-
         query_set = self.get_log_queryset().filter(
-            model=model, object_id=str(object_id), field__in=fields
+            model=self.get_model_name(model), object_id=str(object_id), field__in=fields
         )
 
         if transaction_type is not None:
@@ -433,3 +532,26 @@ class ClickHouseLogger(EndlessLogger):
         )
 
         return self._map_field_history(log_qs[0]) if log_qs.count() > 0 else {}
+
+    def get_recent_field_changes(self, model, object_ids, field, transaction_type=None):
+        object_ids = [str(object_id) for object_id in object_ids]
+        if not object_ids:
+            return {}
+
+        conditions = ["model={model}", "field={field}", "object_id IN {object_ids}"]
+        params = {'model': self.get_model_name(model), 'field': field, 'object_ids': object_ids}
+        if transaction_type is not None:
+            conditions.append("transaction_type={transaction_type}")
+            params['transaction_type'] = getattr(transaction_type, 'name', transaction_type)
+
+        query = "SELECT * FROM $table WHERE {} ORDER BY object_id, updated_at DESC LIMIT 1 BY object_id".format(
+            bind_params(" AND ".join(conditions), **params)
+        )
+
+        changes = {
+            log_object.object_id: self._map_field_history(log_object)
+            for log_object in self.logger_database.select(query, LogHistory)
+        }
+
+        self.resolve_updated_by(changes.values())
+        return changes
@@ -0,0 +1,58 @@
+import copy
+
+from django.db import models
+from django.db.models.base import DEFERRED
+
+
+def get_instance_snapshot(instance):
+    """
+    Gets loaded values of the concrete fields by attname, deferred fields are skipped
+    """
+    deferred_fields = instance.get_deferred_fields()
+    snapshot = {}
+    for field in instance._meta.concrete_fields:
+        if field.attname not in deferred_fields:
+            value = getattr(instance, field.attname)
+            # mutable values could be changed in place after loading
+            snapshot[field.attname] = copy.copy(value) if isinstance(value, (dict, list)) else value
+    return snapshot
+
+
+def get_logger_old_instance(instance):
+    """
+    Gets state of the instance as it was loaded from db.
+    Models without change tracking are fetched from db.
+    """
+    snapshot = getattr(instance, '_logger_snapshot', None)
+
+    if snapshot is None:
+        return instance.__class__.objects.filter(pk=instance.pk).first()
+
+    values = [snapshot.get(field.attname, DEFERRED) for field in instance._meta.concrete_fields]
+    old_instance = instance.__class__(*values)
+    old_instance._state.adding = False
+    old_instance._state.db = instance._state.db
+    return old_instance
+
+
+class LoggerChangeTrackingMixin(models.Model):
+    """
+    Keeps snapshot of the field values loaded from db, so logger can compute
+    changes of the instance without fetching it again
+    """
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._logger_snapshot = get_instance_snapshot(instance)
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        self._logger_snapshot = get_instance_snapshot(self)
+
+    def reset_logger_snapshot(self):
+        self._logger_snapshot = get_instance_snapshot(self)
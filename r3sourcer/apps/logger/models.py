@@ -17,7 +17,8 @@ class LogHistory(Model):
     transaction_type = fields.Enum8Field(TRANSACTION_TYPES, default=TRANSACTION_TYPES.update)
     date = fields.DateField()
 
-    engine = engines.MergeTree('date', ('updated_by', 'object_id'))
+    # history is looked up by model, object and field
+    engine = engines.MergeTree('date', ('model', 'object_id', 'field', 'updated_at'))
 
 
 class LocationHistory(Model):
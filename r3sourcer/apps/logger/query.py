@@ -21,24 +21,22 @@ def get_logger_queryset(self):
 class LoggerQuerySet(models.QuerySet):
     def bulk_create(self, objs, batch_size=None):
         """
-        Bulk create with logging of the objects' fields which were created
-        """
-        real_objects = None
-        model = None
-        old_ids = []
-        if objs and len(objs) > 0:
-            model = objs[0].__class__
-            old_ids = list(model.objects.all().values_list('id', flat=True))
+        Bulk create with logging of the objects' fields which were created.
 
+        Primary keys are assigned client-side (UUID) or returned by the
+        database, so the created objects are logged as they are returned.
+        """
         objs = super().bulk_create(objs, batch_size)
 
-        if objs and len(objs) > 0:
-            real_objects = model.objects.exclude(id__in=old_ids)
-
-        if real_objects:
+        created_objs = [obj for obj in objs if obj.pk is not None]
+        if created_objs:
             from .main import endless_logger
-            for obj in real_objects:
-                endless_logger.log_instance_change(obj, transaction_type='create')
+            endless_logger.log_instances_create(created_objs)
+
+            for obj in created_objs:
+                if hasattr(obj, 'reset_logger_snapshot'):
+                    obj.reset_logger_snapshot()
+
         return objs
 
     def update(self, **kwargs):
@@ -51,12 +49,13 @@ class LoggerQuerySet(models.QuerySet):
 
         from .main import endless_logger
         rows = super().update(**kwargs)
+        field_changes = []
         for elem in old_values:
             general_logger_fields = endless_logger.get_general_fields(elem, 'update')
             for field_name, field_value in kwargs.items():
-                endless_logger.log_update_field(field_name, general_logger_fields,
-                                                new_value=field_value,
-                                                old_value=get_field_value_by_field_name(elem, field_name))
+                field_changes.append((field_name, general_logger_fields, field_value,
+                                      get_field_value_by_field_name(elem, field_name)))
+        endless_logger.log_update_fields(field_changes)
         return rows
 
     def delete(self):
@@ -69,9 +68,8 @@ class LoggerQuerySet(models.QuerySet):
 
         from .main import endless_logger
         deleted, _rows_count = super().delete()
-        for elem in old_values:
-            general_logger_fields = endless_logger.get_general_fields(elem, 'delete')
-            endless_logger.log_update_field('id', general_logger_fields,
-                                            old_value=elem.id)
+        endless_logger.log_update_fields([
+            ('id', endless_logger.get_general_fields(elem, 'delete'), '', elem.id) for elem in old_values
+        ])
 
         return deleted, _rows_count
@@ -1,18 +1,14 @@
-from django.conf import settings
-from infi.clickhouse_orm.database import Database
-
+from .database import get_logger_database
 from .models import LocationHistory
+from .writer import get_log_writer
 from ...helpers.datetimes import utc_now
 
 
 class LocationLogger():
 
     def __init__(self):
-        self.logger_database = Database(
-            settings.LOGGER_DB, db_url="http://{}:{}/".format(settings.LOGGER_HOST, settings.LOGGER_PORT),
-            username=settings.LOGGER_USER, password=settings.LOGGER_PASSWORD
-        )
-        self.logger_database.migrate('r3sourcer.apps.logger.clickhouse_migrations')
+        self.logger_database = get_logger_database()
+        self.writer = get_log_writer(self.logger_database)
 
     def _map_location_log(self, log_instance):
         return {
@@ -42,7 +38,7 @@ class LocationLogger():
             log_at=log_at,
             date=utc_now().date()
         )
-        self.logger_database.insert([log])
+        self.writer.insert([log])
 
     def fetch_location_history(self, instance, **kwargs):
         page_num = kwargs.pop('page_num', 1)
@@ -0,0 +1,16 @@
+from celery import shared_task
+from celery.utils.log import get_task_logger
+
+
+logger = get_task_logger(__name__)
+
+
+@shared_task()
+def flush_logger_spool():
+    from r3sourcer.apps.logger.main import endless_logger
+
+    writer = endless_logger.writer
+    writer.flush()
+    replayed = writer.replay_spool()
+
+    logger.info('Logger writer: %s spooled rows replayed, stats %s', replayed, writer.stats.as_dict())
@@ -0,0 +1,85 @@
+import mock
+
+from django.core.cache import cache
+
+from r3sourcer.apps.logger.database import (
+    MIGRATIONS_CACHE_KEY, LazyLoggerDatabase, LoggerDatabasePool, check_logger_database, get_migrations_version,
+    migrate_logger_database,
+)
+
+
+class TestMigrateLoggerDatabase:
+
+    def setup_method(self):
+        cache.delete(MIGRATIONS_CACHE_KEY)
+
+    def test_get_migrations_version(self):
+        assert get_migrations_version() == '0004_order_log_history_by_object'
+
+    def test_migrate_once(self):
+        database = mock.MagicMock()
+
+        assert migrate_logger_database(database)
+        assert not migrate_logger_database(database)
+        assert database.migrate.call_count == 1
+
+    def test_migrate_force(self):
+        database = mock.MagicMock()
+
+        migrate_logger_database(database)
+        migrate_logger_database(database, force=True)
+
+        assert database.migrate.call_count == 2
+
+
+class TestCheckLoggerDatabase:
+
+    def setup_method(self):
+        cache.delete(MIGRATIONS_CACHE_KEY)
+
+    def test_check_cached(self):
+        database = mock.MagicMock()
+        cache.set(MIGRATIONS_CACHE_KEY, get_migrations_version())
+
+        assert check_logger_database(database)
+        assert database.select.call_count == 0
+        assert database.migrate.call_count == 0
+
+    def test_check_applied(self):
+        database = mock.MagicMock()
+        database.select.return_value = [mock.Mock(module_name=get_migrations_version())]
+
+        assert check_logger_database(database)
+        assert cache.get(MIGRATIONS_CACHE_KEY) == get_migrations_version()
+
+    def test_check_stale(self):
+        database = mock.MagicMock()
+        database.select.return_value = [mock.Mock(module_name='0001_initial')]
+
+        assert not check_logger_database(database)
+        assert database.migrate.call_count == 0
+
+
+class TestLoggerDatabasePool:
+
+    @mock.patch('r3sourcer.apps.logger.database.check_logger_database')
+    @mock.patch('r3sourcer.apps.logger.database.LoggerDatabase')
+    def test_get_database_lazy(self, mock_database, mock_check):
+        pool = LoggerDatabasePool()
+
+        assert mock_database.call_count == 0
+
+        assert pool.get_database() is pool.get_database()
+        assert mock_database.call_count == 1
+        assert mock_check.call_count == 1
+        assert mock_database.return_value.migrate.call_count == 0
+
+    @mock.patch('r3sourcer.apps.logger.database.database_pool')
+    def test_lazy_database_proxy(self, mock_pool):
+        database = LazyLoggerDatabase()
+
+        assert mock_pool.get_database.call_count == 0
+
+        database.insert([])
+
+        mock_pool.get_database.return_value.insert.assert_called_once_with([])
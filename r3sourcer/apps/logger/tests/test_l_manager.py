@@ -6,6 +6,7 @@ import pytz
 
 from django.utils import timezone
 from django.conf import settings as dj_settings
+from r3sourcer.apps.logger.database import database_pool
 from r3sourcer.apps.logger.manager import get_endless_logger, EndlessLogger, ClickHouseLogger
 from r3sourcer.apps.logger.models import LogHistory
 
@@ -59,6 +60,7 @@ class TestClickhouseLogger:
     @classmethod
     def teardown_class(cls):
         cls.logger.logger_database.drop_database()
+        database_pool.reset()
 
     def test_get_general_fields(self, test_instance):
         fields = self.logger.get_general_fields(test_instance, 'create')
@@ -220,3 +222,20 @@ class TestClickhouseLogger:
         assert len(result["fields"]) == 2
         for field in result["fields"]:
             assert field["new_value"] == str(getattr(new_instance, field["field"]))
+
+    def test_get_recent_field_changes(self, test_model, user, django_assert_num_queries):
+        first = test_model.objects.create(name='first', id=11)
+        second = test_model.objects.create(name='second', id=12)
+        for instance in (first, second):
+            general_logger_fields = self.logger.get_general_fields(instance, 'update', user=str(user.id))
+            self.logger.log_update_field('name', general_logger_fields, new_value='old', old_value='')
+            general_logger_fields['updated_at'] += 1
+            self.logger.log_update_field('name', general_logger_fields, new_value=instance.name, old_value='old')
+
+        with django_assert_num_queries(1):
+            changes = self.logger.get_recent_field_changes(test_model, [first.id, second.id, 13], 'name')
+
+        assert set(changes.keys()) == {'11', '12'}
+        assert changes['11']['new_value'] == 'first'
+        assert changes['12']['new_value'] == 'second'
+        assert changes['11']['user'] == user
@@ -0,0 +1,43 @@
+import mock
+
+from r3sourcer.apps.logger.decorators import save_decorator
+from r3sourcer.apps.logger.mixins import get_instance_snapshot, get_logger_old_instance
+
+
+class TestLoggerChangeTracking:
+
+    def test_get_instance_snapshot(self, test_instance):
+        assert get_instance_snapshot(test_instance) == {'id': test_instance.id, 'name': 'test name'}
+
+    def test_get_logger_old_instance_from_snapshot(self, test_instance, django_assert_num_queries):
+        test_instance._logger_snapshot = get_instance_snapshot(test_instance)
+        test_instance.name = 'new name'
+
+        with django_assert_num_queries(0):
+            old_instance = get_logger_old_instance(test_instance)
+
+        assert old_instance.id == test_instance.id
+        assert old_instance.name == 'test name'
+        assert not old_instance._state.adding
+
+    def test_get_logger_old_instance_without_snapshot(self, test_instance, django_assert_num_queries):
+        test_instance.name = 'new name'
+
+        with django_assert_num_queries(1):
+            old_instance = get_logger_old_instance(test_instance)
+
+        assert old_instance.name == 'test name'
+
+    def test_save_decorator_uses_snapshot(self, test_instance, django_assert_num_queries):
+        endless_logger = mock.MagicMock()
+        save = save_decorator(test_instance.__class__.save, endless_logger)
+        test_instance._logger_snapshot = get_instance_snapshot(test_instance)
+        test_instance.name = 'new name'
+
+        # only UPDATE, the old state is not selected again
+        with django_assert_num_queries(1):
+            save(test_instance)
+
+        old_instance = endless_logger.log_instance_change.call_args[1]['old_instance']
+        assert old_instance.name == 'test name'
+        assert test_instance._logger_snapshot['name'] == 'new name'
@@ -1,3 +1,6 @@
+import mock
+
+from r3sourcer.apps.logger.database import database_pool
 from r3sourcer.apps.logger.manager import ClickHouseLogger
 from r3sourcer.apps.logger.models import LogHistory, TRANSACTION_TYPES
 from r3sourcer.apps.logger.query import get_logger_queryset
@@ -17,6 +20,7 @@ class TestLoggerQuerySet:
     @classmethod
     def teardown_class(cls):
         cls.logger.logger_database.drop_database()
+        database_pool.reset()
 
     def test_bulk_create(self, db):
         objects = self.test_model.objects.bulk_create([NameModel(name='n1'), NameModel(name='n2')])
@@ -31,6 +35,14 @@ class TestLoggerQuerySet:
             assert item.old_value == ''
             assert item.transaction_type == TRANSACTION_TYPES.create
 
+    def test_bulk_create_single_query_and_insert(self, db, django_assert_num_queries):
+        with mock.patch.object(self.logger.writer, 'insert') as mock_insert:
+            with django_assert_num_queries(1):
+                objects = self.test_model.objects.bulk_create([NameModel(name='n5'), NameModel(name='n6')])
+
+        assert mock_insert.call_count == 1
+        assert {row.object_id for row in mock_insert.call_args[0][0]} == {str(obj.id) for obj in objects}
+
     def test_update(self, db):
         self.test_model.objects.create(name='n3')
         rows = self.test_model.objects.filter(name='n3').update(name='n4')
@@ -1,5 +1,9 @@
+import uuid
+
+from r3sourcer.apps.core.models import Address, Country
+from r3sourcer.apps.logger.database import database_pool
 from r3sourcer.apps.logger.manager import ClickHouseLogger
-from r3sourcer.apps.logger.utils import get_field_value, get_field_value_by_field_name
+from r3sourcer.apps.logger.utils import get_field_value, get_field_value_by_field_name, bind_params
 
 
 class TestUtils:
@@ -12,6 +16,7 @@ class TestUtils:
     @classmethod
     def teardown_class(cls):
         cls.logger.logger_database.drop_database()
+        database_pool.reset()
 
     def test_get_field_value_general_field(self, db, test_instance, test_model_for_autodiscover):
         instance = test_model_for_autodiscover.objects.create(name="Model", rel=test_instance)
@@ -21,5 +26,17 @@ class TestUtils:
         instance = test_model_for_autodiscover.objects.create(name="Model", rel=test_instance)
         assert test_instance.id == get_field_value(instance, instance.__class__._meta.get_field("rel"))
 
+    def test_get_field_value_foreign_key_to_field(self):
+        country = Country(id=uuid.uuid4(), code2='AU')
+        address = Address(country=country)
+
+        assert get_field_value(address, Address._meta.get_field('country')) == country.pk
+
     def test_get_field_value_by_field_name(self, db, test_instance):
         assert test_instance.name == get_field_value_by_field_name(test_instance, "name")
+
+    def test_bind_params(self):
+        query = bind_params("model={model} AND object_id IN {ids} AND updated_at>={ts}",
+                            model="a'b$table", ids=['1', '2'], ts=10)
+
+        assert query == "model='a\\'b$$table' AND object_id IN ('1', '2') AND updated_at>=10"
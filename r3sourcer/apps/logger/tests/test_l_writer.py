@@ -0,0 +1,92 @@
+import os
+from datetime import date
+
+import mock
+import pytest
+
+from r3sourcer.apps.logger.models import LogHistory
+from r3sourcer.apps.logger.writer import BufferedLogWriter, get_log_writer
+
+
+def make_log(field='name'):
+    return LogHistory(
+        model='model', field=field, object_id='1', new_value='new', updated_by='1', updated_at=1, date=date.today()
+    )
+
+
+class TestBufferedLogWriter:
+
+    @pytest.fixture
+    def writer(self, settings, tmpdir):
+        settings.LOGGER_BUFFER_ENABLED = True
+        settings.LOGGER_BUFFER_SIZE = 10
+        settings.LOGGER_BUFFER_MAX_SIZE = 3
+        settings.LOGGER_FLUSH_INTERVAL = 60
+        settings.LOGGER_SPOOL_DIR = str(tmpdir)
+
+        writer = BufferedLogWriter(mock.MagicMock())
+        writer._ensure_thread = mock.MagicMock()
+        return writer
+
+    def test_insert_unbuffered(self, settings):
+        settings.LOGGER_BUFFER_ENABLED = False
+        database = mock.MagicMock()
+        writer = BufferedLogWriter(database)
+
+        writer.insert([make_log()])
+
+        assert database.insert.call_count == 1
+
+    def test_insert_buffered(self, writer):
+        writer.insert([make_log(), make_log()])
+
+        assert writer.database.insert.call_count == 0
+
+        writer.flush()
+
+        assert writer.database.insert.call_count == 1
+        assert len(writer.database.insert.call_args[0][0]) == 2
+        assert writer.stats.rows_flushed == 2
+
+    def test_insert_overflow_spooled(self, writer):
+        writer.insert([make_log('first'), make_log(), make_log(), make_log()])
+
+        assert writer.stats.rows_spooled == 1
+        assert len(os.listdir(writer.spool_dir)) == 1
+
+    def test_flush_failed_spooled(self, writer):
+        writer.database.insert.side_effect = Exception('ClickHouse is down')
+        writer.insert([make_log(), make_log()])
+
+        assert not writer.flush()
+        assert writer.stats.failed_flushes == 1
+        assert writer.stats.rows_spooled == 2
+
+    def test_replay_spool(self, writer):
+        writer.spool([make_log('first'), make_log('second')])
+
+        assert writer.replay_spool() == 2
+        assert [row.field for row in writer.database.insert.call_args[0][0]] == ['first', 'second']
+        assert os.listdir(writer.spool_dir) == []
+
+    def test_replay_spool_failed(self, writer):
+        writer.spool([make_log()])
+        writer.database.insert.side_effect = Exception('ClickHouse is down')
+
+        assert writer.replay_spool() == 0
+        assert len(os.listdir(writer.spool_dir)) == 1
+        assert os.listdir(writer.spool_dir)[0].endswith('.tsv')
+
+    def test_replay_spool_claimed(self, writer):
+        writer.spool([make_log()])
+        file_name = os.listdir(writer.spool_dir)[0]
+        os.rename(os.path.join(writer.spool_dir, file_name), os.path.join(writer.spool_dir, '.{}.1'.format(file_name)))
+
+        assert writer.replay_spool() == 0
+        assert writer.database.insert.call_count == 0
+
+    def test_get_log_writer_per_database(self):
+        database = mock.MagicMock()
+
+        assert get_log_writer(database) is get_log_writer(database)
+        assert get_log_writer(database) is not get_log_writer(mock.MagicMock())
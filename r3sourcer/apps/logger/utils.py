@@ -1,6 +1,7 @@
 from crum import get_current_request
 from django.contrib.auth import get_user_model
 from django.conf import settings
+from infi.clickhouse_orm.utils import escape
 
 
 def get_default_user():
@@ -42,7 +43,11 @@ def get_field_value(instance, field):
     :param field: field of the instance
     :return: value of the field
     """
-    if field.get_internal_type() == "ForeignKey" and getattr(instance, field.name):
+    if field.get_internal_type() == "ForeignKey" and field.target_field.primary_key:
+        # attname holds related object pk, so related object is not fetched
+        new_value = getattr(instance, field.attname)
+    elif field.get_internal_type() == "ForeignKey" and getattr(instance, field.name):
+        # to_field is not the pk, related object pk is logged
         new_value = getattr(instance, field.name).pk
     else:
         new_value = getattr(instance, field.name)
@@ -59,3 +64,21 @@ def get_field_value_by_field_name(instance, field_name):
 
 def format_range(range_values):
     return "'%s'" % "','".join(map(str, range_values))
+
+
+def escape_param(value):
+    """
+    Escapes value for the ClickHouse query, lists are converted to the tuple of values
+    """
+    if isinstance(value, (list, tuple, set)):
+        return '(%s)' % ', '.join(escape_param(item) for item in value)
+
+    # clickhouse_orm substitutes `$` placeholders in the query
+    return escape(value, quote=True).replace('$', '$$')
+
+
+def bind_params(query, **params):
+    """
+    Binds escaped parameters to the `{name}` placeholders of the query
+    """
+    return query.format(**{name: escape_param(value) for name, value in params.items()})
@@ -0,0 +1,240 @@
+import atexit
+import glob
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+
+from django.conf import settings
+
+from .models import LogHistory, LocationHistory
+
+
+log = logging.getLogger(__name__)
+
+SPOOL_MODELS = {model.table_name(): model for model in (LogHistory, LocationHistory)}
+
+
+class LogWriterStats:
+    """
+    Flush counters and latencies of the log writer
+    """
+
+    def __init__(self):
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.rows_flushed = 0
+        self.rows_spooled = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+
+    def add_flush(self, rows_count, latency):
+        self.flushes += 1
+        self.rows_flushed += rows_count
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        self.total_latency += latency
+
+    def as_dict(self):
+        return {
+            'flushes': self.flushes,
+            'failed_flushes': self.failed_flushes,
+            'rows_flushed': self.rows_flushed,
+            'rows_spooled': self.rows_spooled,
+            'last_latency': self.last_latency,
+            'max_latency': self.max_latency,
+            'avg_latency': self.total_latency / self.flushes if self.flushes else 0.0,
+        }
+
+
+class BufferedLogWriter:
+    """
+    Per-process buffer for ClickHouse log rows.
+
+    Rows are collected in a bounded ring buffer and inserted by a background
+    thread when `LOGGER_BUFFER_SIZE` rows are collected or every
+    `LOGGER_FLUSH_INTERVAL` seconds. Rows which can't be inserted, or which
+    overflow the buffer, are spooled to `LOGGER_SPOOL_DIR`. The background
+    thread replays the spool after every successful flush, so every process
+    replays the files it wrote even when the spool directory is local to its
+    container. With `LOGGER_BUFFER_ENABLED` off rows are inserted synchronously.
+    """
+
+    def __init__(self, database):
+        self.database = database
+        self.enabled = settings.LOGGER_BUFFER_ENABLED
+        self.batch_size = settings.LOGGER_BUFFER_SIZE
+        self.flush_interval = settings.LOGGER_FLUSH_INTERVAL
+        self.spool_dir = settings.LOGGER_SPOOL_DIR
+        self.stats = LogWriterStats()
+
+        self._buffer = deque(maxlen=settings.LOGGER_BUFFER_MAX_SIZE)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_event = threading.Event()
+        self._thread = None
+        self._pid = None
+
+        atexit.register(self.flush)
+
+    def insert(self, rows):
+        rows = list(rows)
+        if not rows:
+            return
+
+        if not self.enabled:
+            self.database.insert(rows)
+            return
+
+        self._ensure_thread()
+
+        with self._lock:
+            # the oldest rows are spooled instead of being silently dropped by the ring buffer
+            excess = max(len(self._buffer) + len(rows) - self._buffer.maxlen, 0)
+            from_buffer = min(excess, len(self._buffer))
+            overflow = [self._buffer.popleft() for _ in range(from_buffer)] + rows[:excess - from_buffer]
+            self._buffer.extend(rows[excess - from_buffer:])
+            buffered = len(self._buffer)
+
+        if overflow:
+            self.spool(overflow)
+
+        if buffered >= self.batch_size:
+            self._flush_event.set()
+
+    def flush(self):
+        """
+        Inserts buffered rows, returns False if some rows were spooled instead
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows = list(self._buffer)
+                self._buffer.clear()
+
+            if not rows:
+                return True
+
+            flushed = True
+            for model_class, model_rows in self._group_rows(rows).items():
+                started_at = time.monotonic()
+                try:
+                    self.database.insert(model_rows)
+                except Exception:
+                    log.exception('Cannot insert %s rows to %s, spooling to disk', len(model_rows),
+                                  model_class.table_name())
+                    self.stats.failed_flushes += 1
+                    self.spool(model_rows)
+                    flushed = False
+                else:
+                    latency = time.monotonic() - started_at
+                    self.stats.add_flush(len(model_rows), latency)
+                    log.debug('Flushed %s rows to %s in %.3fs', len(model_rows), model_class.table_name(), latency)
+
+            return flushed
+
+    def spool(self, rows):
+        if not self.spool_dir:
+            log.error('Logger spool directory is not configured, %s rows dropped', len(rows))
+            return
+
+        os.makedirs(self.spool_dir, exist_ok=True)
+
+        for model_class, model_rows in self._group_rows(rows).items():
+            file_name = '{}-{}-{}-{}.tsv'.format(
+                model_class.table_name(), int(time.time()), os.getpid(), uuid.uuid4().hex
+            )
+            tmp_path = os.path.join(self.spool_dir, '.{}'.format(file_name))
+            with open(tmp_path, 'w') as spool_file:
+                for row in model_rows:
+                    spool_file.write(row.to_tsv())
+                    spool_file.write('\n')
+
+            os.rename(tmp_path, os.path.join(self.spool_dir, file_name))
+            self.stats.rows_spooled += len(model_rows)
+
+    def replay_spool(self):
+        """
+        Inserts spooled rows to ClickHouse, returns number of replayed rows
+
+        A file is claimed by renaming it before reading, processes sharing the
+        spool directory never insert the same file twice.
+        """
+        if not self.spool_dir or not os.path.isdir(self.spool_dir):
+            return 0
+
+        replayed = 0
+        for file_path in sorted(glob.glob(os.path.join(self.spool_dir, '*.tsv'))):
+            file_name = os.path.basename(file_path)
+            model_class = SPOOL_MODELS.get(file_name.split('-', 1)[0])
+            if model_class is None:
+                continue
+
+            claimed_path = os.path.join(self.spool_dir, '.{}.{}'.format(file_name, os.getpid()))
+            try:
+                os.rename(file_path, claimed_path)
+            except FileNotFoundError:
+                continue
+
+            with open(claimed_path) as spool_file:
+                rows = [model_class.from_tsv(line) for line in spool_file if line.strip()]
+
+            started_at = time.monotonic()
+            try:
+                self.database.insert(rows)
+            except Exception:
+                log.exception('Cannot replay spooled logs from %s', file_path)
+                os.rename(claimed_path, file_path)
+                break
+
+            self.stats.add_flush(len(rows), time.monotonic() - started_at)
+            os.remove(claimed_path)
+            replayed += len(rows)
+
+        return replayed
+
+    def _group_rows(self, rows):
+        grouped = defaultdict(list)
+        for row in rows:
+            grouped[row.__class__].append(row)
+        return grouped
+
+    def _ensure_thread(self):
+        # threads don't survive fork of the web and celery workers
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='logger-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._flush_event.wait(self.flush_interval)
+            self._flush_event.clear()
+            try:
+                if self.flush():
+                    self.replay_spool()
+            except Exception:
+                log.exception('Logger flush failed')
+
+
+_log_writers = {}
+_log_writers_lock = threading.Lock()
+
+
+def get_log_writer(database):
+    """
+    Gets process-wide writer of the database
+    """
+    with _log_writers_lock:
+        if database not in _log_writers:
+            _log_writers[database] = BufferedLogWriter(database)
+
+        return _log_writers[database]
@@ -3,6 +3,7 @@ from django.utils.translation import ugettext_lazy as _
 from django.template import Context, Template
 
 from r3sourcer.helpers.models.abs import UUIDModel
+from r3sourcer.helpers.templates import compiled_templates
 
 
 class PDFTemplateAbstract(UUIDModel):
@@ -62,7 +63,9 @@ class PDFTemplate(PDFTemplateAbstract):
         Template rendering, variables substitution.
         """
 
-        tpl = Template(self.html_template)
+        tpl = compiled_templates.get(
+            self, 'html_template', [self.html_template], lambda: Template(self.html_template)
+        )
         return tpl.render(Context(context))
 
 
@@ -6,6 +6,7 @@ from rest_framework.exceptions import ValidationError
 from r3sourcer.apps.core.api import viewsets as core_viewsets
 from r3sourcer.apps.core.utils.companies import get_site_master_company
 from r3sourcer.apps.pricing import models as pricing_models
+from r3sourcer.apps.pricing.services import compiled_rate_coefficients
 
 
 class RateCoefficientViewset(core_viewsets.BaseApiViewset):
@@ -74,6 +75,7 @@ class RateCoefficientModifierViewset(core_viewsets.BaseApiViewset):
             rate_coefficient.rate_coefficient_modifiers.filter(
                 type=rcm_type, default=True
             ).update(default=False)
+            compiled_rate_coefficients.invalidate()
 
         instance = serializer.save()
 
@@ -94,6 +96,7 @@ class RateCoefficientModifierViewset(core_viewsets.BaseApiViewset):
             rate_coefficient.rate_coefficient_modifiers.filter(
                 type=rcm_type, default=True
             ).exclude(pk=instance.pk).update(default=False)
+            compiled_rate_coefficients.invalidate()
         elif not default and old_default:
             instance.default = True
             instance.save()
@@ -1,51 +1,75 @@
+import time
+import uuid
+from collections import OrderedDict, defaultdict
 from datetime import timedelta
 
-from .models import RateCoefficient, WeekdayWorkRule
-from .exceptions import RateNotApplicable
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.db import models
+from django.db.models.signals import post_save, post_delete
 
+from r3sourcer.apps.core.utils.company_hierarchy import company_hierarchy_changed
+from r3sourcer.helpers.lru import LRUCache
 
-class CoefficientService:
+from .models import (
+    RateCoefficient, RateCoefficientRel, RateCoefficientModifier, DynamicCoefficientRule, WeekdayWorkRule,
+    OvertimeWorkRule, TimeOfDayWorkRule, AllowanceWorkRule, PriceListRateModifier,
+)
+from .exceptions import RateNotApplicable
 
-    def get_industry_rate_coefficient(self, company, industry, modifier_type, start_datetime, overlaps=False):
-        query = models.Q(industry=industry,
-                         rate_coefficient_modifiers__type=modifier_type,
-                         active=True,
-                         overlaps=overlaps)
 
-        rate_coefficients = RateCoefficient.objects.owned_by(company).filter(query)
+class CompiledRateCoefficients:
+    """
+    Ordered rate coefficients with their used rules loaded in memory.
 
-        return rate_coefficients.order_by(
-            '-rate_coefficient_modifiers__multiplier',
-            '-rate_coefficient_modifiers__fixed_addition',
-            '-rate_coefficient_modifiers__fixed_override',
-            '-priority',
-        ).distinct()
+    Evaluation of compiled coefficients never touches the database.
+    """
 
-    def process_rate_coefficients(self, rate_coefficients, start_datetime,
-                                  origin_hours, break_started=None,
-                                  break_ended=None, overlaps=False):
+    def __init__(self, coefficients):
+        # list of (rate_coefficient, [rule, ...]) where rule is the concrete work rule instance
+        self.coefficients = coefficients
+
+    def __len__(self):
+        return len(self.coefficients)
+
+    @classmethod
+    def compile(cls, rate_coefficients):
+        rate_coefficients = list(rate_coefficients)
+        rules_map = OrderedDict((rate_coefficient.pk, []) for rate_coefficient in rate_coefficients)
+
+        if rules_map:
+            rules = DynamicCoefficientRule.objects.filter(
+                rate_coefficient_id__in=rules_map.keys(), used=True
+            ).order_by('-priority').prefetch_related('rule')
+
+            for rule in rules:
+                rules_map[rule.rate_coefficient_id].append(rule.rule)
+
+        return cls([
+            (rate_coefficient, rules_map[rate_coefficient.pk]) for rate_coefficient in rate_coefficients
+        ])
+
+    def process(self, start_datetime, origin_hours, break_started=None, break_ended=None, overlaps=False):
         res = []
         worked_hours = origin_hours
-        for rate_coefficient in rate_coefficients:
-            rules = rate_coefficient.rate_coefficient_rules.filter(used=True).order_by('-priority').distinct()
+        for rate_coefficient, rules in self.coefficients:
             try:
                 used_hours = worked_hours
                 is_allowance = False
 
                 for rule in rules:
                     calc_hours = origin_hours if is_allowance else worked_hours
-                    hours = rule.rule.calc_hours(start_datetime,
-                                                 calc_hours,
-                                                 break_started,
-                                                 break_ended)
+                    hours = rule.calc_hours(start_datetime,
+                                            calc_hours,
+                                            break_started,
+                                            break_ended)
 
                     if hours == timedelta(hours=-1):
                         is_allowance = True
                         hours = timedelta(hours=1)
                         if used_hours < hours:
                             used_hours = hours
-                    elif isinstance(rule.rule, WeekdayWorkRule):
+                    elif isinstance(rule, WeekdayWorkRule):
                         break
 
                     used_hours = min(hours, used_hours)
@@ -78,11 +102,184 @@ class CoefficientService:
             })
         return res
 
+
+class CompiledRateCoefficientsCache:
+    """
+    Process-wide LRU of compiled rate coefficients keyed by
+    (master company, industry, modifier type, overlaps).
+
+    Local entries are dropped by model signals in the current process.
+    Other processes notice the change through the version key stored in the
+    shared cache, which is re-checked at most every `version_check_interval` seconds.
+    Entries are recompiled after `ttl` seconds, so changes made by
+    `QuerySet.update()` without calling `invalidate()` are picked up as well.
+    """
+
+    version_cache_key = 'pricing_rate_coefficients_version'
+    version_check_interval = 5
+    ttl = 300
+    lru_size = 1000
+
+    def __init__(self):
+        self._compiled = LRUCache(self.lru_size)
+        self._version = None
+        self._version_checked_at = None
+
+    def _check_version(self):
+        now = time.monotonic()
+        if self._version_checked_at is not None and now - self._version_checked_at < self.version_check_interval:
+            return
+
+        version = cache.get(self.version_cache_key)
+        if version != self._version:
+            self._compiled.clear()
+            self._version = version
+
+        self._version_checked_at = now
+
+    def get(self, key, compile_func):
+        self._check_version()
+
+        now = time.monotonic()
+        cached = self._compiled.get(key)
+        if cached is not None and now - cached[1] < self.ttl:
+            return cached[0]
+
+        compiled = compile_func()
+        self._compiled.set(key, (compiled, now))
+        return compiled
+
+    def invalidate(self):
+        self._compiled.clear()
+        self._version = uuid.uuid4().hex
+        self._version_checked_at = time.monotonic()
+        cache.set(self.version_cache_key, self._version, None)
+
+
+compiled_rate_coefficients = CompiledRateCoefficientsCache()
+
+
+class CoefficientModifiers:
+    """
+    Prefetched rate coefficient modifiers for a set of timesheets.
+
+    Resolves modifiers the same way as the per-coefficient queries did: company price list rate modifier or
+    candidate skill modifier first, default modifier of the type otherwise.
+    """
+
+    def __init__(self, modifier_type, default_modifiers=None, company_modifiers=None, candidate_modifiers=None,
+                 allowance_coefficient_ids=None):
+        self.modifier_type = modifier_type
+        self.default_modifiers = default_modifiers or {}
+        self.company_modifiers = company_modifiers or {}
+        self.candidate_modifiers = candidate_modifiers or {}
+        self.allowance_coefficient_ids = allowance_coefficient_ids or set()
+
+    @classmethod
+    def prefetch(cls, modifier_type, coefficient_ids, company_ids=None, candidate_ids=None):
+        from r3sourcer.apps.candidate.models import SkillRateCoefficientRel
+
+        coefficient_ids = set(coefficient_ids)
+        if not coefficient_ids:
+            return cls(modifier_type)
+
+        default_modifiers = {}
+        modifiers = RateCoefficientModifier.objects.filter(
+            rate_coefficient_id__in=coefficient_ids, type=modifier_type, default=True,
+        ).order_by('-pk')
+        for modifier in modifiers:
+            default_modifiers[modifier.rate_coefficient_id] = modifier
+
+        company_modifiers = {}
+        if modifier_type == RateCoefficientModifier.TYPE_CHOICES.company and company_ids:
+            modifier_rels = PriceListRateModifier.objects.filter(
+                rate_coefficient_id__in=coefficient_ids,
+                price_list_rate__price_list__company_id__in=set(company_ids),
+            ).select_related(
+                'rate_coefficient_modifier', 'price_list_rate__price_list'
+            ).order_by('-pk')
+            for modifier_rel in modifier_rels:
+                key = (modifier_rel.rate_coefficient_id, modifier_rel.price_list_rate.price_list.company_id)
+                company_modifiers[key] = modifier_rel.rate_coefficient_modifier
+
+        candidate_modifiers = {}
+        if modifier_type == RateCoefficientModifier.TYPE_CHOICES.candidate and candidate_ids:
+            modifier_rels = SkillRateCoefficientRel.objects.filter(
+                rate_coefficient_id__in=coefficient_ids,
+                skill_rel__candidate_contact_id__in=set(candidate_ids),
+            ).select_related(
+                'rate_coefficient_modifier', 'skill_rel'
+            ).order_by('-pk')
+            for modifier_rel in modifier_rels:
+                key = (modifier_rel.rate_coefficient_id, modifier_rel.skill_rel.candidate_contact_id)
+                candidate_modifiers[key] = modifier_rel.rate_coefficient_modifier
+
+        allowance_coefficient_ids = set(DynamicCoefficientRule.objects.filter(
+            rate_coefficient_id__in=coefficient_ids,
+            rule_type=ContentType.objects.get_for_model(AllowanceWorkRule),
+        ).values_list('rate_coefficient_id', flat=True))
+
+        return cls(
+            modifier_type, default_modifiers, company_modifiers, candidate_modifiers, allowance_coefficient_ids
+        )
+
+    def get_modifier(self, coefficient, company_id=None, candidate_id=None):
+        modifier = None
+        if self.modifier_type == RateCoefficientModifier.TYPE_CHOICES.company:
+            modifier = self.company_modifiers.get((coefficient.pk, company_id))
+        elif self.modifier_type == RateCoefficientModifier.TYPE_CHOICES.candidate:
+            modifier = self.candidate_modifiers.get((coefficient.pk, candidate_id))
+
+        return modifier or self.default_modifiers.get(coefficient.pk)
+
+    def is_allowance(self, coefficient):
+        return coefficient.pk in self.allowance_coefficient_ids
+
+
+class CoefficientService:
+
+    timesheet_related_fields = (
+        'job_offer__candidate_contact',
+        'job_offer__shift__date__job__jobsite__industry',
+        'job_offer__shift__date__job__jobsite__master_company',
+        'job_offer__shift__date__job__jobsite__regular_company',
+    )
+
+    def get_industry_rate_coefficient(self, company, industry, modifier_type, start_datetime, overlaps=False):
+        query = models.Q(industry=industry,
+                         rate_coefficient_modifiers__type=modifier_type,
+                         active=True,
+                         overlaps=overlaps)
+
+        rate_coefficients = RateCoefficient.objects.owned_by(company).filter(query)
+
+        return rate_coefficients.order_by(
+            '-rate_coefficient_modifiers__multiplier',
+            '-rate_coefficient_modifiers__fixed_addition',
+            '-rate_coefficient_modifiers__fixed_override',
+            '-priority',
+        ).distinct()
+
+    def get_compiled_rate_coefficients(self, company, industry, modifier_type, overlaps=False):
+        key = (company.pk, industry.pk, modifier_type, overlaps)
+
+        return compiled_rate_coefficients.get(key, lambda: CompiledRateCoefficients.compile(
+            self.get_industry_rate_coefficient(company, industry, modifier_type, None, overlaps=overlaps)
+        ))
+
+    def process_rate_coefficients(self, rate_coefficients, start_datetime,
+                                  origin_hours, break_started=None,
+                                  break_ended=None, overlaps=False):
+        if not isinstance(rate_coefficients, CompiledRateCoefficients):
+            rate_coefficients = CompiledRateCoefficients.compile(rate_coefficients)
+
+        return rate_coefficients.process(start_datetime, origin_hours, break_started, break_ended, overlaps=overlaps)
+
     def calc(self, company, industry, modifier_type, start_datetime, worked_hours,
              break_started=None, break_ended=None, overlaps=False):
         if overlaps:
-            rate_coefficients = self.get_industry_rate_coefficient(
-                company, industry, modifier_type, start_datetime, overlaps=True
+            rate_coefficients = self.get_compiled_rate_coefficients(
+                company, industry, modifier_type, overlaps=True
             )
             res = self.process_rate_coefficients(rate_coefficients,
                                                  start_datetime,
@@ -93,14 +290,90 @@ class CoefficientService:
         else:
             res = []
 
-        rate_coefficients = self.get_industry_rate_coefficient(company,
-                                                               industry,
-                                                               modifier_type,
-                                                               start_datetime,
-                                                               overlaps=False)
+        rate_coefficients = self.get_compiled_rate_coefficients(company,
+                                                                industry,
+                                                                modifier_type,
+                                                                overlaps=False)
         res.extend(self.process_rate_coefficients(rate_coefficients,
                                                   start_datetime,
                                                   worked_hours,
                                                   break_started,
                                                   break_ended))
         return res
+
+    def calc_many(self, timesheets, modifier_type, overlaps=False, local_breaks=True):
+        """
+        Calculate coefficient hours for many timesheets at once.
+
+        Timesheets are grouped by master company and industry so every rule set is compiled once, and the
+        modifiers of all used coefficients are prefetched for `BasePaymentService.lines_iter`.
+
+        :param timesheets: TimeSheet queryset or iterable
+        :param modifier_type: RateCoefficientModifier type
+        :param overlaps: calculate overlapping coefficients too
+        :param local_breaks: use breaks in jobsite timezone, `break_started_at`/`break_ended_at` otherwise
+        :return: tuple of (dict of timesheet id -> coefficient hours, CoefficientModifiers)
+        """
+
+        if isinstance(timesheets, models.QuerySet):
+            timesheets = timesheets.select_related(*self.timesheet_related_fields)
+
+        groups = defaultdict(list)
+        for timesheet in timesheets:
+            jobsite = timesheet.job_offer.shift.date.job.jobsite
+            groups[(jobsite.master_company, jobsite.industry)].append(timesheet)
+
+        res = {}
+        coefficient_ids = set()
+        company_ids = set()
+        candidate_ids = set()
+        for (company, industry), group_timesheets in groups.items():
+            compiled = []
+            if overlaps:
+                compiled.append((
+                    self.get_compiled_rate_coefficients(company, industry, modifier_type, overlaps=True), True
+                ))
+            compiled.append((
+                self.get_compiled_rate_coefficients(company, industry, modifier_type, overlaps=False), False
+            ))
+
+            for rate_coefficients, is_overlaps in compiled:
+                coefficient_ids.update(rate_coefficient.pk for rate_coefficient, _ in rate_coefficients.coefficients)
+
+            for timesheet in group_timesheets:
+                if local_breaks:
+                    break_started, break_ended = timesheet.break_started_at_tz, timesheet.break_ended_at_tz
+                else:
+                    break_started, break_ended = timesheet.break_started_at, timesheet.break_ended_at
+
+                coeffs_hours = []
+                for rate_coefficients, is_overlaps in compiled:
+                    coeffs_hours.extend(rate_coefficients.process(
+                        timesheet.shift_started_at_tz,
+                        timesheet.shift_duration,
+                        break_started,
+                        break_ended,
+                        overlaps=is_overlaps,
+                    ))
+
+                res[timesheet.pk] = coeffs_hours
+                jobsite = timesheet.job_offer.shift.date.job.jobsite
+                company_ids.add(jobsite.regular_company_id)
+                candidate_ids.add(timesheet.job_offer.candidate_contact_id)
+
+        modifiers = CoefficientModifiers.prefetch(modifier_type, coefficient_ids, company_ids, candidate_ids)
+
+        return res, modifiers
+
+
+def invalidate_compiled_rate_coefficients(sender, **kwargs):
+    compiled_rate_coefficients.invalidate()
+
+
+for rate_model in (RateCoefficient, RateCoefficientRel, RateCoefficientModifier, DynamicCoefficientRule,
+                   WeekdayWorkRule, OvertimeWorkRule, TimeOfDayWorkRule, AllowanceWorkRule):
+    post_save.connect(invalidate_compiled_rate_coefficients, sender=rate_model)
+    post_delete.connect(invalidate_compiled_rate_coefficients, sender=rate_model)
+
+# compiled rate coefficients are selected with owned_by through the company hierarchy
+company_hierarchy_changed.connect(invalidate_compiled_rate_coefficients)
@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
 
+import mock
 import pytest
 from freezegun import freeze_time
 
@@ -9,7 +10,9 @@ from r3sourcer.apps.core.models import Company
 from r3sourcer.apps.pricing.models import (
     DynamicCoefficientRule, RateCoefficientModifier, Industry,
 )
-from r3sourcer.apps.pricing.services import CoefficientService
+from r3sourcer.apps.pricing.services import (
+    CoefficientService, CompiledRateCoefficientsCache, compiled_rate_coefficients,
+)
 
 
 rates_calc = CoefficientService()
@@ -252,3 +255,55 @@ class TestCoefficientRates:
         assert res[0]['hours'] == timedelta(hours=1)
         assert res[1]['coefficient'] == 'base'
         assert res[1]['hours'] == timedelta(hours=7)
+
+    @freeze_time(datetime(2017, 1, 2, 8, 30))
+    def test_calc_compiled_without_queries(
+        self, settings, rate_coefficient, overtime_rule, industry, company, django_assert_num_queries
+    ):
+        settings.TIME_ZONE = 'UTC'
+
+        self.add_rule(rate_coefficient, overtime_rule)
+        modifier_type = RateCoefficientModifier.TYPE_CHOICES.candidate
+        rates_calc.calc(company, industry, modifier_type, timezone.now(), timedelta(hours=8))
+
+        with django_assert_num_queries(0):
+            res = rates_calc.calc(company, industry, modifier_type, timezone.now(), timedelta(hours=8))
+
+        assert len(res) == 2
+        assert res[0]['coefficient'] == rate_coefficient
+        assert res[0]['hours'] == timedelta(hours=1)
+
+    @freeze_time(datetime(2017, 1, 2, 8, 30))
+    def test_calc_compiled_invalidated_on_rule_change(self, settings, rate_coefficient, overtime_rule, monday_rule):
+        settings.TIME_ZONE = 'UTC'
+
+        self.add_rule(rate_coefficient, monday_rule)
+        res = self.calc_res()
+
+        assert len(res) == 1
+        assert res[0]['hours'] == timedelta(hours=8)
+
+        self.add_rule(rate_coefficient, overtime_rule)
+        res = self.calc_res()
+
+        assert len(res) == 2
+        assert res[0]['hours'] == timedelta(hours=1)
+        assert res[1]['coefficient'] == 'base'
+
+    def test_calc_compiled_invalidated_on_company_type_change(self, company):
+        company.type = Company.COMPANY_TYPES.regular
+
+        with mock.patch.object(compiled_rate_coefficients, 'invalidate') as mock_invalidate:
+            company.save()
+
+        assert mock_invalidate.called
+
+    def test_compiled_cache_expired_after_ttl(self):
+        compiled_cache = CompiledRateCoefficientsCache()
+        compile_func = mock.Mock(side_effect=['old', 'new'])
+
+        assert compiled_cache.get('key', compile_func) == 'old'
+        assert compiled_cache.get('key', compile_func) == 'old'
+
+        with mock.patch.object(compiled_cache, 'ttl', 0):
+            assert compiled_cache.get('key', compile_func) == 'new'
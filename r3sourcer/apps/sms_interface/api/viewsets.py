@@ -5,6 +5,7 @@ from rest_framework import viewsets, mixins, permissions, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from r3sourcer.apps.core.api.pagination import COUNT_ESTIMATED
 from r3sourcer.apps.core.api.viewsets import BaseApiViewset
 from r3sourcer.apps.sms_interface.models import SMSTemplate
 from r3sourcer.apps.sms_interface.utils import get_sms_service
@@ -15,6 +16,8 @@ logger = logging.getLogger(__name__)
 
 class SMSMessageViewset(BaseApiViewset):
     ordering = ('-created_at',)
+    count_mode = COUNT_ESTIMATED
+    keyset_fields = ('-created_at', )
 
     @action(methods=['post'], detail=True)
     def resend(self, request, pk, *args, **kwargs):
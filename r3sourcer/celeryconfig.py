@@ -30,12 +30,16 @@ task_queues = (
     Queue('celery', Exchange('celery'), routing_key='celery'),
     Queue('sms', Exchange('sms'), routing_key='sms'),
     Queue('hr', Exchange('hr'), routing_key='hr'),
+    Queue('pdf', Exchange('pdf'), routing_key='pdf'),
 )
 
 task_routes = {
     'r3sourcer.apps.sms_interface.tasks.fetch_remote_sms': {
         'queue': 'sms',
     },
+    'r3sourcer.apps.hr.tasks.render_pdf_job': {
+        'queue': 'pdf',
+    },
 }
 
 beat_schedule = {
@@ -51,6 +55,10 @@ beat_schedule = {
         'task': 'r3sourcer.apps.hr.tasks.update_all_distances',
         'schedule': crontab(minute=0, hour=22, day_of_week='fri,sat')
     },
+    'geocode_pending_addresses': {
+        'task': 'r3sourcer.apps.core.tasks.geocode_pending_addresses',
+        'schedule': crontab(minute=15)
+    },
     'close_not_active_jobsites': {
         'task': 'r3sourcer.apps.hr.tasks.close_not_active_jobsites',
         'schedule': crontab(minute=4, hour=0)
@@ -91,6 +99,10 @@ beat_schedule = {
         'task': 'r3sourcer.apps.hr.tasks.delete_old_shifts',
         'schedule': crontab(minute=30, hour=1)
     },
+    'flush_logger_spool': {
+        'task': 'r3sourcer.apps.logger.tasks.flush_logger_spool',
+        'schedule': crontab(minute='*/5')
+    },
 }
 
 task_ignore_result = True
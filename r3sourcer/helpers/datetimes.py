@@ -1,4 +1,5 @@
 from datetime import datetime, timedelta, date, time
+from functools import lru_cache
 
 import pytz
 from django.conf import settings
@@ -51,17 +52,33 @@ def local2utc(dt, timezone):
     return tz2utc(datetime_with_tz)
 
 
-def geo_time_zone(lng, lat):
-    default_tz = settings.TIME_ZONE
-    if None in (lng, lat):
-        return pytz.timezone(default_tz)
+# ~11 m, timezone borders are not that precise anyway
+TIME_ZONE_COORDINATES_PRECISION = 4
+
 
+@lru_cache(maxsize=4096)
+def _time_zone_name_at(lng, lat):
     tf = settings.TIME_ZONE_FINDER
     try:
-        time_zone = tf.timezone_at(lng=lng, lat=lat)
+        return tf.timezone_at(lng=lng, lat=lat)
     except pytz.UnknownTimeZoneError:
-        time_zone = default_tz
-    return pytz.timezone(time_zone)
+        return None
+
+
+def geo_time_zone_name(lng, lat):
+    """
+    Gets timezone name by coordinates, resolved timezones are cached by rounded coordinates
+    """
+    if None in (lng, lat):
+        return settings.TIME_ZONE
+
+    return _time_zone_name_at(
+        round(float(lng), TIME_ZONE_COORDINATES_PRECISION), round(float(lat), TIME_ZONE_COORDINATES_PRECISION)
+    ) or settings.TIME_ZONE
+
+
+def geo_time_zone(lng, lat):
+    return pytz.timezone(geo_time_zone_name(lng, lat))
 
 
 def today_7_am():
@@ -0,0 +1,62 @@
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Thread-safe bounded LRU used by the process-wide caches.
+
+    `size` is the maximum number of entries, or a callable returning it
+    (e.g. to read it from settings). The entries are only accessed under
+    the lock, `get_or_build` builds missing values outside of it, so
+    builders may use the cache themselves.
+    """
+
+    def __init__(self, size):
+        self._size = size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        return self._size() if callable(self._size) else self._size
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        size = self.size
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > size:
+                self._data.popitem(last=False)
+
+    def get_or_build(self, key, build_func):
+        value = self.get(key)
+        if value is None:
+            value = build_func()
+            self.set(key, value)
+
+        return value
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._data = OrderedDict()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
@@ -6,6 +6,8 @@ from django.db import models
 from django.utils.text import slugify
 from django.utils.translation import ugettext_lazy as _
 
+from r3sourcer.helpers.templates import compiled_templates
+
 from .uuid_models import UUIDModel
 
 
@@ -17,6 +19,7 @@ class TemplateMessage(UUIDModel):
     INTERPOLATE_END = ']]'
     DELIMITER = '__'
     MAX_LEVEL_DEEP = 5
+    NOT_RESOLVED = object()
 
     TYPE_CHOICES = ()
 
@@ -111,11 +114,11 @@ class TemplateMessage(UUIDModel):
                 'contact': Contact.objects.last()
             }
         """
-        subject_compiled, text_compiled, html_compiled = self.compile_string(
-            self.subject_template,
-            self.message_text_template,
-            self.message_html_template,
-            **params)
+        sources = [self.subject_template, self.message_text_template, self.message_html_template]
+        tokenized = compiled_templates.get(self, 'message', sources, lambda: [
+            self.tokenize(source) for source in sources
+        ])
+        subject_compiled, text_compiled, html_compiled = self.render_tokens(tokenized, params)
 
         return {
             'id': self.id,
@@ -226,29 +229,105 @@ class TemplateMessage(UUIDModel):
         return set(parsed_params)
 
     @classmethod
-    def compile_string(cls, *raw_strings, **params):
-        """Replace variables on param values.
+    def tokenize(cls, raw_string):
+        """Split template to literal strings and variables.
 
-        :param raw_strings: templates list
+        :param raw_string: template
+        :return: list of strings and (placeholder, variable name) tuples
+        """
+        pattern = '({start}\\s*(?P<param>[a-z]{{1}}[a-z\\_0-9]*)\\s*{end})'.format(
+            start=re.escape(cls.INTERPOLATE_START),
+            end=re.escape(cls.INTERPOLATE_END)
+        )
+
+        # split result is [literal, placeholder, name, literal, placeholder, name, ..., literal]
+        parts = re.split(pattern, raw_string, flags=re.I)
+        tokens = [parts[0]] if parts[0] else []
+        for index in range(1, len(parts), 3):
+            tokens.append((parts[index], parts[index + 1]))
+            if parts[index + 2]:
+                tokens.append(parts[index + 2])
+
+        return tokens
+
+    @classmethod
+    def resolve_param(cls, params, param):
+        """Get value of the variable, lookups are resolved the same way as in get_dict_values.
+
+        :param params: dict of variables
+        :param param: variable name
+        :return: value or NOT_RESOLVED
+        """
+        if param in params:
+            return params[param]
+
+        split_parameter = param.split(cls.DELIMITER)
+        if len(split_parameter) > cls.MAX_LEVEL_DEEP:
+            return cls.NOT_RESOLVED
+
+        for index in range(1, len(split_parameter)):
+            special_parameter = cls.DELIMITER.join(split_parameter[:index])
+            if special_parameter in params:
+                break
+        else:
+            return cls.NOT_RESOLVED
+
+        value = params[special_parameter]
+        for key in split_parameter[index:]:
+            if isinstance(value, collections.Iterable) and not hasattr(value, key):
+                try:
+                    value = value[key]
+                except Exception:
+                    return cls.NOT_RESOLVED
+            elif key not in ['delete', 'save', 'update', 'fetch_remote']:
+                if hasattr(value, key):
+                    value = getattr(value, key)
+                else:
+                    return cls.NOT_RESOLVED
+
+            if callable(value):
+                value = value()
+
+        return value
+
+    @classmethod
+    def render_tokens(cls, tokenized, params):
+        """Replace variables of tokenized templates on param values.
+
+        :param tokenized: list of tokenized templates
         :param params: variables dict
         :return: compiled rows
         """
+        values = {}
+        rows = []
+        for tokens in tokenized:
+            row = []
+            for token in tokens:
+                if isinstance(token, str):
+                    row.append(token)
+                    continue
+
+                placeholder, param = token
+                if param not in values:
+                    values[param] = cls.resolve_param(params, param)
+
+                value = values[param]
+                row.append(placeholder if value is cls.NOT_RESOLVED else str(value))
 
-        raw_strings = list(raw_strings)
+            rows.append(''.join(row))
 
-        values_dict = cls.get_dict_values(params, *raw_strings)
-        for param, value in values_dict.items():
-            pattern = "{start}\\s*{param}\\s*{end}".format(
-                start=re.escape(cls.INTERPOLATE_START),
-                end=re.escape(cls.INTERPOLATE_END),
-                param=param
-            )
+        return rows
 
-            value = str(value)
-            for index, r in enumerate(raw_strings):
-                raw_strings[index] = re.sub(pattern, value, r)
+    @classmethod
+    def compile_string(cls, *raw_strings, **params):
+        """Replace variables on param values.
+
+        :param raw_strings: templates list
+        :param params: variables dict
+        :return: compiled rows
+        """
 
-        return raw_strings
+        return cls.render_tokens([cls.tokenize(raw_string) for raw_string in raw_strings], params)
 
     def save(self, *args, **kwargs):
         if self._state.adding:
@@ -1,14 +1,81 @@
 from datetime import datetime, timedelta
 
 import pytz
+from crum import get_current_request
 from django.db import models
 from django.utils.functional import cached_property
 from django_mock_queries.constants import ObjectDoesNotExist
 
-from r3sourcer.helpers.datetimes import datetime2timezone, geo_time_zone, tz2utc, utc2local
+from r3sourcer.helpers.datetimes import datetime2timezone, geo_time_zone, geo_time_zone_name, tz2utc, utc2local
+
+DEFAULT_GEO = -0.118092, 51.509865
+
+
+def _get_default_tz_name():
+    # the same fallback as TimeZone.tz uses for objects without geo
+    return geo_time_zone_name(*DEFAULT_GEO)
+
+
+def _get_address_tz_name(address):
+    return address.tz_name or geo_time_zone_name(address.longitude, address.latitude)
+
+
+def _fetch_address_tz_name(model, pk, path):
+    request = get_current_request()
+    tz_names = getattr(request, '_address_tz_names', None) if request is not None else None
+    if tz_names is None:
+        tz_names = {}
+        if request is not None:
+            request._address_tz_names = tz_names
+
+    key = (model._meta.label, pk, path)
+    if key not in tz_names:
+        prefix = '{}__'.format(path) if path else ''
+        values = model._base_manager.filter(pk=pk).values_list(
+            '{}tz_name'.format(prefix), '{}longitude'.format(prefix), '{}latitude'.format(prefix)
+        ).first()
+
+        if values is None:
+            tz_names[key] = _get_default_tz_name()
+        else:
+            tz_name, longitude, latitude = values
+            tz_names[key] = tz_name or geo_time_zone_name(longitude, latitude)
+
+    return tz_names[key]
+
+
+def get_address_tz_name(instance, path):
+    """
+    Gets timezone name of the Address at `path` of the instance relations.
+
+    Related objects loaded on the instance are used without queries, the
+    rest of the path is fetched with one query from the first related
+    object which is not loaded. Fetched timezones are kept for the current
+    request by that object, so instances sharing it query once. Missing
+    rows and empty relations fall back to the DEFAULT_GEO timezone.
+    """
+    obj = instance
+    parts = path.split('__')
+    for index, name in enumerate(parts):
+        field = obj._meta.get_field(name)
+        if not field.is_cached(obj):
+            related_id = getattr(obj, field.attname)
+            if related_id is None:
+                return _get_default_tz_name()
+
+            return _fetch_address_tz_name(field.related_model, related_id, '__'.join(parts[index + 1:]))
+
+        obj = getattr(obj, name)
+        if obj is None:
+            return _get_default_tz_name()
+
+    return _get_address_tz_name(obj)
 
 
 class TimeZone(models.Model):
+    # relation path to the Address which timezone is used, e.g. 'jobsite__address'
+    tz_address_path = None
+
     class Meta:
         abstract = True
 
@@ -18,10 +85,13 @@ class TimeZone(models.Model):
 
     @cached_property
     def tz(self):
+        if self.tz_address_path:
+            return pytz.timezone(get_address_tz_name(self, self.tz_address_path))
+
         try:
             coord = self.geo
         except ObjectDoesNotExist:
-            coord = -0.118092, 51.509865
+            coord = DEFAULT_GEO
         return geo_time_zone(*coord)
 
     @property
@@ -5,9 +5,10 @@ from django.utils.translation import ugettext_lazy as _
 
 from r3sourcer.apps.core.managers import AbstractObjectOwnerManager
 from r3sourcer.apps.logger.main import endless_logger
+from r3sourcer.apps.logger.mixins import LoggerChangeTrackingMixin
 
 
-class UUIDModel(models.Model):
+class UUIDModel(LoggerChangeTrackingMixin, models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     updated_at = models.DateTimeField(verbose_name=_("Updated at"), auto_now=True, editable=False)
     created_at = models.DateTimeField(verbose_name=_("Created at"), auto_now_add=True, editable=False)
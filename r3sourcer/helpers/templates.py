@@ -0,0 +1,39 @@
+import hashlib
+
+from r3sourcer.helpers.lru import LRUCache
+
+
+class CompiledTemplateCache:
+    """
+    Process-wide LRU of compiled templates keyed by
+    (model, name, hash of the template source).
+
+    Edited templates, saved or not, have another source hash, so outdated
+    compiled templates are never used and are evicted by the LRU.
+    """
+
+    lru_size = 1000
+
+    def __init__(self):
+        self._compiled = LRUCache(self.lru_size)
+
+    @staticmethod
+    def get_source_hash(sources):
+        content = '\0'.join(source or '' for source in sources)
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def get(self, template, name, sources, compile_func):
+        """
+        :param template: template instance
+        :param name: name of the compiled template part
+        :param sources: list of the template source strings compiled by `compile_func`
+        :param compile_func: compiles the template on a miss
+        """
+        key = (template._meta.label, name, self.get_source_hash(sources))
+        return self._compiled.get_or_build(key, compile_func)
+
+    def clear(self):
+        self._compiled.clear()
+
+
+compiled_templates = CompiledTemplateCache()
@@ -1,9 +1,8 @@
 import os
 
-from django.db.models import Q
+from django.db.models import Q, Case, When, Value, DateTimeField
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
-from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from model_utils import Choices
 
@@ -12,6 +11,7 @@ from r3sourcer.apps.candidate import models as candidate_models
 from r3sourcer.apps.hr import models as hr_models
 from r3sourcer.apps.pricing import models as pricing_models
 from r3sourcer.apps.skills import models as skill_models
+from r3sourcer.importer.importer import ids_mapping
 
 
 class BaseConfig(object):
@@ -24,6 +24,10 @@ class BaseConfig(object):
     required = None
     distinct = None
     select = '*'
+    # insert rows with one bulk_create per chunk in streaming mode, only for models without save() side effects
+    bulk = False
+    # names of configs to import before this one besides the configs of the related models
+    depends_on = None
 
     @classmethod
     def prepare_data(cls, row):  # pragma: no cover
@@ -35,6 +39,36 @@ class BaseConfig(object):
 
         return cls.is_watched_exists(row, qs)
 
+    @classmethod
+    def exists_many(cls, rows):
+        """
+        Check existence of the rows, rows are checked with one query
+        unless the config has its own exists check.
+
+        :return: list of bool for every row
+        """
+        if getattr(cls.exists, '__func__', None) is not BaseConfig.exists.__func__:
+            return [cls.exists(row) for row in rows]
+
+        existing = {
+            str(obj_id): (created_at, updated_at) for obj_id, created_at, updated_at in
+            cls.model.objects.filter(id__in=[row['id'] for row in rows]).values_list(
+                'id', 'created_at', 'updated_at'
+            )
+        }
+
+        result = []
+        for row in rows:
+            timestamps = existing.get(str(row['id']))
+            is_watched = 'created_at' in row and 'updated_at' in row
+            if timestamps is not None and is_watched and timestamps != (row['created_at'], row['updated_at']):
+                cls.model.objects.filter(id=row['id']).update(
+                    created_at=row['created_at'], updated_at=row['updated_at']
+                )
+            result.append(timestamps is not None)
+
+        return result
+
     @classmethod
     def is_watched_exists(cls, row, qs):
         is_exists = qs.exists()
@@ -64,6 +98,24 @@ class BaseConfig(object):
 
         return obj
 
+    @classmethod
+    def bulk_process(cls, rows):   # pragma: no cover
+        objs = cls.model.objects.bulk_create([
+            cls.model(**{key: val for key, val in row.items() if key in cls.columns})
+            for row in rows
+        ])
+
+        watched = [row for row in rows if 'created_at' in row and 'updated_at' in row]
+        if watched:
+            cls.model.objects.filter(id__in=[row['id'] for row in watched]).update(**{
+                field: Case(
+                    *[When(id=row['id'], then=Value(row[field])) for row in watched],
+                    output_field=DateTimeField()
+                ) for field in ('created_at', 'updated_at')
+            })
+
+        return objs
+
     @classmethod
     def post_process(cls, row, instance):   # pragma: no cover
         pass
@@ -71,6 +123,8 @@ class BaseConfig(object):
 
 class BaseRateMixin:
 
+    depends_on = ['SkillBaseRateConfig']
+
     @classmethod
     def fetch_skill_base_rate(cls, row, rate_var):
         skill_base_rate_exists = not skill_models.SkillBaseRate.objects.filter(id=row[rate_var]).exists()
@@ -199,6 +253,7 @@ class ContactUnavailabilityConfig(BaseConfig):
     }
     model = models.ContactUnavailability
     lbk_model = 'crm_core_contactunavailability'
+    bulk = True
 
 
 class ClientContactConfig(BaseConfig):
@@ -262,9 +317,7 @@ class AccountCompanyConfig(BaseConfig):
         defaults = {key: val for key, val in row.items() if key in cls.columns}
         obj, created = cls.model.objects.get_or_create(name=row['name'], defaults=defaults)
         if not created and obj.id != row['id']:
-            ids_mapping = cache.get('ids_mapping', {})
-            ids_mapping[row['id']] = str(obj.id)
-            cache.set('ids_mapping', ids_mapping)
+            ids_mapping.set(row['id'], str(obj.id))
 
         return obj
 
@@ -343,6 +396,7 @@ class BankAccountConfig(BaseConfig):
     }
     model = models.BankAccount
     lbk_model = 'crm_hr_bankaccount'
+    bulk = True
 
 
 class ContactNoteConfig(BaseConfig):
@@ -352,6 +406,8 @@ class ContactNoteConfig(BaseConfig):
     }
     model = models.Note
     lbk_model = 'crm_core_contactnote'
+    depends_on = ['ContactConfig']
+    bulk = True
 
     @classmethod
     def prepare_data(cls, row):  # pragma: no cover
@@ -394,6 +450,7 @@ class EmploymentClassificationConfig(BaseConfig):
     }
     model = skill_models.EmploymentClassification
     lbk_model = 'crm_hr_employmentclassification'
+    bulk = True
 
 
 class SuperannuationFundConfig(BaseConfig):
@@ -403,6 +460,7 @@ class SuperannuationFundConfig(BaseConfig):
     }
     model = candidate_models.SuperannuationFund
     lbk_model = 'crm_hr_superannuationfund'
+    bulk = True
 
 
 class CandidateContactConfig(BaseConfig):
@@ -535,6 +593,7 @@ class RateCoefficientGroupConfig(BaseConfig):
     }
     model = pricing_models.RateCoefficientGroup
     lbk_model = 'crm_hr_ratecoefficientgroup'
+    bulk = True
 
 
 class RateCoefficientConfig(BaseConfig):
@@ -739,6 +798,7 @@ class JobsiteUnavailabilityConfig(BaseConfig):
     }
     model = hr_models.JobsiteUnavailability
     lbk_model = 'crm_hr_jobsiteunavailability'
+    bulk = True
 
 
 class ShiftDateConfig(BaseRateMixin, BaseConfig):
@@ -825,6 +885,7 @@ class JobOfferConfig(BaseConfig):
     }
     model = hr_models.JobOffer
     lbk_model = 'crm_hr_vacancyoffer'
+    depends_on = ['ShiftDateConfig']
 
     @classmethod
     def prepare_data(cls, row):  # pragma: no cover
@@ -885,6 +946,7 @@ class BlackListConfig(BaseConfig):
     }
     model = hr_models.BlackList
     lbk_model = 'crm_hr_blacklist'
+    bulk = True
 
 
 class FavouriteListConfig(BaseConfig):
@@ -900,6 +962,7 @@ class FavouriteListConfig(BaseConfig):
     }
     model = hr_models.FavouriteList
     lbk_model = 'crm_hr_favouritelist'
+    bulk = True
 
 
 class CarrierListConfig(BaseConfig):
@@ -929,6 +992,7 @@ class CandidateEvaluationConfig(BaseConfig):
     }
     model = hr_models.CandidateEvaluation
     lbk_model = 'crm_hr_recruiteeevaluation'
+    bulk = True
 
 
 class StatesConfigMixin:
@@ -959,6 +1023,7 @@ class CandidateStatesConfig(StatesConfigMixin, BaseConfig):
     }
     model = models.WorkflowObject
     lbk_model = 'crm_hr_recruitmentstatus'
+    depends_on = ['CandidateContactConfig']
 
     @classmethod
     def prepare_data(cls, row):  # pragma: no cover
@@ -978,6 +1043,7 @@ class CompanyStatesConfig(StatesConfigMixin, BaseConfig):
     }
     model = models.WorkflowObject
     lbk_model = 'crm_core_clientstate'
+    depends_on = ['CompanyRelConfig']
 
     @classmethod
     def prepare_data(cls, row):  # pragma: no cover
@@ -1003,6 +1069,7 @@ class JobsiteStatesConfig(StatesConfigMixin, BaseConfig):
     }
     model = models.WorkflowObject
     lbk_model = 'crm_hr_jobsitestate'
+    depends_on = ['JobsiteConfig']
 
     @classmethod
     def prepare_data(cls, row):  # pragma: no cover
@@ -1027,6 +1094,7 @@ class JobStatesConfig(StatesConfigMixin, BaseConfig):
         'LEFT JOIN crm_hr_vacancy as v on o.id=v.order_id '
         'where v.id is not null'
     )
+    depends_on = ['JobConfig']
     select = 'os.*, v.id as vacancy_id'
     order_by = 'os.created_at'
 
@@ -1058,6 +1126,7 @@ class TimeSheetStatesConfig(StatesConfigMixin, BaseConfig):
         'left JOIN crm_hr_timesheet as t on t.booking_id=b.id '
         'where t.id is not null'
     )
+    depends_on = ['TimeSheetConfig']
     select = 'bs.*, t.id as timesheet_id'
     order_by = 'bs.created_at'
 
@@ -0,0 +1,59 @@
+from collections import OrderedDict
+
+
+def get_related_models(config):
+    """Models referenced by foreign keys of the config model and models of its dependency configs"""
+    related_models = {
+        field.related_model for field in config.model._meta.get_fields()
+        if field.concrete and (field.many_to_one or field.one_to_one) and field.related_model is not None
+    }
+    related_models.update(dep_config.model for dep_config in (config.dependency or {}).values())
+    related_models.discard(config.model)
+
+    return related_models
+
+
+def get_config_dependencies(configs):
+    """
+    Build dependency graph of configs.
+
+    Config depends on earlier configs which import models it references,
+    on configs named in its `depends_on` and on earlier configs of the same
+    model. Only earlier configs are considered, so the graph keeps the order
+    of the configs list and has no cycles.
+
+    :param configs: ordered list of configs
+    :return: OrderedDict of config => set of configs it depends on
+    """
+    dependencies = OrderedDict()
+    for index, config in enumerate(configs):
+        related_models = get_related_models(config)
+        depends_on = set(config.depends_on or [])
+
+        dependencies[config] = {
+            earlier for earlier in configs[:index]
+            if earlier.model is config.model or earlier.model in related_models or earlier.__name__ in depends_on
+        }
+
+    return dependencies
+
+
+def get_config_levels(dependencies):
+    """
+    Split configs into levels in topological order, configs of one level don't depend on each other
+
+    :param dependencies: dict of config => set of configs it depends on
+    :return: list of lists of configs
+    """
+    config_levels = OrderedDict()
+    for config, config_dependencies in dependencies.items():
+        config_levels[config] = max(
+            (config_levels[dependency] + 1 for dependency in config_dependencies if dependency in config_levels),
+            default=0
+        )
+
+    levels = [[] for _ in range(max(config_levels.values(), default=-1) + 1)]
+    for config, level in config_levels.items():
+        levels[level].append(config)
+
+    return levels
@@ -1,14 +1,83 @@
 import copy
 import logging
+import time
 
-from django.db import connections
+from django.db import DatabaseError, connections, transaction
 from django.core.cache import cache
 
 log = logging.getLogger(__name__)
 
 
+class IdsMapping(object):
+    """
+    Legacy id => imported id mapping.
+
+    The mapping is loaded from the cache once and kept locally, new entries
+    are flushed to the cache in batches and merged with entries of other
+    import workers.
+    """
+
+    cache_key = 'ids_mapping'
+    lock_key = 'ids_mapping_lock'
+
+    def __init__(self):
+        self._mapping = None
+        self._pending = {}
+
+    @property
+    def mapping(self):
+        if self._mapping is None:
+            self._mapping = cache.get(self.cache_key, {})
+        return self._mapping
+
+    def set(self, legacy_id, new_id):
+        self.mapping[legacy_id] = new_id
+        self._pending[legacy_id] = new_id
+
+    def flush(self):
+        if not self._pending:
+            return
+
+        with cache.lock(self.lock_key):
+            mapping = cache.get(self.cache_key, {})
+            mapping.update(self._pending)
+            cache.set(self.cache_key, mapping, None)
+
+        self._mapping = mapping
+        self._pending = {}
+
+    def reload(self):
+        self._mapping = None
+        self._pending = {}
+
+
+ids_mapping = IdsMapping()
+
+
+class ImportCheckpoints(object):
+    """
+    Number of imported rows of every config, kept in the cache to resume interrupted streaming imports
+    """
+
+    cache_key = 'importer_checkpoint:{}'
+
+    def get(self, config):
+        return cache.get(self.cache_key.format(config.__name__), 0)
+
+    def set(self, config, offset):
+        cache.set(self.cache_key.format(config.__name__), offset, None)
+
+    def delete(self, config):
+        cache.delete(self.cache_key.format(config.__name__))
+
+
+checkpoints = ImportCheckpoints()
+
+
 class CoreImporter(object):
 
+    chunk_size = 1000
+
     @staticmethod
     def dictfetchall(cursor):
         """Return all rows from a cursor as a dict"""
@@ -26,11 +95,23 @@ class CoreImporter(object):
             return cursor.fetchone()[0] if one else cls.dictfetchall(cursor)
 
     @classmethod
-    def import_data(cls, config, params=None):
-        if params is None:
-            params = {}
+    def iter_chunks(cls, sql, chunk_size):  # pragma: no cover
+        """Fetch rows with a named server-side cursor, chunk_size rows at a time"""
+        with connections['import'].chunked_cursor() as cursor:
+            cursor.execute(sql)
+            columns = [col[0] for col in cursor.description]
+
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+
+                yield [dict(zip(columns, row)) for row in rows]
 
-        lbk_query = config.lbk_model.format(**params)
+    @classmethod
+    def get_queries(cls, config, params=None):
+        """Return count and select queries of the config"""
+        lbk_query = config.lbk_model.format(**(params or {}))
         distinct_query = (
             'DISTINCT ON ({}) '.format(','.join(config.distinct))
             if isinstance(config.distinct, list) else ''
@@ -38,31 +119,39 @@ class CoreImporter(object):
         group_by = ''
         if isinstance(config.distinct, list):
             group_by = 'GROUP BY {}'.format(','.join(config.distinct))
-            total = cls.execute_sql(
+            count_query = (
                 "SELECT count(*) FROM "
                 "(SELECT {list} FROM {query} {group_by}) as sub".format(
                     query=lbk_query, group_by=group_by,
                     list=','.join(config.distinct)
-                ),
-                one=True
+                )
             )
         else:
-            total = cls.execute_sql(
-                "SELECT count(*) FROM {} {}".format(lbk_query, group_by),
-                one=True
-            )
-        rows = cls.execute_sql("SELECT {} {} FROM {} order by {}".format(
+            count_query = "SELECT count(*) FROM {} {}".format(lbk_query, group_by)
+
+        rows_query = "SELECT {} {} FROM {} order by {}".format(
             distinct_query, config.select, lbk_query, ','.join(
                 config.distinct + [config.order_by])
             if isinstance(config.distinct, list) else config.order_by
-        ))
+        )
+
+        return count_query, rows_query
+
+    @classmethod
+    def import_data(cls, config, params=None):
+        if params is None:
+            params = {}
+
+        count_query, rows_query = cls.get_queries(config, params)
+        total = cls.execute_sql(count_query, one=True)
+        rows = cls.execute_sql(rows_query)
         progress_format = '[%{count}d / %{count}d]'.format(
             count=len(str(total))
         )
 
         print(
             'Importing data from %s LBK model to %s. Total objects: %s' % (
-                lbk_query, config.model.__name__, total
+                config.lbk_model.format(**params), config.model.__name__, total
             )
         )
 
@@ -93,22 +182,118 @@ class CoreImporter(object):
                     progress_str, str(row['id'])
                 ))
 
+        if not params:
+            ids_mapping.flush()
+
         return instance
 
     @classmethod
-    def import_row(cls, row, config):
+    def stream_data(cls, config, chunk_size=None, resume=False):
+        """
+        Import config rows streamed from the legacy database chunk by chunk.
+
+        Existence is checked once per chunk, bulk configs are inserted with
+        one query per chunk. The number of imported rows is saved after every
+        chunk, with resume=True import continues from the saved checkpoint.
+
+        :return: number of processed rows
+        """
+        chunk_size = chunk_size or cls.chunk_size
+        count_query, rows_query = cls.get_queries(config)
+        total = cls.execute_sql(count_query, one=True)
+
+        offset = checkpoints.get(config) if resume else 0
+        if offset:
+            rows_query = '{} OFFSET {}'.format(rows_query, offset)
+
+        progress_format = '[%{count}d / %{count}d]'.format(
+            count=len(str(total))
+        )
+
+        print(
+            'Streaming data from %s LBK model to %s. Total objects: %s, starting at: %s' % (
+                config.lbk_model, config.model.__name__, total, offset
+            )
+        )
+
+        started_at = time.monotonic()
+        imported = 0
+        for chunk in cls.iter_chunks(rows_query, chunk_size):
+            cls.import_chunk(chunk, config)
+
+            offset += len(chunk)
+            imported += len(chunk)
+            ids_mapping.flush()
+            checkpoints.set(config, offset)
+
+            print('%s %s rows imported, %.1f rows/s' % (
+                progress_format % (offset, total), config.model.__name__,
+                imported / max(time.monotonic() - started_at, 0.001)
+            ))
+
+        checkpoints.delete(config)
+
+        return imported
+
+    @classmethod
+    def import_chunk(cls, rows, config):
+        instance = None
+        bulk_rows = {}
+        for row, exists in zip(rows, config.exists_many(rows)):
+            if exists:
+                continue
+
+            if config.dependency:
+                row = cls.import_dependencies(row, config)
+
+            if not config.bulk:
+                instance = cls.import_row(row, config)
+                config.post_process(row, instance)
+                continue
+
+            prepared_row = cls.prepare_row(row, config)
+            if prepared_row is not None:
+                bulk_rows.setdefault(prepared_row['id'], (row, prepared_row))
+
+        if bulk_rows:
+            rows, prepared_rows = zip(*bulk_rows.values())
+            try:
+                with transaction.atomic():
+                    instances = config.bulk_process(prepared_rows)
+            except DatabaseError:
+                log.exception('Bulk insert failed for %s', config.__name__)
+                instances = [cls.process_row(prepared_row, config) for prepared_row in prepared_rows]
+
+            for row, instance in zip(rows, instances):
+                config.post_process(row, instance)
+
+        return instance
+
+    @classmethod
+    def prepare_row(cls, row, config):
         try:
             row = cls.map_columns(row, config)
             row = config.prepare_data(row)
 
-            ids_mapping = cache.get('ids_mapping', {})
-            row = {k: ids_mapping[v] if v in ids_mapping else v for k, v in row.items()}
+            mapping = ids_mapping.mapping
+            return {k: mapping[v] if v in mapping else v for k, v in row.items()}
+        except Exception:
+            log.exception('Cannot prepare %s row', config.__name__)
 
-            instance = config.process(row)
-            return instance
-        except Exception as e:
-            # TODO: handle right exception
-            print(e)
+    @classmethod
+    def process_row(cls, row, config):
+        try:
+            return config.process(row)
+        except Exception:
+            log.exception('Cannot import %s row', config.__name__)
+
+    @classmethod
+    def import_row(cls, row, config):
+        row = cls.prepare_row(row, config)
+        if row is None:
+            return None
+
+        return cls.process_row(row, config)
 
     @classmethod
     def map_columns(cls, row, config):
@@ -140,3 +325,23 @@ class CoreImporter(object):
                 row[column] = related_obj
 
         return row
+
+
+def stream_config(config_name, chunk_size=None, resume=False):
+    """
+    Stream import of one config by name, used by parallel import workers
+
+    :return: tuple of config name, number of processed rows and import time in seconds
+    """
+    from r3sourcer.importer.configs import ALL_CONFIGS
+
+    config = {config.__name__: config for config in ALL_CONFIGS}[config_name]
+
+    ids_mapping.reload()
+    started_at = time.monotonic()
+    try:
+        imported = CoreImporter.stream_data(config, chunk_size=chunk_size, resume=resume)
+    finally:
+        connections.close_all()
+
+    return config_name, imported, time.monotonic() - started_at
@@ -1,11 +1,84 @@
-from django.core.management.base import BaseCommand
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
 
 from r3sourcer.importer.configs import ALL_CONFIGS
-from r3sourcer.importer.importer import CoreImporter
+from r3sourcer.importer.graph import get_config_dependencies, get_config_levels
+from r3sourcer.importer.importer import CoreImporter, stream_config
 
 
 class Command(BaseCommand):
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--streaming', action='store_true', dest='streaming', default=False,
+            help='Stream rows with server-side cursors and import them in chunks'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, dest='chunk_size', default=CoreImporter.chunk_size,
+            help='Rows per chunk in streaming mode'
+        )
+        parser.add_argument(
+            '--resume', action='store_true', dest='resume', default=False,
+            help='Continue streaming import from the saved checkpoints'
+        )
+        parser.add_argument(
+            '--config', action='append', dest='configs', default=[],
+            help='Import only the config with this name, can be repeated'
+        )
+        parser.add_argument(
+            '--workers', type=int, dest='workers', default=1,
+            help='Number of processes importing independent configs in streaming mode'
+        )
+
+    def get_configs(self, names):
+        if not names:
+            return ALL_CONFIGS
+
+        configs_map = {config.__name__: config for config in ALL_CONFIGS}
+        unknown = [name for name in names if name not in configs_map]
+        if unknown:
+            raise CommandError('Unknown configs: {}'.format(', '.join(unknown)))
+
+        return [configs_map[name] for name in names]
+
     def handle(self, *args, **options):
-        for config in ALL_CONFIGS:
-            CoreImporter.import_data(config)
+        configs = self.get_configs(options.get('configs'))
+
+        if not options.get('streaming'):
+            for config in configs:
+                CoreImporter.import_data(config)
+            return
+
+        chunk_size = options.get('chunk_size')
+        resume = options.get('resume', False)
+        workers = options.get('workers') or 1
+
+        levels = get_config_levels(get_config_dependencies(configs))
+
+        executor = None
+        if workers > 1:
+            # forked workers must not share the parent connections
+            connections.close_all()
+            executor = ProcessPoolExecutor(max_workers=workers)
+
+        try:
+            for number, level in enumerate(levels):
+                self.stdout.write('Level {}: {}'.format(number, ', '.join(config.__name__ for config in level)))
+
+                if executor is not None and len(level) > 1:
+                    futures = [
+                        executor.submit(stream_config, config.__name__, chunk_size, resume) for config in level
+                    ]
+                    results = [future.result() for future in futures]
+                else:
+                    results = [stream_config(config.__name__, chunk_size, resume) for config in level]
+
+                for config_name, imported, seconds in results:
+                    self.stdout.write('{}: {} rows in {:.1f}s, {:.1f} rows/s'.format(
+                        config_name, imported, seconds, imported / max(seconds, 0.001)
+                    ))
+        finally:
+            if executor is not None:
+                executor.shutdown()
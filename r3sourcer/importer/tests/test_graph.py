@@ -0,0 +1,25 @@
+from r3sourcer.importer import configs
+from r3sourcer.importer.graph import get_config_dependencies, get_config_levels
+
+
+class TestConfigGraph:
+
+    def test_get_config_dependencies(self):
+        dependencies = get_config_dependencies(configs.ALL_CONFIGS)
+
+        assert configs.ContactConfig in dependencies[configs.ContactUnavailabilityConfig]
+        assert configs.AccountCompanyConfig in dependencies[configs.ClientCompanyConfig]
+        assert configs.ShiftDateConfig in dependencies[configs.JobOfferConfig]
+        assert configs.TimeSheetConfig not in dependencies[configs.JobOfferConfig]
+        assert dependencies[configs.ContactConfig] == set()
+
+    def test_get_config_levels(self):
+        dependencies = get_config_dependencies(configs.ALL_CONFIGS)
+
+        levels = get_config_levels(dependencies)
+
+        config_levels = {config: number for number, level in enumerate(levels) for config in level}
+        assert len(config_levels) == len(configs.ALL_CONFIGS)
+        assert len(levels) < len(configs.ALL_CONFIGS)
+        for config, config_dependencies in dependencies.items():
+            assert all(config_levels[dependency] < config_levels[config] for dependency in config_dependencies)
@@ -1,5 +1,6 @@
 import mock
 
+from django.db import IntegrityError
 from django_mock_queries.query import MockSet, MockModel, create_model
 
 from r3sourcer.importer.importer import CoreImporter
@@ -73,6 +74,13 @@ class CoreTestDepReqConfig(BaseConfig):
     }
 
 
+class CoreTestBulkConfig(BaseConfig):
+    columns = ['id', 'col1']
+    model = Model
+    lbk_model = 'test'
+    bulk = True
+
+
 class TestCoreImporter:
 
     def test_dictfetchall(self):
@@ -275,3 +283,65 @@ class TestCoreImporter:
         res = CoreImporter.import_data(CoreTestDepChildConfig)
 
         assert res.col.col1 == 20
+
+    @mock.patch('r3sourcer.importer.importer.ids_mapping')
+    @mock.patch('r3sourcer.importer.importer.checkpoints')
+    @mock.patch.object(CoreTestChildConfig, 'exists_many')
+    @mock.patch.object(CoreImporter, 'import_row')
+    @mock.patch.object(CoreImporter, 'iter_chunks')
+    @mock.patch.object(CoreImporter, 'execute_sql')
+    def test_stream_data(self, mock_count, mock_chunks, mock_imported, mock_exists, mock_checkpoints,
+                         mock_ids_mapping):
+        mock_count.return_value = 2
+        mock_chunks.return_value = iter([[{'col1': 20, 'id': 1}], [{'col1': 21, 'id': 2}]])
+        mock_imported.side_effect = [Model(col1=20), Model(col1=21)]
+        mock_exists.return_value = [False]
+
+        res = CoreImporter.stream_data(CoreTestChildConfig, chunk_size=1)
+
+        assert res == 2
+        assert mock_imported.call_count == 2
+        assert mock_checkpoints.set.call_args_list == [
+            mock.call(CoreTestChildConfig, 1), mock.call(CoreTestChildConfig, 2)
+        ]
+        assert mock_ids_mapping.flush.call_count == 2
+        mock_checkpoints.delete.assert_called_once_with(CoreTestChildConfig)
+
+    @mock.patch('r3sourcer.importer.importer.checkpoints')
+    @mock.patch.object(CoreImporter, 'iter_chunks')
+    @mock.patch.object(CoreImporter, 'execute_sql')
+    def test_stream_data_resume(self, mock_count, mock_chunks, mock_checkpoints):
+        mock_count.return_value = 10
+        mock_chunks.return_value = iter([])
+        mock_checkpoints.get.return_value = 5
+
+        CoreImporter.stream_data(CoreTestChildConfig, chunk_size=1, resume=True)
+
+        assert mock_chunks.call_args[0][0].endswith('OFFSET 5')
+
+    @mock.patch('r3sourcer.importer.importer.ids_mapping')
+    @mock.patch.object(CoreTestBulkConfig, 'bulk_process')
+    @mock.patch.object(CoreTestBulkConfig, 'exists_many')
+    def test_import_chunk_bulk(self, mock_exists, mock_bulk, mock_ids_mapping):
+        mock_ids_mapping.mapping = {20: 30}
+        mock_exists.return_value = [False, False, True]
+        mock_bulk.return_value = [Model(col1=30)]
+
+        CoreImporter.import_chunk([
+            {'col1': 20, 'id': 1}, {'col1': 20, 'id': 1}, {'col1': 21, 'id': 2},
+        ], CoreTestBulkConfig)
+
+        mock_bulk.assert_called_once_with(({'col1': 30, 'id': 1}, ))
+
+    @mock.patch('r3sourcer.importer.importer.ids_mapping')
+    @mock.patch.object(CoreImporter, 'process_row')
+    @mock.patch.object(CoreTestBulkConfig, 'bulk_process')
+    @mock.patch.object(CoreTestBulkConfig, 'exists_many')
+    def test_import_chunk_bulk_failed(self, mock_exists, mock_bulk, mock_process_row, mock_ids_mapping):
+        mock_ids_mapping.mapping = {}
+        mock_exists.return_value = [False, False]
+        mock_bulk.side_effect = IntegrityError
+
+        CoreImporter.import_chunk([{'col1': 20, 'id': 1}, {'col1': 21, 'id': 2}], CoreTestBulkConfig)
+
+        assert mock_process_row.call_count == 2
@@ -13,3 +13,12 @@ class TestImportData:
         command.handle()
 
         assert mock_import.call_count == len(ALL_CONFIGS)
+
+    @mock.patch.object(CoreImporter, 'stream_data')
+    def test_import_data_streaming(self, mock_stream):
+        mock_stream.return_value = 10
+        command = Command()
+        command.handle(streaming=True, configs=['ContactConfig', 'TagConfig'], chunk_size=10)
+
+        assert mock_stream.call_count == 2
+        assert mock_stream.call_args[1] == {'chunk_size': 10, 'resume': False}
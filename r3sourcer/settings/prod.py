@@ -117,6 +117,11 @@ if 'r3sourcer.apps.logger' in INSTALLED_APPS:
     LOGGER_PORT = env('LOGGER_PORT', LOGGER_PORT)
 
     LOGGER_ENABLED = env('LOGGER_ENABLED', '1') == '1'
+    LOGGER_BUFFER_ENABLED = env('LOGGER_BUFFER_ENABLED', '1') == '1'
+    LOGGER_BUFFER_SIZE = int(env('LOGGER_BUFFER_SIZE', LOGGER_BUFFER_SIZE))
+    LOGGER_BUFFER_MAX_SIZE = int(env('LOGGER_BUFFER_MAX_SIZE', LOGGER_BUFFER_MAX_SIZE))
+    LOGGER_FLUSH_INTERVAL = float(env('LOGGER_FLUSH_INTERVAL', LOGGER_FLUSH_INTERVAL))
+    LOGGER_SPOOL_DIR = env('LOGGER_SPOOL_DIR', root('var', 'logger_spool'))
 
 
 MIDDLEWARE = [
@@ -130,6 +135,8 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'crum.CurrentRequestUserMiddleware',
+    'r3sourcer.apps.core.middleware.RequestContextMiddleware',
+    'r3sourcer.apps.core.middleware.QueryCountHeaderMiddleware',
 ]
 
 ROOT_URLCONF = 'r3sourcer.urls'
@@ -317,6 +324,13 @@ REST_FRAMEWORK = {
 GOOGLE_GEO_CODING_API_KEY = env('GOOGLE_GEO_CODING_API_KEY', '')
 GOOGLE_DISTANCE_MATRIX_API_KEY = env('GOOGLE_DISTANCE_MATRIX_API_KEY', '')
 
+DISTANCE_MATRIX_BACKEND = env('DISTANCE_MATRIX_BACKEND', 'r3sourcer.apps.core.utils.geo.GoogleDistanceMatrixBackend')
+DISTANCE_MATRIX_CONCURRENCY = int(env('DISTANCE_MATRIX_CONCURRENCY', 4))
+# distance matrix requests per second
+DISTANCE_MATRIX_RATE_LIMIT = float(env('DISTANCE_MATRIX_RATE_LIMIT', 10))
+# straight line distance in meters, farther pairs are not sent to the distance matrix API, not limited by default
+DISTANCE_MATRIX_MAX_RADIUS = int(env('DISTANCE_MATRIX_MAX_RADIUS', 0)) or None
+
 # CORE APP
 
 AUTH_USER_MODEL = 'core.User'
@@ -378,6 +392,24 @@ SMS_SERVICE_CLASS = env('SMS_SERVICE_CLASS', 'r3sourcer.apps.sms_interface.servi
 
 FETCH_ADDRESS_RAISE_EXCEPTIONS = env('FETCH_ADDRESS_RAISE_EXCEPTIONS', '0') == '1'
 
+GEOCODING_CACHE_ENABLED = env('GEOCODING_CACHE_ENABLED', '1') == '1'
+GEOCODING_CACHE_TTL = int(env('GEOCODING_CACHE_TTL', 90 * 24 * 60 * 60))
+GEOCODING_CACHE_INVALID_TTL = int(env('GEOCODING_CACHE_INVALID_TTL', 24 * 60 * 60))
+GEOCODING_CACHE_LRU_SIZE = int(env('GEOCODING_CACHE_LRU_SIZE', 10000))
+# maximum backoff in seconds on geocoding OVER_QUERY_LIMIT
+GEOCODING_MAX_BACKOFF = int(env('GEOCODING_MAX_BACKOFF', 32))
+
+# rendered PDFs are reused while the rendered template is unchanged
+PDF_CACHE_TIMEOUT = int(env('PDF_CACHE_TIMEOUT', 30 * 24 * 60 * 60))
+PDF_JOB_TIMEOUT = int(env('PDF_JOB_TIMEOUT', 24 * 60 * 60))
+
+# authenticated users and site master companies are kept in the cache for a short time
+JWT_USER_CACHE_TIMEOUT = int(env('JWT_USER_CACHE_TIMEOUT', 60))
+SITE_COMPANY_CACHE_TIMEOUT = int(env('SITE_COMPANY_CACHE_TIMEOUT', 60))
+
+# report number of database queries of every request in the X-Query-Count header
+QUERY_COUNT_HEADER = env('QUERY_COUNT_HEADER', '1' if DEBUG else '0') == '1'
+
 DATE_FORMAT = 'd/m/Y'
 DATE_MYOB_FORMAT = 'Y-m-d'
 DATE_INPUT_FORMATS = [
@@ -464,6 +496,7 @@ def CAN_LOGIN_AS(request, target_user): return request.user
 CORS_ORIGIN_REGEX_WHITELIST = (
     r'^(https?://)?(\w+\.)?piipai(test)?\.com$',
 )
+CORS_EXPOSE_HEADERS = ('X-Query-Count', )
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
@@ -36,6 +36,12 @@ REST_FRAMEWORK = {
 
 LOGGER_DB = 'testing'
 LOGGER_ENABLED = False
+LOGGER_BUFFER_ENABLED = False
+
+DISTANCE_MATRIX_BACKEND = 'r3sourcer.apps.core.utils.geo.LocalDistanceMatrixBackend'
+GEOCODING_CACHE_ENABLED = False
+JWT_USER_CACHE_TIMEOUT = 0
+SITE_COMPANY_CACHE_TIMEOUT = 0
 
 REDIRECT_DOMAIN = 'r3sourcer.com'
 